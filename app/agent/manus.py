@@ -1,3 +1,5 @@
+import re
+
 from pydantic import Field
 
 from app.agent.browser import BrowserAgent
@@ -10,6 +12,27 @@ from app.tool.python_execute import PythonExecute
 from app.tool.str_replace_editor import StrReplaceEditor
 
 
+BROWSER_TOOL_NAME = "browser_use"
+
+# Signs in a message that the task may need the browser
+BROWSER_HINTS = re.compile(
+    r"https?://|www\.|\b(browse|browser(_use)?|web|website|webpage|page|"
+    r"search|google|url|link|online|internet|navigate|click|download)\b",
+    re.IGNORECASE,
+)
+
+# Signs in a request that the task is work on local files or code
+LOCAL_HINTS = re.compile(
+    r"\b(files?|folders?|director(y|ies)|scripts?|code|functions?|class(es)?|"
+    r"modules?|refactor|debug|tests?|compute|calculate|plot|chart|csv|excel|"
+    r"spreadsheet)\b|\b[\w-]+\.(py|txt|csv|json|md|xlsx?|ya?ml|toml|ipynb)\b",
+    re.IGNORECASE,
+)
+
+# Prompts added by the agent itself rather than the user
+STEP_PROMPTS = (NEXT_STEP_PROMPT, BROWSER_NEXT_STEP_PROMPT)
+
+
 class Manus(BrowserAgent):
     """
     A versatile general-purpose agent that uses planning to solve various tasks.
@@ -37,6 +60,49 @@ class Manus(BrowserAgent):
         )
     )
 
+    # Keep the large browser schema out of requests of clearly local tasks
+    tool_selection: bool = True
+    _browser_exposed: bool = False
+
+    def select_tools(self) -> set[str] | None:
+        """Offer the browser unless the request is clearly local file or code work"""
+        names = set(self.available_tools.tool_map)
+        if self._browser_exposed:
+            return names
+
+        messages = self.memory.messages
+        request = next(
+            (
+                i
+                for i in range(len(messages) - 1, -1, -1)
+                if messages[i].role == "user"
+                and messages[i].content not in STEP_PROMPTS
+            ),
+            None,
+        )
+        # Always offer the browser on the first step of a request
+        if request is None or not any(
+            msg.role == "assistant" for msg in messages[request + 1 :]
+        ):
+            return names
+
+        content = messages[request].content or ""
+        self._browser_exposed = (
+            not LOCAL_HINTS.search(content)
+            or BROWSER_HINTS.search(content) is not None
+            or any(
+                BROWSER_HINTS.search(msg.content or "")
+                or any(
+                    call.function.name == BROWSER_TOOL_NAME
+                    for call in msg.tool_calls or []
+                )
+                for msg in messages[-3:]
+            )
+        )
+        if not self._browser_exposed:
+            names.discard(BROWSER_TOOL_NAME)
+        return names
+
     async def think(self) -> bool:
         """Process current state and decide next actions with appropriate context."""
         # Store original prompt
@@ -4,6 +4,7 @@ from typing import Sequence
 from pydantic import Field, model_validator
 
 from app.agent.toolcall import CompatibleToolCallObject, ToolCallAgent
+from app.llm_scheduler import RequestPriority
 from app.logger import logger
 from app.prompt.planning import NEXT_STEP_PROMPT, PLANNING_SYSTEM_PROMPT
 from app.schema import TOOL_CHOICE_TYPE, Message, ToolCall, ToolChoice
@@ -29,6 +30,7 @@ class PlanningAgent(ToolCallAgent):
     )
     tool_choices: TOOL_CHOICE_TYPE = ToolChoice.AUTO  # type: ignore
     special_tool_names: list[str] = Field(default_factory=lambda: [Terminate().name])
+    request_priority: RequestPriority = RequestPriority.PLANNING
 
     tool_calls: Sequence[ToolCall | CompatibleToolCallObject] = Field(
         default_factory=list
@@ -217,6 +219,7 @@ class PlanningAgent(ToolCallAgent):
             system_msgs=[Message.system_message(self.system_prompt)],
             tools=self.available_tools.to_params(),
             tool_choice=ToolChoice.AUTO,
+            priority=RequestPriority.PLANNING,
         )
         if not response:
             raise RuntimeError("Model refused to create plan")
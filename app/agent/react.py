@@ -5,6 +5,7 @@ from pydantic import Field
 from app.agent.base import BaseAgent
 from app.llm import LLM
 from app.schema import AgentState, Memory
+from app.tracing import TRACER
 
 
 class ReActAgent(BaseAgent, ABC):
@@ -31,7 +32,9 @@ class ReActAgent(BaseAgent, ABC):
 
     async def step(self) -> str:
         """Execute a single step: think and act."""
-        should_act = await self.think()
+        with TRACER.span("agent.think", agent=self.name):
+            should_act = await self.think()
         if not should_act:
             return "Thinking complete - no action needed"
-        return await self.act()
+        with TRACER.span("agent.act", agent=self.name):
+            return await self.act()
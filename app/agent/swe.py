@@ -14,8 +14,8 @@ class SWEAgent(ToolCallAgent):
     system_prompt: str | None = SYSTEM_PROMPT
     next_step_prompt: str | None = NEXT_STEP_TEMPLATE
 
-    available_tools: ToolCollection = ToolCollection(
-        Bash(), StrReplaceEditor(), Terminate()
+    available_tools: ToolCollection = Field(
+        default_factory=lambda: ToolCollection(Bash(), StrReplaceEditor(), Terminate())
     )
     special_tool_names: list[str] = Field(default_factory=lambda: [Terminate().name])
 
@@ -28,9 +28,7 @@ class SWEAgent(ToolCallAgent):
         """Process current state and decide next action"""
         # Update working directory
         self.working_dir = (await self.bash.execute("pwd")).output.strip()
-        assert self.next_step_prompt is not None, "next_step_prompt is not set"
-        self.next_step_prompt = self.next_step_prompt.format(
-            current_dir=self.working_dir
-        )
+        # Format from the template, the formatted prompt cannot be formatted again
+        self.next_step_prompt = NEXT_STEP_TEMPLATE.format(current_dir=self.working_dir)
 
         return await super().think()
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from typing import Any, Sequence, TypeAlias
 
@@ -8,10 +9,12 @@ from pydantic import Field
 
 from app.agent.react import ReActAgent
 from app.exceptions import TokenLimitExceeded
+from app.llm_scheduler import RequestPriority
 from app.logger import logger
 from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
+from app.tool.base import ToolConcurrency
 
 
 CompatibleToolCallObject: TypeAlias = ChatCompletionMessageToolCall
@@ -28,8 +31,8 @@ class ToolCallAgent(ReActAgent):
     system_prompt: str | None = SYSTEM_PROMPT
     next_step_prompt: str | None = NEXT_STEP_PROMPT
 
-    available_tools: ToolCollection = ToolCollection(
-        CreateChatCompletion(), Terminate()
+    available_tools: ToolCollection = Field(
+        default_factory=lambda: ToolCollection(CreateChatCompletion(), Terminate())
     )
     tool_choices: TOOL_CHOICE_TYPE = ToolChoice.AUTO  # type: ignore
     special_tool_names: list[str] = Field(default_factory=lambda: [Terminate().name])
@@ -39,6 +42,26 @@ class ToolCallAgent(ReActAgent):
     )
     _current_base64_image: str | None = None
 
+    # Scheduling priority of this agent's LLM requests
+    request_priority: RequestPriority = RequestPriority.ACTING
+
+    # Start executing tool calls while the model is still streaming the rest
+    early_tool_dispatch: bool = False
+    _dispatched_tool_calls: dict[str, asyncio.Task] = {}
+
+    # Maximum number of tool calls of one step running at the same time
+    max_parallel_tool_calls: int = 4
+    _scheduled_tool_calls: list[tuple[str, ToolConcurrency, asyncio.Task]] = []
+    _tool_call_semaphore: asyncio.Semaphore | None = None
+
+    # Keep the system prompt, tool schemas and history byte-stable across
+    # steps so providers can serve the shared prefix from their prompt cache
+    stable_prompt_prefix: bool = False
+    _prompt_prefix: tuple[tuple, list[Message] | None, list[dict]] | None = None
+
+    # Only send the schemas of the tools `select_tools` picks for each step
+    tool_selection: bool = False
+
     max_steps: int = 30
     max_observe: int | None = None
 
@@ -48,35 +71,33 @@ class ToolCallAgent(ReActAgent):
             user_msg = Message.user_message(self.next_step_prompt)
             self.messages += [user_msg]
 
+        self._cancel_dispatched_tool_calls()
+
         try:
             # Get response with tool options
-            response = await self.llm.ask_tool(
+            system_msgs, tools = self._get_prompt_prefix()
+            self._compact_memory(system_msgs, tools)
+            request = dict(
                 messages=list(self.messages),
-                system_msgs=(
-                    [Message.system_message(self.system_prompt)]
-                    if self.system_prompt
-                    else None
-                ),
-                tools=self.available_tools.to_params(),
+                system_msgs=system_msgs,
+                tools=tools,
                 tool_choice=self.tool_choices,
+                priority=self.request_priority,
             )
-        except ValueError:
-            raise
-        except Exception as e:
-            # Check if this is a RetryError containing TokenLimitExceeded
-            if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
-                token_limit_error = e.__cause__
-                logger.error(
-                    f"🚨 Token limit error (from RetryError): {token_limit_error}"
-                )
-                self.memory.add_message(
-                    Message.assistant_message(
-                        f"Maximum token limit reached, cannot continue execution: {str(token_limit_error)}"
-                    )
+            if self.early_tool_dispatch and self.tool_choices != ToolChoice.NONE:
+                response = await self._ask_tool_with_early_dispatch(request)
+            else:
+                response = await self.llm.ask_tool(**request)
+        except TokenLimitExceeded as e:
+            # Token limit errors are fatal and raised without retries
+            logger.error(f"🚨 Token limit error: {e}")
+            self.memory.add_message(
+                Message.assistant_message(
+                    f"Maximum token limit reached, cannot continue execution: {str(e)}"
                 )
-                self.state = AgentState.FINISHED
-                return False
-            raise
+            )
+            self.state = AgentState.FINISHED
+            return False
 
         self.tool_calls = tool_calls = (
             response.tool_calls if response and response.tool_calls else []
@@ -143,40 +164,214 @@ class ToolCallAgent(ReActAgent):
             # Return last message content if no tool calls
             return self.messages[-1].content or "No content or commands to execute"
 
+        # Start all calls up front; independent ones run concurrently. Calls that
+        # were dispatched while streaming are already running.
+        tasks = [
+            self._dispatched_tool_calls.pop(command.id, None)
+            or self._schedule_tool_call(command)
+            for command in self.tool_calls
+        ]
+
         results = []
-        for command in self.tool_calls:
-            # Reset base64_image for each tool call
-            self._current_base64_image = None
+        try:
+            for command, task in zip(self.tool_calls, tasks):
+                result, base64_image = await task
 
-            result = await self.execute_tool(command)
+                if self.max_observe:
+                    result = result[: self.max_observe]
 
-            if self.max_observe:
-                result = result[: self.max_observe]
+                logger.info(
+                    f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
+                )
 
-            logger.info(
-                f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
+                # Add tool response to memory, in the order the model requested
+                tool_msg = Message.tool_message(
+                    content=result,
+                    tool_call_id=command.id,
+                    name=command.function.name,
+                    base64_image=base64_image,
+                )
+                self.memory.add_message(tool_msg)
+                results.append(result)
+        finally:
+            self._cancel_dispatched_tool_calls()
+
+        return "\n\n".join(results)
+
+    def _schedule_tool_call(
+        self, command: ToolCall | CompatibleToolCallObject
+    ) -> asyncio.Task:
+        """Start a tool call once the earlier calls it may depend on are done.
+
+        Read-only calls run concurrently, calls to a stateful tool keep their order
+        and exclusive calls wait for all earlier calls and block all later ones.
+        At most `max_parallel_tool_calls` calls run at the same time.
+        """
+        name = command.function.name
+        concurrency = self._get_tool_concurrency(command)
+        if concurrency == ToolConcurrency.EXCLUSIVE:
+            after = [task for *_, task in self._scheduled_tool_calls]
+        else:
+            after = [
+                task
+                for other_name, other_concurrency, task in self._scheduled_tool_calls
+                if other_concurrency == ToolConcurrency.EXCLUSIVE
+                or (
+                    other_name == name
+                    and ToolConcurrency.STATEFUL in (concurrency, other_concurrency)
+                )
+            ]
+
+        if self._tool_call_semaphore is None:
+            self._tool_call_semaphore = asyncio.Semaphore(
+                max(1, self.max_parallel_tool_calls)
             )
+        semaphore = self._tool_call_semaphore
+
+        async def run() -> tuple[str, str | None]:
+            if after:
+                await asyncio.wait(after)
+            async with semaphore:
+                return await self._execute_tool_call(command)
+
+        task = asyncio.create_task(run())
+        self._scheduled_tool_calls.append((name, concurrency, task))
+        return task
+
+    def _get_tool_concurrency(
+        self, command: ToolCall | CompatibleToolCallObject
+    ) -> ToolConcurrency:
+        """Concurrency class of a tool call, exclusive if it cannot be determined"""
+        tool = self.available_tools.tool_map.get(command.function.name)
+        if tool is None:
+            return ToolConcurrency.READ_ONLY  # Only produces an error message
+        try:
+            args = json.loads(command.function.arguments or "{}")
+            return tool.get_concurrency(**args)
+        except Exception:
+            return ToolConcurrency.EXCLUSIVE
+
+    async def _ask_tool_with_early_dispatch(self, request: dict) -> Any:
+        """Stream the LLM response and start each tool call as soon as it is complete.
 
-            # Add tool response to memory
-            tool_msg = Message.tool_message(
-                content=result,
-                tool_call_id=command.id,
-                name=command.function.name,
-                base64_image=self._current_base64_image,
+        Dispatched tool calls are scheduled like in `act`, respecting the order
+        between dependent calls; `act` collects their results. If the stream fails
+        before any tool was dispatched, the request falls back to the retried
+        non-streaming path.
+        """
+
+        def dispatch(command: CompatibleToolCallObject) -> None:
+            if command.function.name not in self.available_tools.tool_map:
+                return
+            logger.info(f"⚡ Dispatching tool '{command.function.name}' early")
+            self._dispatched_tool_calls[command.id] = self._schedule_tool_call(command)
+
+        try:
+            return await self.llm.ask_tool_stream(**request, on_tool_call=dispatch)
+        except TokenLimitExceeded:
+            raise
+        except Exception as e:
+            if self._dispatched_tool_calls:
+                raise
+            logger.warning(f"Streaming tool call failed, retrying without stream: {e}")
+            return await self.llm.ask_tool(**request)
+
+    def select_tools(self) -> set[str] | None:
+        """Picks the tools whose schemas are sent with the next request.
+
+        Only called with `tool_selection`. Tools left out can still be executed
+        if the model calls them anyway.
+
+        Returns:
+            set[str] | None: Names of the tools to expose, or None for all.
+        """
+        return None
+
+    def _get_prompt_prefix(self) -> tuple[list[Message] | None, list[dict]]:
+        """Build the system messages and tool schemas that start every request.
+
+        With `stable_prompt_prefix`, tool schemas are serialized with sorted keys
+        and both are reused until the system prompt or tool set changes, and
+        memory is trimmed in batches instead of sliding by one message per step.
+        """
+        names = self.select_tools() if self.tool_selection else None
+        if not self.stable_prompt_prefix:
+            system_msgs = (
+                [Message.system_message(self.system_prompt)]
+                if self.system_prompt
+                else None
             )
-            self.memory.add_message(tool_msg)
-            results.append(result)
+            return system_msgs, self.available_tools.to_params(names)
+
+        key = (
+            self.system_prompt,
+            tuple(
+                name
+                for name in self.available_tools.tool_map
+                if names is None or name in names
+            ),
+        )
+        if self._prompt_prefix is None or self._prompt_prefix[0] != key:
+            if self._prompt_prefix is not None:
+                logger.info("Prompt prefix changed, provider prompt cache will miss")
+            system_msgs = (
+                [Message.system_message(self.system_prompt)]
+                if self.system_prompt
+                else None
+            )
+            tools = json.loads(
+                json.dumps(self.available_tools.to_params(names), sort_keys=True)
+            )
+            self._prompt_prefix = (key, system_msgs, tools)
+            if self.memory.trim_to is None:
+                self.memory.trim_to = self.memory.max_messages // 2
+
+        _, system_msgs, tools = self._prompt_prefix
+        return system_msgs, tools
+
+    def _compact_memory(
+        self, system_msgs: list[Message] | None, tools: list[dict]
+    ) -> None:
+        """Compact the history in memory if the request would not fit the context"""
+        compactor = self.llm.compactor
+        if compactor is None:
+            return
 
-        return "\n\n".join(results)
+        reserved = self.llm.count_request_tokens([], system_msgs, tools)
+        messages = compactor.compact(
+            self.memory.messages,
+            self.llm.history_token_counter(self.memory.messages),
+            reserved,
+        )
+        if messages is not self.memory.messages:
+            self.memory.messages = messages
+
+    def _cancel_dispatched_tool_calls(self) -> None:
+        """Cancel scheduled tool calls that were never consumed by `act`"""
+        for *_, task in self._scheduled_tool_calls:
+            task.cancel()
+        self._scheduled_tool_calls.clear()
+        self._dispatched_tool_calls.clear()
 
     async def execute_tool(self, command: ToolCall | CompatibleToolCallObject) -> str:
         """Execute a single tool call with robust error handling"""
+        observation, self._current_base64_image = await self._execute_tool_call(command)
+        return observation
+
+    async def _execute_tool_call(
+        self, command: ToolCall | CompatibleToolCallObject
+    ) -> tuple[str, str | None]:
+        """Execute a tool call and return its observation and captured screenshot
+
+        The screenshot is returned with the observation instead of being stored on
+        the agent, so concurrently running calls keep their own images.
+        """
         if not command or not command.function or not command.function.name:
-            return "Error: Invalid command format"
+            return "Error: Invalid command format", None
 
         name = command.function.name
         if name not in self.available_tools.tool_map:
-            return f"Error: Unknown tool '{name}'"
+            return f"Error: Unknown tool '{name}'", None
 
         try:
             # Parse arguments
@@ -190,36 +385,25 @@ class ToolCallAgent(ReActAgent):
             await self._handle_special_tool(name=name, result=result)
 
             # Check if result is a ToolResult with base64_image
-            if hasattr(result, "base64_image") and result.base64_image:
-                # Store the base64_image for later use in tool_message
-                self._current_base64_image = result.base64_image
-
-                # Format result for display
-                observation = (
-                    f"Observed output of cmd `{name}` executed:\n{str(result)}"
-                    if result
-                    else f"Cmd `{name}` completed with no output"
-                )
-                return observation
+            base64_image = getattr(result, "base64_image", None) or None
 
-            # Format result for display (standard case)
+            # Format result for display
             observation = (
                 f"Observed output of cmd `{name}` executed:\n{str(result)}"
                 if result
                 else f"Cmd `{name}` completed with no output"
             )
-
-            return observation
+            return observation, base64_image
         except json.JSONDecodeError:
             error_msg = f"Error parsing arguments for {name}: Invalid JSON format"
             logger.error(
                 f"📝 Oops! The arguments for '{name}' don't make sense - invalid JSON, arguments:{command.function.arguments}"
             )
-            return f"Error: {error_msg}"
+            return f"Error: {error_msg}", None
         except Exception as e:
             error_msg = f"⚠️ Tool '{name}' encountered a problem: {str(e)}"
             logger.exception(error_msg)
-            return f"Error: {error_msg}"
+            return f"Error: {error_msg}", None
 
     async def _handle_special_tool(self, name: str, result: Any, **kwargs):
         """Handle special tool execution and state changes"""
@@ -239,3 +423,21 @@ class ToolCallAgent(ReActAgent):
     def _is_special_tool(self, name: str) -> bool:
         """Check if tool name is in special tools list"""
         return name.lower() in [n.lower() for n in self.special_tool_names]
+
+    async def cleanup(self) -> None:
+        """Release resources held by the agent's tools, e.g. interpreter sessions"""
+        self._cancel_dispatched_tool_calls()
+        for tool in self.available_tools.tools:
+            cleanup = getattr(tool, "cleanup", None)
+            if cleanup is not None:
+                try:
+                    await cleanup()
+                except Exception as e:
+                    logger.warning(f"Error cleaning up tool {tool.name}: {e}")
+
+    async def run(self, request: str | None = None) -> str:
+        """Run the agent and release its tools' resources afterwards"""
+        try:
+            return await super().run(request)
+        finally:
+            await self.cleanup()
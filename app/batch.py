@@ -0,0 +1,223 @@
+"""Batch execution of prompts read from a JSONL file.
+
+Each input line is a JSON object with the prompt under `prompt` (or `body`)
+and an optional `id` (or `request_id`; the line number otherwise). Tasks run
+concurrently, bounded by a semaphore, and each result is appended to the
+output JSONL as soon as it is done. Tasks already recorded in the output are
+skipped, so an interrupted run resumes where it left off.
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from pydantic import BaseModel
+
+from app.logger import logger
+from app.session import Session
+
+
+class BatchTask(BaseModel):
+    """A prompt of a batch run"""
+
+    id: str
+    prompt: str
+
+
+class BatchResult(BaseModel):
+    """Outcome of a batch task, written as one line of the output file"""
+
+    id: str
+    status: str  # "success", "error" or "timeout"
+    result: str | None = None
+    error: str | None = None
+    elapsed: float
+    usage: dict
+
+
+def load_tasks(path: str | Path) -> list[BatchTask]:
+    """Reads the tasks of a JSONL prompt file.
+
+    Args:
+        path: Input file, one JSON object per line.
+
+    Returns:
+        list[BatchTask]: Tasks in file order; blank lines are skipped.
+
+    Raises:
+        ValueError: If a line has no prompt or ids are not unique.
+    """
+    tasks = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            prompt = data.get("prompt") or data.get("body")
+            if not prompt:
+                raise ValueError(f"Line {number} of {path} has no prompt")
+            task_id = data.get("id") or data.get("request_id") or number
+            tasks.append(BatchTask(id=str(task_id), prompt=prompt))
+
+    ids = [task.id for task in tasks]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Task ids in {path} are not unique")
+    return tasks
+
+
+def load_finished(path: str | Path, retry_failed: bool = False) -> set[str]:
+    """Reads the ids of tasks already recorded in an output file.
+
+    Args:
+        path: Output file of an earlier run; may not exist.
+        retry_failed: Only count successful tasks as finished.
+
+    Returns:
+        set[str]: Ids of tasks to skip.
+    """
+    finished: set[str] = set()
+    if not Path(path).exists():
+        return finished
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Line cut short by a crash; the task runs again
+                logger.warning(f"Skipping unreadable line {number} of {path}")
+                continue
+            if not isinstance(record, dict) or "id" not in record:
+                logger.warning(f"Skipping line {number} of {path} without a task id")
+                continue
+            if retry_failed and record.get("status") != "success":
+                finished.discard(record["id"])
+            else:
+                finished.add(record["id"])
+    return finished
+
+
+class BatchRunner:
+    """Runs batch tasks concurrently and streams their results to a file.
+
+    Attributes:
+        run_task: Runs one prompt in a fresh session and returns its result.
+        output_path: JSONL file results are appended to.
+        concurrency: Maximum number of tasks running at the same time.
+        timeout: Seconds after which a task is cancelled, None for no limit.
+    """
+
+    def __init__(
+        self,
+        run_task: Callable[[str], Awaitable[str]],
+        output_path: str | Path,
+        concurrency: int = 4,
+        timeout: float | None = None,
+    ):
+        self.run_task = run_task
+        self.output_path = Path(output_path)
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+        # Metrics
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+
+    async def _run_one(self, task: BatchTask) -> BatchResult:
+        # Each task has its own session: usage, token limits and sandbox
+        start = time.perf_counter()
+        status, result, error = "success", None, None
+        async with Session(task.id) as session:
+            try:
+                result = await asyncio.wait_for(
+                    self.run_task(task.prompt), self.timeout
+                )
+            except asyncio.TimeoutError:
+                status, error = "timeout", f"Timed out after {self.timeout} seconds"
+            except Exception as e:
+                status, error = "error", f"{type(e).__name__}: {e}"
+        return BatchResult(
+            id=task.id,
+            status=status,
+            result=result,
+            error=error,
+            elapsed=round(time.perf_counter() - start, 3),
+            usage=session.usage.to_dict(),
+        )
+
+    def _write(self, output, result: BatchResult) -> None:
+        output.write(result.model_dump_json() + "\n")
+        output.flush()
+        if result.status == "success":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        logger.info(
+            f"Task {result.id} finished: {result.status} in {result.elapsed:.1f}s "
+            f"({self.succeeded + self.failed} done, {self.failed} failed)"
+        )
+
+    async def run(self, tasks: list[BatchTask], retry_failed: bool = False) -> dict:
+        """Runs the tasks not yet recorded in the output file.
+
+        Args:
+            tasks: Tasks to run.
+            retry_failed: Run tasks again that failed or timed out before.
+
+        Returns:
+            dict: Statistics of the run.
+        """
+        finished = load_finished(self.output_path, retry_failed)
+        pending = [task for task in tasks if task.id not in finished]
+        self.skipped = len(tasks) - len(pending)
+        if self.skipped:
+            logger.info(f"Resuming: {self.skipped} tasks already finished")
+
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        running: set[asyncio.Task] = set()
+
+        # Terminate a last line cut short by a crash before appending
+        if self.output_path.exists() and self.output_path.stat().st_size:
+            with open(self.output_path, "rb+") as f:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+        with open(self.output_path, "a", encoding="utf-8") as output:
+
+            def on_done(done: asyncio.Task) -> None:
+                semaphore.release()
+                running.discard(done)
+                if not done.cancelled():
+                    self._write(output, done.result())
+
+            try:
+                for task in pending:
+                    # Only start a task when a slot is free, so large files do
+                    # not create all tasks up front
+                    await semaphore.acquire()
+                    running_task = asyncio.create_task(self._run_one(task))
+                    running.add(running_task)
+                    running_task.add_done_callback(on_done)
+                if running:
+                    await asyncio.wait(set(running))
+            finally:
+                for running_task in running:
+                    running_task.cancel()
+
+        return self.get_stats()
+
+    def get_stats(self) -> dict:
+        """Gets batch statistics.
+
+        Returns:
+            dict: Statistics information.
+        """
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
@@ -0,0 +1,352 @@
+"""Record and replay of LLM requests and tool calls.
+
+A cassette captures the completions an `LLM` receives and the results of tool
+calls made through `ToolCollection` during a run, and saves them to a JSON
+file. Replaying the cassette feeds them back without any network access or
+side effects, so agent runs are deterministic and only the framework's own
+work is left to measure:
+
+    async with Cassette("cassettes/manus.json", mode="record"):
+        await Manus().run(prompt)
+
+    async with Cassette("cassettes/manus.json", mode="replay"):
+        await Manus().run(prompt)
+
+Completions are replayed in the order they were recorded. Tool results are
+matched by tool name and arguments, so concurrent tool calls may finish in a
+different order. Local tools whose state the run depends on (e.g. planning)
+keep executing during replay.
+"""
+
+import json
+from collections import defaultdict, deque
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Literal
+
+from openai.types.chat.chat_completion import ChatCompletion
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+
+from app.exceptions import ToolError
+from app.logger import logger
+
+
+if TYPE_CHECKING:
+    from app.tool.base import BaseTool
+
+
+CASSETTE_VERSION = 1
+
+# Tools executed for real during replay: they are local and deterministic, and
+# later steps read their state
+LIVE_TOOLS = frozenset({"planning", "terminate"})
+
+
+class CassetteError(Exception):
+    """Raised when a replayed run asks for something the cassette lacks."""
+
+
+def _tool_key(name: str, tool_input: dict) -> str:
+    return name + ":" + json.dumps(tool_input, sort_keys=True, default=str)
+
+
+def _dump_result(result: Any) -> dict:
+    # Imported here since the LLM module, which the tools import, uses cassettes
+    from app.tool.base import ToolResult
+
+    if isinstance(result, ToolResult):
+        return {"type": type(result).__name__, "data": result.model_dump()}
+    try:
+        json.dumps(result)
+    except TypeError:
+        result = str(result)
+    return {"type": "raw", "data": result}
+
+
+def _load_result(record: dict) -> Any:
+    from app.tool.base import CLIResult, ToolFailure, ToolResult
+
+    if record["type"] == "raw":
+        return record["data"]
+    result_types = {cls.__name__: cls for cls in (ToolResult, CLIResult, ToolFailure)}
+    return result_types.get(record["type"], ToolResult)(**record["data"])
+
+
+def completion_to_chunks(completion: dict) -> list[dict]:
+    """Splits a recorded completion into the chunks of an equivalent stream.
+
+    Args:
+        completion: Completion as returned by `ChatCompletion.model_dump()`.
+
+    Returns:
+        list[dict]: Chunk payloads; the last one carries the usage.
+    """
+    message = completion["choices"][0]["message"]
+    base = {
+        "id": completion.get("id", "chatcmpl-replay"),
+        "object": "chat.completion.chunk",
+        "created": completion.get("created", 0),
+        "model": completion.get("model", ""),
+    }
+
+    def chunk(delta: dict, finish_reason: str | None = None) -> dict:
+        return {
+            **base,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    chunks = [chunk({"role": "assistant", "content": message.get("content")})]
+    for index, call in enumerate(message.get("tool_calls") or []):
+        chunks.append(
+            chunk(
+                {
+                    "tool_calls": [
+                        {
+                            "index": index,
+                            "id": call["id"],
+                            "type": "function",
+                            "function": call["function"],
+                        }
+                    ]
+                }
+            )
+        )
+    finish_reason = completion["choices"][0].get("finish_reason") or "stop"
+    chunks.append({**chunk({}, finish_reason), "usage": completion.get("usage")})
+    return chunks
+
+
+def completion_interaction(
+    content: str | None = None,
+    tool_calls: list[tuple[str, dict]] | None = None,
+    prompt_tokens: int = 100,
+    completion_tokens: int = 20,
+) -> dict:
+    """Builds a scripted completion for a replayed cassette.
+
+    Args:
+        content: Text of the assistant message.
+        tool_calls: (tool name, arguments) of each tool call.
+        prompt_tokens: Reported prompt tokens.
+        completion_tokens: Reported completion tokens.
+
+    Returns:
+        dict: Completion interaction.
+    """
+    message: dict = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {
+                "id": f"call_{index}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }
+            for index, (name, arguments) in enumerate(tool_calls)
+        ]
+    response = {
+        "id": "chatcmpl-replay",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "replay",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+    return {"kind": "completion", "response": response}
+
+
+def tool_interaction(name: str, tool_input: dict, result: Any) -> dict:
+    """Builds a scripted tool result for a replayed cassette.
+
+    Args:
+        name: Tool name.
+        tool_input: Arguments the tool is called with.
+        result: Result to return, a ToolResult or JSON-serializable value.
+
+    Returns:
+        dict: Tool interaction.
+    """
+    return {
+        "kind": "tool",
+        "name": name,
+        "input": tool_input,
+        "result": _dump_result(result),
+    }
+
+
+class _ReplayStream:
+    """Async iterator over recorded stream chunks."""
+
+    def __init__(self, chunks: list[dict]):
+        self._chunks = deque(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ChatCompletionChunk:
+        if not self._chunks:
+            raise StopAsyncIteration
+        return ChatCompletionChunk.model_validate(self._chunks.popleft())
+
+
+class Cassette:
+    """Recording of the LLM completions and tool results of a run.
+
+    Attributes:
+        path: JSON file the cassette is loaded from and saved to.
+        mode: "record" to capture a live run, "replay" to play it back.
+        interactions: Recorded completions and tool results, in order.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        mode: Literal["record", "replay"] = "replay",
+        interactions: list[dict] | None = None,
+        live_tools: frozenset[str] = LIVE_TOOLS,
+    ):
+        """Creates a cassette.
+
+        Args:
+            path: Cassette file. Replay loads it unless interactions are given;
+                record saves to it when the cassette is closed.
+            mode: "record" or "replay".
+            interactions: Interactions to replay instead of loading a file,
+                e.g. a scripted scenario.
+            live_tools: Tools executed for real during replay.
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Invalid cassette mode: {mode}")
+        self.path = Path(path) if path else None
+        self.mode = mode
+        self.live_tools = live_tools
+        if interactions is None and mode == "replay":
+            if self.path is None:
+                raise ValueError("A replayed cassette needs a path or interactions")
+            interactions = json.loads(self.path.read_text(encoding="utf-8"))[
+                "interactions"
+            ]
+        self.interactions: list[dict] = list(interactions or [])
+        self._token: Token | None = None
+        self.rewind()
+
+    def rewind(self) -> None:
+        """Starts replaying from the first interaction again."""
+        self._completions = deque(
+            i for i in self.interactions if i["kind"] == "completion"
+        )
+        self._tool_results: dict[str, deque[dict]] = defaultdict(deque)
+        for interaction in self.interactions:
+            if interaction["kind"] == "tool":
+                key = _tool_key(interaction["name"], interaction["input"])
+                self._tool_results[key].append(interaction)
+
+    def save(self) -> None:
+        """Writes the recorded interactions to the cassette file."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": CASSETTE_VERSION, "interactions": self.interactions}
+        self.path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        logger.info(f"Saved {len(self.interactions)} interactions to {self.path}")
+
+    async def complete(
+        self, send: Callable[[], Awaitable[Any]], stream: bool = False
+    ) -> Any:
+        """Returns the next completion, recording or replaying it.
+
+        Args:
+            send: Sends the live request; only called when recording.
+            stream: Whether a stream of chunks is expected.
+
+        Returns:
+            A ChatCompletion, or an async iterator of chunks if streaming.
+
+        Raises:
+            CassetteError: If a replayed cassette has no completions left.
+        """
+        if self.mode == "record":
+            response = await send()
+            if not stream:
+                self.interactions.append(
+                    {"kind": "completion", "response": response.model_dump()}
+                )
+                return response
+            # Reserve the slot now so completions keep their request order
+            interaction = {"kind": "completion", "chunks": []}
+            self.interactions.append(interaction)
+            return self._record_stream(response, interaction["chunks"])
+
+        if not self._completions:
+            raise CassetteError("Cassette has no more recorded completions")
+        interaction = self._completions.popleft()
+        if "response" in interaction:
+            if stream:
+                return _ReplayStream(completion_to_chunks(interaction["response"]))
+            return ChatCompletion.model_validate(interaction["response"])
+        if not stream:
+            raise CassetteError("Recorded a stream, but replay asked for a completion")
+        return _ReplayStream(interaction["chunks"])
+
+    @staticmethod
+    async def _record_stream(response, chunks: list[dict]):
+        async for chunk in response:
+            chunks.append(chunk.model_dump())
+            yield chunk
+
+    async def execute_tool(self, tool: "BaseTool", tool_input: dict) -> Any:
+        """Executes a tool call, recording or replaying its result.
+
+        Args:
+            tool: Tool being called.
+            tool_input: Arguments of the call.
+
+        Returns:
+            The tool's result.
+
+        Raises:
+            ToolError: If the tool raised it, live or as recorded.
+            CassetteError: If a replayed call was not recorded.
+        """
+        if self.mode == "record":
+            interaction = {"kind": "tool", "name": tool.name, "input": tool_input}
+            try:
+                result = await tool(**tool_input)
+            except ToolError as e:
+                interaction["error"] = e.message
+                self.interactions.append(interaction)
+                raise
+            interaction["result"] = _dump_result(result)
+            self.interactions.append(interaction)
+            return result
+
+        if tool.name in self.live_tools:
+            return await tool(**tool_input)
+        recorded = self._tool_results.get(_tool_key(tool.name, tool_input))
+        if not recorded:
+            raise CassetteError(f"No recorded result for tool call {tool.name}")
+        interaction = recorded.popleft()
+        if "error" in interaction:
+            raise ToolError(interaction["error"])
+        return _load_result(interaction["result"])
+
+    async def __aenter__(self) -> "Cassette":
+        self._token = _current_cassette.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        _current_cassette.reset(self._token)
+        self._token = None
+        if self.mode == "record":
+            self.save()
+
+
+_current_cassette: ContextVar[Cassette | None] = ContextVar("cassette", default=None)
+
+
+def current_cassette() -> Cassette | None:
+    """Gets the cassette active in the current context, if any."""
+    return _current_cassette.get()
@@ -15,6 +15,15 @@ PROJECT_ROOT = get_project_root()
 WORKSPACE_ROOT = PROJECT_ROOT / "workspace"
 
 
+class EndpointSettings(BaseModel):
+    """An additional endpoint serving the model of an LLM configuration"""
+
+    base_url: str = Field(..., description="API base URL")
+    api_key: str | None = Field(
+        None, description="API key (defaults to the configuration's api_key)"
+    )
+
+
 class LLMSettings(BaseModel):
     model: str = Field(..., description="Model name")
     base_url: str = Field(..., description="API base URL")
@@ -27,6 +36,63 @@ class LLMSettings(BaseModel):
     temperature: float = Field(1.0, description="Sampling temperature")
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
+    rpm_limit: int | None = Field(
+        None, description="Maximum requests per minute (None for unlimited)"
+    )
+    tpm_limit: int | None = Field(
+        None, description="Maximum tokens per minute (None for unlimited)"
+    )
+    max_inline_images: int | None = Field(
+        3,
+        description="Number of most recent images sent with a request, older ones "
+        "are replaced by a placeholder (None for all)",
+    )
+    context_window: int | None = Field(
+        None,
+        description="Context window of the model in tokens, enables history "
+        "compaction (None to disable)",
+    )
+    compaction_threshold: float = Field(
+        0.8, description="Share of the context window that triggers compaction"
+    )
+    max_retries: int = Field(
+        3, description="Retries of transient errors (rate limits, timeouts, 5xx)"
+    )
+    hedge_percentile: float | None = Field(
+        None,
+        description="Send a duplicate request when one exceeds this percentile of "
+        "recent latency, e.g. 0.95 (None to disable hedging)",
+    )
+    hedge_max_extra_ratio: float = Field(
+        0.1, description="Maximum share of requests that may be hedged"
+    )
+    endpoints: list[EndpointSettings] | None = Field(
+        None,
+        description="Endpoints to balance requests across (None to use base_url only)",
+    )
+
+
+class LLMCacheSettings(BaseModel):
+    """Configuration for the persistent LLM response cache"""
+
+    enabled: bool = Field(False, description="Whether to cache LLM responses on disk")
+    path: str = Field(
+        "cache/llm_responses.db",
+        description="SQLite database path, relative to the project root",
+    )
+    max_size_mb: float = Field(256, description="Maximum total size of the cache (MB)")
+    ttl: int = Field(86400, description="Time-to-live of cached responses (seconds)")
+
+
+class TracingSettings(BaseModel):
+    """Configuration for tracing spans of agent runs"""
+
+    enabled: bool = Field(False, description="Whether to record spans")
+    path: str | None = Field(
+        "logs/traces.jsonl",
+        description="JSONL file spans are appended to, relative to the project root (None to disable)",
+    )
+    ring_size: int = Field(1000, description="Recent spans kept in memory")
 
 
 class ProxySettings(BaseModel):
@@ -37,6 +103,19 @@ class ProxySettings(BaseModel):
 
 class SearchSettings(BaseModel):
     engine: str = Field(default="Google", description="Search engine the llm to use")
+    parallel_engines: int = Field(
+        2, description="Engines queried at the same time, the first results win"
+    )
+    timeout: float = Field(10, description="Timeout of a search per engine (seconds)")
+    cache: bool = Field(True, description="Whether to cache results of queries on disk")
+    cache_path: str = Field(
+        "cache/web_search.db",
+        description="SQLite database path, relative to the project root",
+    )
+    cache_ttl: int = Field(3600, description="Time-to-live of cached results (seconds)")
+    cache_max_size_mb: float = Field(
+        32, description="Maximum total size of cached results (MB)"
+    )
 
 
 class BrowserSettings(BaseModel):
@@ -79,10 +158,26 @@ class SandboxSettings(BaseModel):
     network_enabled: bool = Field(
         False, description="Whether network access is allowed"
     )
+    pool_min_size: int = Field(
+        0, description="Warm sandboxes kept ready for this configuration"
+    )
+    pool_max_size: int = Field(
+        0, description="Maximum idle warm sandboxes, 0 disables pooling"
+    )
+    docker_pool_size: int = Field(
+        10, description="Connections kept open to the Docker daemon"
+    )
+    docker_max_workers: int = Field(
+        8, description="Threads running blocking Docker calls"
+    )
 
 
 class AppConfig(BaseModel):
     llm: dict[str, LLMSettings]
+    llm_cache: LLMCacheSettings | None = Field(
+        None, description="LLM response cache configuration"
+    )
+    tracing: TracingSettings | None = Field(None, description="Tracing configuration")
     sandbox: SandboxSettings | None = Field(None, description="Sandbox configuration")
     browser_config: BrowserSettings | None = Field(
         None, description="Browser configuration"
@@ -147,6 +242,15 @@ class Config:
             "temperature": base_llm.get("temperature", 1.0),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
+            "rpm_limit": base_llm.get("rpm_limit"),
+            "tpm_limit": base_llm.get("tpm_limit"),
+            "max_inline_images": base_llm.get("max_inline_images", 3),
+            "context_window": base_llm.get("context_window"),
+            "compaction_threshold": base_llm.get("compaction_threshold", 0.8),
+            "max_retries": base_llm.get("max_retries", 3),
+            "hedge_percentile": base_llm.get("hedge_percentile"),
+            "hedge_max_extra_ratio": base_llm.get("hedge_max_extra_ratio", 0.1),
+            "endpoints": base_llm.get("endpoints"),
         }
 
         # handle browser config.
@@ -186,6 +290,14 @@ class Config:
         search_settings = None
         if search_config:
             search_settings = SearchSettings(**search_config)
+        llm_cache_config = raw_config.get("llm_cache", {})
+        llm_cache_settings = None
+        if llm_cache_config:
+            llm_cache_settings = LLMCacheSettings(**llm_cache_config)
+        tracing_config = raw_config.get("tracing", {})
+        tracing_settings = None
+        if tracing_config:
+            tracing_settings = TracingSettings(**tracing_config)
         sandbox_config = raw_config.get("sandbox", {})
         if sandbox_config:
             sandbox_settings = SandboxSettings(**sandbox_config)
@@ -200,6 +312,8 @@ class Config:
                     for name, override_config in llm_overrides.items()
                 },
             },
+            "llm_cache": llm_cache_settings,
+            "tracing": tracing_settings,
             "sandbox": sandbox_settings,
             "browser_config": browser_settings,
             "search_config": search_settings,
@@ -212,6 +326,16 @@ class Config:
         assert self._config is not None, "Config not initialized"
         return self._config.llm
 
+    @property
+    def llm_cache(self) -> LLMCacheSettings | None:
+        assert self._config is not None, "Config not initialized"
+        return self._config.llm_cache
+
+    @property
+    def tracing(self) -> TracingSettings | None:
+        assert self._config is not None, "Config not initialized"
+        return self._config.tracing
+
     @property
     def sandbox(self) -> SandboxSettings | None:
         assert self._config is not None, "Config not initialized"
@@ -11,3 +11,7 @@ class OpenManusError(Exception):
 
 class TokenLimitExceeded(OpenManusError):
     """Exception raised when the token limit is exceeded"""
+
+
+class CircuitBreakerOpen(OpenManusError):
+    """Exception raised when requests to a failing endpoint are rejected"""
@@ -6,6 +6,7 @@ from pydantic import Field
 from app.agent.base import BaseAgent
 from app.flow.base import BaseFlow, PlanStepStatus
 from app.llm import LLM
+from app.llm_scheduler import RequestPriority
 from app.logger import logger
 from app.schema import AgentState, Message, ToolChoice
 from app.tool import PlanningTool
@@ -126,6 +127,7 @@ class PlanningFlow(BaseFlow):
             system_msgs=[system_message],
             tools=[self.planning_tool.to_param()],
             tool_choice=ToolChoice.AUTO,
+            priority=RequestPriority.PLANNING,
         )
         if not response:
             raise RuntimeError("LLM refused to create plan")
@@ -373,7 +375,9 @@ class PlanningFlow(BaseFlow):
             )
 
             response = await self.llm.ask(
-                messages=[user_message], system_msgs=[system_message]
+                messages=[user_message],
+                system_msgs=[system_message],
+                priority=RequestPriority.PLANNING,
             )
 
             return f"Plan completed:\n\n{response}"
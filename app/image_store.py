@@ -0,0 +1,156 @@
+"""Content-addressed storage for images referenced by messages.
+
+Screenshots and other base64 images are written to disk once and messages in
+memory only keep a short reference, so long agent runs do not hold megabytes
+of base64 strings in the process. Identical images are stored once. Files are
+written by a background thread, so storing an image does not block the event
+loop, and the least recently used images are deleted once the directory
+exceeds its size limit.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+class ImageStore:
+    """Disk-backed, content-addressed store for base64 images.
+
+    Attributes:
+        root: Directory holding the images. A temporary directory removed at
+            exit is used if none is given.
+        max_bytes: Size of the stored images above which the least recently
+            used ones are deleted.
+    """
+
+    # Recently used images kept in memory, e.g. the ones inlined on every step
+    MAX_CACHED_IMAGES = 8
+    MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, root: str | Path | None = None, max_bytes: int = MAX_BYTES):
+        self._root = Path(root) if root else None
+        self.max_bytes = max_bytes
+        self._tmpdir: tempfile.TemporaryDirectory | None = None
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Images not written yet, and the size of stored ones by last use
+        self._pending: dict[str, str] = {}
+        self._sizes: OrderedDict[str, int] | None = None
+        self._total_bytes = 0
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="image-store")
+
+    @property
+    def root(self) -> Path:
+        if self._root is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="openmanus-images-")
+            self._root = Path(self._tmpdir.name)
+        self._root.mkdir(parents=True, exist_ok=True)
+        return self._root
+
+    @staticmethod
+    def make_ref(base64_image: str) -> str:
+        """Reference of an image: the SHA-256 of its base64 data"""
+        return hashlib.sha256(base64_image.encode("ascii")).hexdigest()
+
+    def _path(self, ref: str) -> Path:
+        return self.root / f"{ref}.b64"
+
+    def _remember(self, ref: str, base64_image: str) -> None:
+        self._cache[ref] = base64_image
+        self._cache.move_to_end(ref)
+        while len(self._cache) > self.MAX_CACHED_IMAGES:
+            self._cache.popitem(last=False)
+
+    def _load_sizes(self) -> OrderedDict[str, int]:
+        """Sizes of the images already on disk, least recently used first"""
+        if self._sizes is None:
+            stats = [(path.stem, path.stat()) for path in self.root.glob("*.b64")]
+            stats.sort(key=lambda item: item[1].st_mtime)
+            self._sizes = OrderedDict((ref, stat.st_size) for ref, stat in stats)
+            self._total_bytes = sum(self._sizes.values())
+        return self._sizes
+
+    def _touch(self, ref: str) -> None:
+        if self._sizes is not None and ref in self._sizes:
+            self._sizes.move_to_end(ref)
+
+    def _write(self, ref: str, base64_image: str) -> None:
+        """Writes an image to disk and deletes the least recently used ones"""
+        path = self._path(ref)
+        if not path.exists():
+            # Write to a temporary file first so readers never see partial data
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(base64_image, encoding="ascii")
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._pending.pop(ref, None)
+            sizes = self._load_sizes()
+            if ref not in sizes:
+                sizes[ref] = len(base64_image)
+                self._total_bytes += sizes[ref]
+            sizes.move_to_end(ref)
+            while self._total_bytes > self.max_bytes and len(sizes) > 1:
+                old_ref, size = sizes.popitem(last=False)
+                self._total_bytes -= size
+                self._cache.pop(old_ref, None)
+                self._path(old_ref).unlink(missing_ok=True)
+
+    def put(self, base64_image: str) -> str:
+        """Stores an image.
+
+        Args:
+            base64_image: Base64 encoded image data.
+
+        Returns:
+            Reference to retrieve the image with `get`.
+        """
+        ref = self.make_ref(base64_image)
+        with self._lock:
+            if ref not in self._pending and (
+                self._sizes is None or ref not in self._sizes
+            ):
+                self._pending[ref] = base64_image
+                self._writer.submit(self._write, ref, base64_image)
+            self._touch(ref)
+            self._remember(ref, base64_image)
+        return ref
+
+    def get(self, ref: str) -> str | None:
+        """Loads an image.
+
+        Args:
+            ref: Reference returned by `put`.
+
+        Returns:
+            The base64 encoded image, or None if it is not in the store, e.g.
+            because it was deleted to keep the store within `max_bytes`.
+        """
+        with self._lock:
+            self._touch(ref)
+            if ref in self._cache:
+                self._cache.move_to_end(ref)
+                return self._cache[ref]
+            if ref in self._pending:
+                return self._pending[ref]
+            try:
+                base64_image = self._path(ref).read_text(encoding="ascii")
+            except FileNotFoundError:
+                return None
+            self._remember(ref, base64_image)
+            return base64_image
+
+    def flush(self) -> None:
+        """Waits until all stored images are written to disk."""
+        self._writer.submit(lambda: None).result()
+
+    def __contains__(self, ref: str) -> bool:
+        return ref in self._cache or ref in self._pending or self._path(ref).exists()
+
+
+IMAGE_STORE = ImageStore()
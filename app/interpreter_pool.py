@@ -0,0 +1,297 @@
+"""Pool of warm Python interpreter processes for executing code snippets.
+
+Starting a process per snippet costs hundreds of milliseconds before user
+code runs. Workers are instead forked ahead of time from a fork server that
+has already imported common modules, so a snippet only waits for the code
+itself. Workers used without a session are discarded after one snippet, so
+snippets stay isolated from each other. A session keeps its worker and with
+it the variables and imports of earlier snippets.
+
+This module only depends on the standard library so workers start quickly.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import sys
+from multiprocessing.connection import Connection
+
+
+# Imported once by the fork server so every worker starts with them loaded.
+# Modules that are not installed are skipped.
+DEFAULT_PRELOAD_MODULES = (
+    "collections",
+    "datetime",
+    "itertools",
+    "json",
+    "math",
+    "re",
+    "numpy",
+    "pandas",
+)
+
+
+class _CappedWriter(io.TextIOBase):
+    """Text stream keeping only the first `limit` characters written."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts: list[str] = []
+        self.size = 0
+        self.dropped = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        keep = text[: max(0, self.limit - self.size)]
+        if keep:
+            self.parts.append(keep)
+            self.size += len(keep)
+        self.dropped += len(text) - len(keep)
+        return len(text)
+
+    def getvalue(self) -> str:
+        value = "".join(self.parts)
+        if self.dropped:
+            value += f"\n... [{self.dropped} characters of output truncated]"
+        return value
+
+
+def _new_namespace() -> dict:
+    if isinstance(__builtins__, dict):
+        return {"__builtins__": __builtins__, "__name__": "__main__"}
+    return {"__builtins__": __builtins__.__dict__.copy(), "__name__": "__main__"}
+
+
+def _worker_main(conn: Connection) -> None:
+    """Runs snippets received over the connection in one namespace."""
+    namespace = _new_namespace()
+    while True:
+        try:
+            code, max_output = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        output = _CappedWriter(max_output)
+        original_stdout = sys.stdout
+        sys.stdout = output
+        try:
+            exec(code, namespace, namespace)
+            result = {"observation": output.getvalue(), "success": True}
+        except (Exception, SystemExit) as e:
+            result = {"observation": str(e), "success": False}
+        finally:
+            sys.stdout = original_stdout
+        conn.send(result)
+
+
+class _Worker:
+    """A started interpreter process and the connection to it."""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    async def run(self, code: str, timeout: float, max_output: int) -> dict | None:
+        """Runs a snippet, None if it did not finish in time."""
+        self.conn.send((code, max_output))
+        if not await asyncio.to_thread(self.conn.poll, timeout):
+            return None
+        return self.conn.recv()
+
+    def close(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class InterpreterPool:
+    """Warm interpreter processes shared by all PythonExecute tools.
+
+    Attributes:
+        size: Number of idle workers kept ready.
+        preload_modules: Modules imported by the fork server before forking.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        preload_modules: tuple[str, ...] = DEFAULT_PRELOAD_MODULES,
+    ):
+        self.size = size
+        self.preload_modules = preload_modules
+        self._ctx = None
+
+        self._idle: list[_Worker] = []
+        self._sessions: dict[str, _Worker] = {}
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._refill_task: asyncio.Task | None = None
+
+        # Metrics
+        self.runs = 0
+        self.warm_starts = 0
+        self.cold_starts = 0
+        self.timeouts = 0
+
+    def _get_context(self):
+        if self._ctx is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                self._ctx = multiprocessing.get_context("forkserver")
+                self._ctx.set_forkserver_preload([__name__, *self.preload_modules])
+            else:
+                self._ctx = multiprocessing.get_context("spawn")
+        return self._ctx
+
+    async def _start_worker(self) -> _Worker:
+        return await asyncio.to_thread(_Worker, self._get_context())
+
+    async def _refill(self) -> None:
+        while len(self._idle) < self.size:
+            self._idle.append(await self._start_worker())
+
+    def _schedule_refill(self) -> None:
+        task = self._refill_task
+        if (
+            task is None
+            or task.done()
+            or task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _take_worker(self) -> _Worker:
+        """Takes an idle worker, starting one if none is ready."""
+        worker = None
+        while self._idle and worker is None:
+            candidate = self._idle.pop()
+            if candidate.alive:
+                worker = candidate
+            else:
+                candidate.close()
+
+        if worker is not None:
+            self.warm_starts += 1
+        else:
+            worker = await self._start_worker()
+            self.cold_starts += 1
+
+        self._schedule_refill()
+        return worker
+
+    async def _run_on(
+        self, worker: _Worker, code: str, timeout: float, max_output: int
+    ) -> dict:
+        """Runs a snippet on a worker, killing the worker if it fails."""
+        self.runs += 1
+        try:
+            result = await worker.run(code, timeout, max_output)
+        except (EOFError, OSError):
+            worker.close()
+            return {"observation": "Interpreter process exited", "success": False}
+
+        if result is None:
+            self.timeouts += 1
+            worker.close()
+            return {
+                "observation": f"Execution timeout after {timeout} seconds",
+                "success": False,
+            }
+        return result
+
+    async def run(
+        self,
+        code: str,
+        timeout: float = 5,
+        session_id: str | None = None,
+        max_output: int = 10000,
+    ) -> dict:
+        """Executes a code snippet.
+
+        Args:
+            code: Python code to execute.
+            timeout: Seconds after which the worker is killed and replaced.
+            session_id: Runs in the persistent namespace of this session. A new
+                namespace is used for each snippet if None.
+            max_output: Maximum characters of printed output returned.
+
+        Returns:
+            dict: 'observation' with the printed output or error message and
+            'success' status.
+        """
+        if session_id is None:
+            worker = await self._take_worker()
+            try:
+                return await self._run_on(worker, code, timeout, max_output)
+            finally:
+                worker.close()
+
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            worker = self._sessions.get(session_id)
+            if worker is None or not worker.alive:
+                worker = self._sessions[session_id] = await self._take_worker()
+
+            try:
+                result = await self._run_on(worker, code, timeout, max_output)
+            except asyncio.CancelledError:
+                # The snippet may still be running and its result would be
+                # read as the result of the next snippet
+                worker.close()
+                self._sessions.pop(session_id, None)
+                raise
+            if not worker.alive:
+                self._sessions.pop(session_id, None)
+                result["observation"] += (
+                    "\nThe interpreter was restarted; variables and imports of "
+                    "earlier executions are lost."
+                )
+            return result
+
+    async def release_session(self, session_id: str) -> None:
+        """Stops the worker of a session, discarding its namespace.
+
+        Args:
+            session_id: Session passed to `run`.
+        """
+        lock = self._session_locks.pop(session_id, None)
+        if lock is not None:
+            async with lock:
+                worker = self._sessions.pop(session_id, None)
+                if worker is not None:
+                    worker.close()
+
+    def close(self) -> None:
+        """Stops all workers."""
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            self._refill_task = None
+        for worker in [*self._idle, *self._sessions.values()]:
+            worker.close()
+        self._idle.clear()
+        self._sessions.clear()
+        self._session_locks.clear()
+
+    def get_stats(self) -> dict:
+        """Gets pool statistics.
+
+        Returns:
+            dict: Statistics information.
+        """
+        return {
+            "idle": len(self._idle),
+            "sessions": len(self._sessions),
+            "runs": self.runs,
+            "warm_starts": self.warm_starts,
+            "cold_starts": self.cold_starts,
+            "timeouts": self.timeouts,
+        }
+
+
+INTERPRETER_POOL = InterpreterPool()
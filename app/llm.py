@@ -1,26 +1,30 @@
+import asyncio
+import hashlib
+import json
 import math
-from typing import Any, cast
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, cast
 
 import tiktoken
-from openai import (
-    APIError,
-    AsyncAzureOpenAI,
-    AsyncOpenAI,
-    AuthenticationError,
-    OpenAIError,
-    RateLimitError,
-)
+from openai import APIError, AuthenticationError, OpenAIError, RateLimitError
 from openai.types.chat.chat_completion import ChatCompletion
+from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
 from openai.types.chat.chat_completion_message import ChatCompletionMessage
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_random_exponential,
+from openai.types.chat.chat_completion_message_tool_call import (
+    ChatCompletionMessageToolCall,
 )
 
+from app.cassette import current_cassette
 from app.config import LLMSettings, config
 from app.exceptions import TokenLimitExceeded
+from app.image_store import IMAGE_STORE
+from app.llm_cache import ResponseCache
+from app.llm_compaction import ContextCompactor
+from app.llm_endpoints import EndpointPool, create_client
+from app.llm_hedging import HedgePolicy
+from app.llm_retry import CircuitBreaker, RetryPolicy
+from app.llm_scheduler import RequestPriority, RequestScheduler
 from app.logger import logger  # Assuming a logger is set up in your app
 from app.schema import (
     ROLE_VALUES,
@@ -29,6 +33,7 @@ from app.schema import (
     Message,
     ToolChoice,
 )
+from app.tracing import TRACER, traced
 
 
 REASONING_MODELS = ["o1", "o3-mini"]
@@ -42,6 +47,59 @@ MULTIMODAL_MODELS = [
 ]
 
 
+# Replaces images that are no longer inlined in requests
+IMAGE_PLACEHOLDER = "[Earlier image omitted to save context]"
+
+
+class TokenUsage:
+    """Tokens used by one unit of work, e.g. a single task of a batch run"""
+
+    def __init__(self):
+        self.requests = 0
+        self.input_tokens = 0
+        self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+
+    def add(
+        self,
+        input_tokens: int,
+        completion_tokens: int,
+        cached_prompt_tokens: int,
+        requests: int = 1,
+    ) -> None:
+        self.requests += requests
+        self.input_tokens += input_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_prompt_tokens += cached_prompt_tokens
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+        }
+
+
+# Usage of the current task; tasks it starts share it since they copy the context
+_current_usage: ContextVar[TokenUsage | None] = ContextVar("token_usage", default=None)
+
+
+def track_token_usage() -> TokenUsage:
+    """Counts the tokens of all LLM requests made from the current context on.
+
+    LLM instances are shared, so their totals mix concurrent tasks. Call this at
+    the start of a task to get the usage of that task alone; token limits are
+    then checked against it as well. `Session` does this for each session.
+
+    Returns:
+        TokenUsage: Usage updated by every following request of the task.
+    """
+    usage = TokenUsage()
+    _current_usage.set(usage)
+    return usage
+
+
 class TokenCounter:
     # Token constants
     BASE_MESSAGE_TOKENS = 4
@@ -54,8 +112,22 @@ class TokenCounter:
     HIGH_DETAIL_TARGET_SHORT_SIDE = 768
     TILE_SIZE = 512
 
+    # Cache constants
+    MAX_CACHED_MESSAGES = 4096
+    MAX_CACHED_TOOLS = 256
+
     def __init__(self, tokenizer):
         self.tokenizer = tokenizer
+        # Per-message token counts keyed by a hash of the formatted message, so
+        # only messages that were not seen before need to be encoded
+        self._message_cache: OrderedDict[str, int] = OrderedDict()
+        # Token counts of tool schemas keyed by a hash of their serialized form
+        self._tool_cache: dict[str, int] = {}
+        # Token counts of tool schema dicts by identity: memoized schemas are
+        # passed unchanged on every request, so they need not be serialized
+        self._tool_counts_by_id: dict[int, tuple[dict, int]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def count_text(self, text: str) -> int:
         """Calculate tokens for a text string"""
@@ -151,31 +223,178 @@ class TokenCounter:
                 token_count += self.count_text(function.get("arguments", ""))
         return token_count
 
+    @staticmethod
+    def _hash(obj: Any) -> str:
+        """Build a stable cache key for a JSON-like object"""
+        payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def count_single_message(self, message: dict) -> int:
+        """Calculate the number of tokens in a single message"""
+        tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+
+        # Add role tokens
+        tokens += self.count_text(message.get("role", ""))
+
+        # Add content tokens
+        if "content" in message:
+            tokens += self.count_content(message["content"])
+
+        # Add tool calls tokens
+        if "tool_calls" in message:
+            tokens += self.count_tool_calls(message["tool_calls"])
+
+        # Add name and tool_call_id tokens
+        tokens += self.count_text(message.get("name", ""))
+        tokens += self.count_text(message.get("tool_call_id", ""))
+
+        return tokens
+
+    def _count_message_cached(self, message: dict) -> int:
+        """Calculate tokens for a message, reusing the count of an identical message"""
+        key = self._hash(message)
+        tokens = self._message_cache.get(key)
+        if tokens is not None:
+            self.cache_hits += 1
+            self._message_cache.move_to_end(key)
+            return tokens
+
+        self.cache_misses += 1
+        tokens = self.count_single_message(message)
+        self._message_cache[key] = tokens
+        if len(self._message_cache) > self.MAX_CACHED_MESSAGES:
+            self._message_cache.popitem(last=False)
+        return tokens
+
     def count_message_tokens(self, messages: list[dict]) -> int:
-        """Calculate the total number of tokens in a message list"""
+        """Calculate the total number of tokens in a message list
+
+        Counts are cached per message, so on a growing conversation history only
+        the newly appended messages are encoded.
+        """
         total_tokens = self.FORMAT_TOKENS  # Base format tokens
 
         for message in messages:
-            tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
-
-            # Add role tokens
-            tokens += self.count_text(message.get("role", ""))
+            total_tokens += self._count_message_cached(message)
 
-            # Add content tokens
-            if "content" in message:
-                tokens += self.count_content(message["content"])
+        return total_tokens
 
-            # Add tool calls tokens
-            if "tool_calls" in message:
-                tokens += self.count_tool_calls(message["tool_calls"])
+    def count_tool_tokens(self, tools: list[dict] | None) -> int:
+        """Calculate the total number of tokens in a list of tool schemas
 
-            # Add name and tool_call_id tokens
-            tokens += self.count_text(message.get("name", ""))
-            tokens += self.count_text(message.get("tool_call_id", ""))
+        Schema dicts must not be modified after they were counted, since counts
+        of a dict seen before are looked up by its identity.
+        """
+        token_count = 0
+        for tool in tools or []:
+            entry = self._tool_counts_by_id.get(id(tool))
+            if entry is not None and entry[0] is tool:
+                token_count += entry[1]
+                continue
+            key = self._hash(tool)
+            tokens = self._tool_cache.get(key)
+            if tokens is None:
+                tokens = self.count_text(str(tool))
+                self._tool_cache[key] = tokens
+            if len(self._tool_counts_by_id) >= self.MAX_CACHED_TOOLS:
+                self._tool_counts_by_id.clear()
+            # The entry holds a reference, so the id is not reused while cached
+            self._tool_counts_by_id[id(tool)] = (tool, tokens)
+            token_count += tokens
+        return token_count
 
-            total_tokens += tokens
+    def clear_cache(self) -> None:
+        """Drop all cached token counts"""
+        self._message_cache.clear()
+        self._tool_cache.clear()
+        self._tool_counts_by_id.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+class ToolCallAccumulator:
+    """Assembles streamed tool-call deltas into complete tool calls.
+
+    A tool call is considered complete as soon as its arguments parse as a JSON
+    object, when the model starts the next tool call, or when the stream ends.
+    """
+
+    def __init__(self):
+        self._partial: dict[int, dict[str, str]] = {}
+        self._completed: dict[int, ChatCompletionMessageToolCall] = {}
+
+    def add(
+        self, deltas: list[ChoiceDeltaToolCall] | None
+    ) -> list[ChatCompletionMessageToolCall]:
+        """Consume tool-call deltas and return the calls completed by them"""
+        completed = []
+        for delta in deltas or []:
+            # A new tool call implies all previous ones are finished
+            for index in sorted(self._partial):
+                if index < delta.index:
+                    completed.extend(self._complete(index))
+
+            partial = self._partial.setdefault(
+                delta.index, {"id": "", "name": "", "arguments": ""}
+            )
+            if delta.id:
+                partial["id"] = delta.id
+            if delta.function:
+                if delta.function.name:
+                    partial["name"] += delta.function.name
+                if delta.function.arguments:
+                    partial["arguments"] += delta.function.arguments
+
+            if self._arguments_complete(partial):
+                completed.extend(self._complete(delta.index))
+        return completed
+
+    def finish(self) -> list[ChatCompletionMessageToolCall]:
+        """Complete all remaining tool calls at the end of the stream"""
+        completed = []
+        for index in sorted(self._partial):
+            completed.extend(self._complete(index))
+        return completed
+
+    @property
+    def tool_calls(self) -> list[ChatCompletionMessageToolCall]:
+        """All completed tool calls in the order the model emitted them"""
+        return [self._completed[index] for index in sorted(self._completed)]
 
-        return total_tokens
+    @staticmethod
+    def _arguments_complete(partial: dict[str, str]) -> bool:
+        if not partial["id"] or not partial["name"]:
+            return False
+        try:
+            return isinstance(json.loads(partial["arguments"]), dict)
+        except json.JSONDecodeError:
+            return False
+
+    def _complete(self, index: int) -> list[ChatCompletionMessageToolCall]:
+        partial = self._partial.pop(index)
+        tool_call = ChatCompletionMessageToolCall(
+            id=partial["id"],
+            type="function",
+            function={"name": partial["name"], "arguments": partial["arguments"]},
+        )
+        self._completed[index] = tool_call
+        return [tool_call]
+
+
+def get_cached_prompt_tokens(usage: Any) -> int:
+    """Extract the number of prompt tokens served from the provider's cache"""
+    # OpenAI and most compatible servers
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None)
+    if cached is None and isinstance(details, dict):
+        cached = details.get("cached_tokens")
+    if cached is None:
+        # DeepSeek and Anthropic report cache hits as extra usage fields
+        extra = getattr(usage, "model_extra", None) or {}
+        cached = extra.get("prompt_cache_hit_tokens") or extra.get(
+            "cache_read_input_tokens"
+        )
+    return cached or 0
 
 
 class LLM:
@@ -208,9 +427,14 @@ class LLM:
             self.api_version = llm_config.api_version
             self.base_url = llm_config.base_url
 
+            # Number of most recent images inlined in requests
+            self.max_inline_images = getattr(llm_config, "max_inline_images", None)
+
             # Add token counting related attributes
             self.total_input_tokens = 0
             self.total_completion_tokens = 0
+            # Input tokens the provider served from its prompt cache
+            self.total_cached_prompt_tokens = 0
             self.max_input_tokens = (
                 llm_config.max_input_tokens
                 if hasattr(llm_config, "max_input_tokens")
@@ -224,17 +448,56 @@ class LLM:
                 # If the model is not in tiktoken's presets, use cl100k_base as default
                 self.tokenizer = tiktoken.get_encoding("cl100k_base")
 
-            if self.api_type == "azure":
-                self.client = AsyncAzureOpenAI(
-                    base_url=self.base_url,
-                    api_key=self.api_key,
-                    api_version=self.api_version,
+            self.client = create_client(
+                self.api_type, self.base_url, self.api_key, self.api_version
+            )
+
+            # Optional load balancing across several endpoints
+            self.endpoint_pool: EndpointPool | None = None
+            endpoints = getattr(llm_config, "endpoints", None)
+            if endpoints:
+                self.endpoint_pool = EndpointPool.from_settings(
+                    endpoints, self.api_type, self.api_key, self.api_version
                 )
-            else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
 
             self.token_counter = TokenCounter(self.tokenizer)
 
+            # Shared rate limiter for all requests made through this instance
+            self.scheduler = RequestScheduler(
+                rpm_limit=getattr(llm_config, "rpm_limit", None),
+                tpm_limit=getattr(llm_config, "tpm_limit", None),
+            )
+
+            # Retries of transient errors, failing fast while the endpoint is down
+            self.retry_policy = RetryPolicy(
+                max_retries=getattr(llm_config, "max_retries", 3)
+            )
+            self.circuit_breaker = CircuitBreaker()
+
+            # Optional compaction of the history to fit the context window
+            self.compactor: ContextCompactor | None = None
+            context_window = getattr(llm_config, "context_window", None)
+            if context_window:
+                self.compactor = ContextCompactor(
+                    context_window, getattr(llm_config, "compaction_threshold", 0.8)
+                )
+
+            # Optional hedging of slow requests
+            self.hedge_policy: HedgePolicy | None = None
+            hedge_percentile = getattr(llm_config, "hedge_percentile", None)
+            if hedge_percentile:
+                self.hedge_policy = HedgePolicy(
+                    hedge_percentile,
+                    getattr(llm_config, "hedge_max_extra_ratio", 0.1),
+                )
+
+            # Optional persistent response cache
+            self.response_cache: ResponseCache | None = None
+            self.cached_input_tokens = 0
+            self.cached_completion_tokens = 0
+            if config.llm_cache and config.llm_cache.enabled:
+                self.response_cache = ResponseCache.from_settings(config.llm_cache)
+
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
         if not text:
@@ -242,23 +505,192 @@ class LLM:
         return len(self.tokenizer.encode(text))
 
     def count_message_tokens(self, messages: list[dict]) -> int:
-        return self.token_counter.count_message_tokens(messages)
+        with TRACER.span("llm.count_tokens"):
+            return self.token_counter.count_message_tokens(messages)
 
-    def update_token_count(self, input_tokens: int, completion_tokens: int = 0) -> None:
-        """Update token counts"""
+    def count_request_tokens(
+        self,
+        messages: list[dict | Message],
+        system_msgs: list[dict | Message] | None = None,
+        tools: list[dict] | None = None,
+    ) -> int:
+        """Estimate the input tokens of a request as it would be sent"""
+        supports_images = self.model in MULTIMODAL_MODELS
+        formatted = self.format_messages(
+            list(system_msgs or []) + list(messages),
+            supports_images,
+            self.max_inline_images,
+        )
+        return self.count_message_tokens(
+            formatted
+        ) + self.token_counter.count_tool_tokens(tools)
+
+    def history_token_counter(
+        self, messages: list[Message]
+    ) -> Callable[[Message], int]:
+        """Build a counter of the tokens each message of a history adds to a request
+
+        Only the newest `max_inline_images` images of the history are sent inline,
+        so older ones are counted as the placeholder they are replaced by, without
+        loading them from the image store.
+        """
+        with_images = [m for m in messages if m.base64_image or m.image_ref]
+        if self.max_inline_images is not None:
+            with_images = with_images[
+                max(0, len(with_images) - self.max_inline_images) :
+            ]
+        inline = {id(m) for m in with_images}
+        supports_images = self.model in MULTIMODAL_MODELS
+
+        def count(message: Message) -> int:
+            max_images = None if id(message) in inline else 0
+            return self.count_message_tokens(
+                self.format_messages([message], supports_images, max_images)
+            )
+
+        return count
+
+    def update_token_count(
+        self,
+        input_tokens: int,
+        completion_tokens: int = 0,
+        cached_prompt_tokens: int = 0,
+        requests: int = 1,
+    ) -> None:
+        """Update token counts
+
+        Streamed completions are counted after their request was, so their
+        completion tokens are added with `requests=0`.
+        """
         # Only track tokens if max_input_tokens is set
         self.total_input_tokens += input_tokens
         self.total_completion_tokens += completion_tokens
+        self.total_cached_prompt_tokens += cached_prompt_tokens
+        usage = _current_usage.get()
+        if usage is not None:
+            usage.add(input_tokens, completion_tokens, cached_prompt_tokens, requests)
         logger.info(
             f"Token usage: Input={input_tokens}, Completion={completion_tokens}, "
             f"Cumulative Input={self.total_input_tokens}, Cumulative Completion={self.total_completion_tokens}, "
             f"Total={input_tokens + completion_tokens}, Cumulative Total={self.total_input_tokens + self.total_completion_tokens}"
         )
+        if cached_prompt_tokens:
+            logger.info(
+                f"Prompt cache: Cached={cached_prompt_tokens}, "
+                f"Cumulative Cached={self.total_cached_prompt_tokens}, "
+                f"Hit Rate={self.prompt_cache_hit_rate:.1%}"
+            )
+
+    @property
+    def prompt_cache_hit_rate(self) -> float:
+        """Share of input tokens served from the provider's prompt cache"""
+        if not self.total_input_tokens:
+            return 0.0
+        return self.total_cached_prompt_tokens / self.total_input_tokens
+
+    def update_cached_token_count(
+        self, input_tokens: int, completion_tokens: int = 0
+    ) -> None:
+        """Update token counts of responses served from the cache"""
+        self.cached_input_tokens += input_tokens
+        self.cached_completion_tokens += completion_tokens
+        logger.info(
+            f"Cached response: Input={input_tokens}, Completion={completion_tokens}, "
+            f"Cumulative Cached Input={self.cached_input_tokens}, "
+            f"Cumulative Cached Completion={self.cached_completion_tokens}"
+        )
+
+    async def _get_cached_response(self, key: str | None) -> Any | None:
+        """Look up a response in the cache, if enabled"""
+        if self.response_cache is None or key is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.response_cache.get, key)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+
+    async def _set_cached_response(self, key: str | None, value: Any) -> None:
+        """Store a response in the cache, if enabled"""
+        if self.response_cache is None or key is None:
+            return
+        try:
+            await asyncio.to_thread(self.response_cache.set, key, value)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def _make_cache_key(self, kind: str, params: dict) -> str | None:
+        """Build a response cache key from request parameters"""
+        if self.response_cache is None:
+            return None
+        request = {k: v for k, v in params.items() if k not in ("timeout", "stream")}
+        return ResponseCache.make_key(kind=kind, **request)
+
+    async def _create_completion(
+        self,
+        params: dict,
+        input_tokens: int,
+        priority: RequestPriority = RequestPriority.ACTING,
+        **extra,
+    ) -> Any:
+        """Send a completion request once the rate limiter admits it.
+
+        Retryable errors are retried with backoff; each attempt waits for the
+        rate limiter again.
+        """
+        stream = extra.get("stream", params.get("stream", False))
+
+        async def attempt() -> Any:
+            with TRACER.span("llm.queue", priority=priority.name):
+                await self.scheduler.acquire(input_tokens, priority)
+            with TRACER.span("llm.request", model=self.model, stream=stream):
+                if self.hedge_policy is not None and not stream:
+                    # A hedge re-sends the prompt, so it counts against the token budget
+                    return await self.hedge_policy.run(
+                        lambda: self._send_completion(params, **extra),
+                        on_hedge=lambda: self.scheduler.record_usage(input_tokens),
+                    )
+                return await self._send_completion(params, **extra)
+
+        response = await self.retry_policy.call(attempt)
+
+        # Correct the rate limiter's estimate with the actual usage
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            self.scheduler.record_usage(usage.total_tokens - input_tokens)
+        return response
+
+    async def _send_completion(self, params: dict, **extra) -> Any:
+        """Send a completion request to the endpoint pool or the single client"""
+        cassette = current_cassette()
+        if cassette is not None:
+            return await cassette.complete(
+                lambda: self._send_live_completion(params, **extra),
+                stream=extra.get("stream", params.get("stream", False)),
+            )
+        return await self._send_live_completion(params, **extra)
+
+    async def _send_live_completion(self, params: dict, **extra) -> Any:
+        """Send a completion request over the network"""
+        if self.endpoint_pool is not None:
+            return await self.endpoint_pool.request(
+                lambda client: client.chat.completions.create(**params, **extra)
+            )
+        return await self.circuit_breaker.call(
+            lambda: self.client.chat.completions.create(**params, **extra),
+            self.base_url,
+        )
+
+    @property
+    def used_input_tokens(self) -> int:
+        """Input tokens counted against the limit: the current task's if tracked"""
+        usage = _current_usage.get()
+        return usage.input_tokens if usage is not None else self.total_input_tokens
 
     def check_token_limit(self, input_tokens: int) -> bool:
         """Check if token limits are exceeded"""
         if self.max_input_tokens is not None:
-            return (self.total_input_tokens + input_tokens) <= self.max_input_tokens
+            return (self.used_input_tokens + input_tokens) <= self.max_input_tokens
         # If max_input_tokens is not set, always return True
         return True
 
@@ -266,15 +698,28 @@ class LLM:
         """Generate error message for token limit exceeded"""
         if (
             self.max_input_tokens is not None
-            and (self.total_input_tokens + input_tokens) > self.max_input_tokens
+            and (self.used_input_tokens + input_tokens) > self.max_input_tokens
         ):
-            return f"Request may exceed input token limit (Current: {self.total_input_tokens}, Needed: {input_tokens}, Max: {self.max_input_tokens})"
+            return f"Request may exceed input token limit (Current: {self.used_input_tokens}, Needed: {input_tokens}, Max: {self.max_input_tokens})"
 
         return "Token limit exceeded"
 
+    @staticmethod
+    def _append_text(message: dict, text: str) -> None:
+        """Append a text part to the content of a formatted message"""
+        content = message.get("content")
+        if not content:
+            message["content"] = text
+        elif isinstance(content, str):
+            message["content"] = f"{content}\n{text}"
+        else:
+            message["content"] = list(content) + [{"type": "text", "text": text}]
+
     @staticmethod
     def format_messages(
-        messages: list[dict | Message], supports_images: bool = False
+        messages: list[dict | Message],
+        supports_images: bool = False,
+        max_images: int | None = None,
     ) -> list[dict]:
         """
         Format messages for LLM by converting them to OpenAI message format.
@@ -282,6 +727,8 @@ class LLM:
         Args:
             messages: list of messages that can be either dict or Message objects
             supports_images: Flag indicating if the target model supports image inputs
+            max_images: Number of most recent images to inline; older ones are
+                replaced by a text placeholder (None for all)
 
         Returns:
             list[dict]: list of formatted messages in OpenAI format
@@ -300,16 +747,38 @@ class LLM:
         """
         formatted_messages = []
 
-        for message in messages:
-            # Convert Message objects to dictionaries
-            if isinstance(message, Message):
-                message = message.to_dict()
+        # Convert Message objects to dictionaries
+        messages = [m.to_dict() if isinstance(m, Message) else m for m in messages]
 
+        # Only the most recent images are inlined
+        image_indices = [
+            i
+            for i, m in enumerate(messages)
+            if isinstance(m, dict) and (m.get("base64_image") or m.get("image_ref"))
+        ]
+        if max_images is not None:
+            image_indices = image_indices[max(0, len(image_indices) - max_images) :]
+        inline_images = set(image_indices) if max_images != 0 else set()
+
+        for index, message in enumerate(messages):
             if isinstance(message, dict):
                 # If message is a dict, ensure it has required fields
                 if "role" not in message:
                     raise ValueError("Message dict must contain 'role' field")
 
+                # Resolve images kept in the image store
+                image_ref = message.pop("image_ref", None)
+                if supports_images and index not in inline_images:
+                    if message.pop("base64_image", None) or image_ref:
+                        LLM._append_text(message, IMAGE_PLACEHOLDER)
+                elif supports_images and image_ref and not message.get("base64_image"):
+                    base64_image = IMAGE_STORE.get(image_ref)
+                    if base64_image is not None:
+                        message["base64_image"] = base64_image
+                    else:
+                        # Deleted to keep the store within its size limit
+                        LLM._append_text(message, IMAGE_PLACEHOLDER)
+
                 # Process base64 images if present and model supports images
                 if supports_images and message.get("base64_image"):
                     # Initialize or convert content to appropriate format
@@ -360,19 +829,14 @@ class LLM:
 
         return formatted_messages
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @traced("llm.ask")
     async def ask(
         self,
         messages: list[dict | Message],
         system_msgs: list[dict | Message] | None = None,
         stream: bool = True,
         temperature: float | None = None,
+        priority: RequestPriority = RequestPriority.ACTING,
     ) -> str:
         """
         Send a prompt to the LLM and get the response.
@@ -382,6 +846,7 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            priority: Scheduling priority of the request
 
         Returns:
             str: The generated response
@@ -399,9 +864,15 @@ class LLM:
             # Format system and user messages with image support check
             if system_msgs:
                 system_msgs = list(self.format_messages(system_msgs, supports_images))
-                messages = system_msgs + self.format_messages(messages, supports_images)
+                messages = system_msgs + self.format_messages(
+                    messages, supports_images, self.max_inline_images
+                )
             else:
-                messages = list(self.format_messages(messages, supports_images))
+                messages = list(
+                    self.format_messages(
+                        messages, supports_images, self.max_inline_images
+                    )
+                )
 
             # Calculate input token count
             input_tokens = self.count_message_tokens(
@@ -432,10 +903,19 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
+            # Serve identical requests from the response cache if enabled
+            cache_key = self._make_cache_key("ask", params)
+            cached = await self._get_cached_response(cache_key)
+            if cached is not None:
+                self.update_cached_token_count(
+                    input_tokens, self.count_tokens(cached["content"])
+                )
+                return cached["content"]
+
             if not stream:
                 # Non-streaming request
-                response = await self.client.chat.completions.create(
-                    **params, stream=False
+                response = await self._create_completion(
+                    params, input_tokens, priority, stream=False
                 )
 
                 if not response.choices or not response.choices[0].message.content:
@@ -444,15 +924,22 @@ class LLM:
                 # Update token counts
                 if response.usage is not None:
                     self.update_token_count(
-                        response.usage.prompt_tokens, response.usage.completion_tokens
+                        response.usage.prompt_tokens,
+                        response.usage.completion_tokens,
+                        get_cached_prompt_tokens(response.usage),
                     )
 
+                await self._set_cached_response(
+                    cache_key, {"content": response.choices[0].message.content}
+                )
                 return response.choices[0].message.content
 
             # Streaming request, For streaming, update estimated token count before making the request
             self.update_token_count(input_tokens)
 
-            response = await self.client.chat.completions.create(**params, stream=True)
+            response = await self._create_completion(
+                params, input_tokens, priority, stream=True
+            )
 
             collected_messages = []
             completion_text = ""
@@ -472,8 +959,9 @@ class LLM:
             logger.info(
                 f"Estimated completion tokens for streaming response: {completion_tokens}"
             )
-            self.total_completion_tokens += completion_tokens
+            self.update_token_count(0, completion_tokens, requests=0)
 
+            await self._set_cached_response(cache_key, {"content": full_response})
             return full_response
 
         except TokenLimitExceeded:
@@ -487,7 +975,7 @@ class LLM:
             if isinstance(oe, AuthenticationError):
                 logger.error("Authentication failed. Check API key.")
             elif isinstance(oe, RateLimitError):
-                logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+                logger.error("Rate limit exceeded. Consider increasing max_retries.")
             elif isinstance(oe, APIError):
                 logger.error(f"API error: {oe}")
             raise
@@ -495,13 +983,6 @@ class LLM:
             logger.exception(f"Unexpected error in ask")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
     async def ask_with_images(
         self,
         messages: list[dict | Message],
@@ -509,6 +990,7 @@ class LLM:
         system_msgs: list[dict | Message] | None = None,
         stream: bool = False,
         temperature: float | None = None,
+        priority: RequestPriority = RequestPriority.ACTING,
     ) -> str:
         """
         Send a prompt with images to the LLM and get the response.
@@ -519,6 +1001,7 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            priority: Scheduling priority of the request
 
         Returns:
             str: The generated response
@@ -538,7 +1021,9 @@ class LLM:
                 )
 
             # Format messages with image support
-            formatted_messages = self.format_messages(messages, supports_images=True)
+            formatted_messages = self.format_messages(
+                messages, supports_images=True, max_images=self.max_inline_images
+            )
 
             # Ensure the last message is from the user to attach images
             if not formatted_messages or formatted_messages[-1]["role"] != "user":
@@ -607,17 +1092,20 @@ class LLM:
 
             # Handle non-streaming request
             if not stream:
-                response = await self.client.chat.completions.create(**params)
+                response = await self._create_completion(params, input_tokens, priority)
 
                 if not response.choices or not response.choices[0].message.content:
                     raise ValueError("Empty or invalid response from LLM")
 
-                self.update_token_count(response.usage.prompt_tokens)
+                self.update_token_count(
+                    response.usage.prompt_tokens,
+                    cached_prompt_tokens=get_cached_prompt_tokens(response.usage),
+                )
                 return response.choices[0].message.content
 
             # Handle streaming request
             self.update_token_count(input_tokens)
-            response = await self.client.chat.completions.create(**params)
+            response = await self._create_completion(params, input_tokens, priority)
 
             collected_messages = []
             async for chunk in response:
@@ -643,7 +1131,7 @@ class LLM:
             if isinstance(oe, AuthenticationError):
                 logger.error("Authentication failed. Check API key.")
             elif isinstance(oe, RateLimitError):
-                logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+                logger.error("Rate limit exceeded. Consider increasing max_retries.")
             elif isinstance(oe, APIError):
                 logger.error(f"API error: {oe}")
             raise
@@ -651,13 +1139,93 @@ class LLM:
             logger.error(f"Unexpected error in ask_with_images: {e}")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    def _prepare_tool_request(
+        self,
+        messages: list[dict | Message],
+        system_msgs: list[dict | Message] | None = None,
+        timeout: int = 300,
+        tools: list[dict] | None = None,
+        tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
+        temperature: float | None = None,
+        **kwargs,
+    ) -> tuple[dict, int]:
+        """
+        Validate and format a tool-calling request.
+
+        Returns:
+            tuple[dict, int]: Completion request parameters and the estimated
+            number of input tokens
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If tools, tool_choice, or messages are invalid
+        """
+        # Validate tool_choice
+        if tool_choice not in TOOL_CHOICE_VALUES:
+            raise ValueError(f"Invalid tool_choice: {tool_choice}")
+
+        # Check if the model supports images
+        supports_images = self.model in MULTIMODAL_MODELS
+
+        # Format messages
+        if system_msgs:
+            system_msgs = list(self.format_messages(system_msgs, supports_images))
+            messages = system_msgs + self.format_messages(
+                messages, supports_images, self.max_inline_images
+            )
+        else:
+            messages = list(
+                self.format_messages(messages, supports_images, self.max_inline_images)
+            )
+
+        # Calculate input token count
+        input_tokens = self.count_message_tokens(
+            list(
+                map(
+                    lambda x: x.model_dump() if not isinstance(x, dict) else x,
+                    messages,
+                )
+            )
+        )
+
+        # If there are tools, calculate token count for tool descriptions
+        tools_tokens = self.token_counter.count_tool_tokens(tools)
+
+        input_tokens += tools_tokens
+
+        # Check if token limits are exceeded
+        if not self.check_token_limit(input_tokens):
+            error_message = self.get_limit_error_message(input_tokens)
+            # Raise a special exception that won't be retried
+            raise TokenLimitExceeded(error_message)
+
+        # Validate tools if provided
+        if tools:
+            for tool in tools:
+                if not isinstance(tool, dict) or "type" not in tool:
+                    raise ValueError("Each tool must be a dict with 'type' field")
+
+        # Set up the completion request
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "timeout": timeout,
+            **kwargs,
+        }
+
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+
+        return params, input_tokens
+
+    @traced("llm.ask_tool")
     async def ask_tool(
         self,
         messages: list[dict | Message],
@@ -666,6 +1234,7 @@ class LLM:
         tools: list[dict] | None = None,
         tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
         temperature: float | None = None,
+        priority: RequestPriority = RequestPriority.ACTING,
         **kwargs,
     ) -> ChatCompletionMessage | None:
         """
@@ -678,6 +1247,7 @@ class LLM:
             tools: list of tools to use
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
+            priority: Scheduling priority of the request
             **kwargs: Additional completion arguments
 
         Returns:
@@ -690,70 +1260,31 @@ class LLM:
             Exception: For unexpected errors
         """
         try:
-            # Validate tool_choice
-            if tool_choice not in TOOL_CHOICE_VALUES:
-                raise ValueError(f"Invalid tool_choice: {tool_choice}")
-
-            # Check if the model supports images
-            supports_images = self.model in MULTIMODAL_MODELS
-
-            # Format messages
-            if system_msgs:
-                system_msgs = list(self.format_messages(system_msgs, supports_images))
-                messages = system_msgs + self.format_messages(messages, supports_images)
-            else:
-                messages = list(self.format_messages(messages, supports_images))
-
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(
-                list(
-                    map(
-                        lambda x: x.model_dump() if not isinstance(x, dict) else x,
-                        messages,
-                    )
-                )
-            )
-
-            # If there are tools, calculate token count for tool descriptions
-            tools_tokens = 0
-            if tools:
-                for tool in tools:
-                    tools_tokens += self.count_tokens(str(tool))
-
-            input_tokens += tools_tokens
-
-            # Check if token limits are exceeded
-            if not self.check_token_limit(input_tokens):
-                error_message = self.get_limit_error_message(input_tokens)
-                # Raise a special exception that won't be retried
-                raise TokenLimitExceeded(error_message)
-
-            # Validate tools if provided
-            if tools:
-                for tool in tools:
-                    if not isinstance(tool, dict) or "type" not in tool:
-                        raise ValueError("Each tool must be a dict with 'type' field")
-
-            # Set up the completion request
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "tools": tools,
-                "tool_choice": tool_choice,
-                "timeout": timeout,
+            params, input_tokens = self._prepare_tool_request(
+                messages,
+                system_msgs=system_msgs,
+                timeout=timeout,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=temperature,
                 **kwargs,
-            }
+            )
 
-            if self.model in REASONING_MODELS:
-                params["max_completion_tokens"] = self.max_tokens
-            else:
-                params["max_tokens"] = self.max_tokens
-                params["temperature"] = (
-                    temperature if temperature is not None else self.temperature
+            # Serve identical requests from the response cache if enabled
+            cache_key = self._make_cache_key("ask_tool", params)
+            cached = await self._get_cached_response(cache_key)
+            if cached is not None:
+                message = ChatCompletionMessage.model_validate(cached)
+                self.update_cached_token_count(
+                    input_tokens,
+                    self.token_counter.count_single_message(
+                        message.model_dump(exclude_none=True)
+                    ),
                 )
+                return message
 
-            response: ChatCompletion = await self.client.chat.completions.create(
-                **params, stream=False
+            response: ChatCompletion = await self._create_completion(
+                params, input_tokens, priority, stream=False
             )
 
             # Check if response is valid
@@ -765,9 +1296,14 @@ class LLM:
             # Update token counts
             if response.usage is not None:
                 self.update_token_count(
-                    response.usage.prompt_tokens, response.usage.completion_tokens
+                    response.usage.prompt_tokens,
+                    response.usage.completion_tokens,
+                    get_cached_prompt_tokens(response.usage),
                 )
 
+            await self._set_cached_response(
+                cache_key, response.choices[0].message.model_dump(exclude_none=True)
+            )
             return response.choices[0].message
 
         except TokenLimitExceeded:
@@ -781,10 +1317,148 @@ class LLM:
             if isinstance(oe, AuthenticationError):
                 logger.error("Authentication failed. Check API key.")
             elif isinstance(oe, RateLimitError):
-                logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+                logger.error("Rate limit exceeded. Consider increasing max_retries.")
             elif isinstance(oe, APIError):
                 logger.error(f"API error: {oe}")
             raise
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    @traced("llm.ask_tool_stream")
+    async def ask_tool_stream(
+        self,
+        messages: list[dict | Message],
+        system_msgs: list[dict | Message] | None = None,
+        timeout: int = 300,
+        tools: list[dict] | None = None,
+        tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
+        temperature: float | None = None,
+        priority: RequestPriority = RequestPriority.ACTING,
+        on_tool_call: (
+            Callable[[ChatCompletionMessageToolCall], Awaitable[None] | None] | None
+        ) = None,
+        **kwargs,
+    ) -> ChatCompletionMessage | None:
+        """
+        Ask LLM using functions/tools with a streaming response.
+
+        Tool calls are assembled from the stream incrementally and passed to
+        `on_tool_call` as soon as each one is complete, so callers can start
+        executing tools while the model is still generating the rest.
+
+        Only opening the stream is retried; a failure mid-stream is not, since
+        a retry could replay tool calls that were already dispatched.
+
+        Args:
+            messages: list of conversation messages
+            system_msgs: Optional system messages to prepend
+            timeout: Request timeout in seconds
+            tools: list of tools to use
+            tool_choice: Tool choice strategy
+            temperature: Sampling temperature for the response
+            priority: Scheduling priority of the request
+            on_tool_call: Callback invoked with each completed tool call
+            **kwargs: Additional completion arguments
+
+        Returns:
+            ChatCompletionMessage: The full assembled response
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If tools, tool_choice, or messages are invalid
+            OpenAIError: If API call fails
+            Exception: For unexpected errors
+        """
+
+        async def dispatch(tool_calls: list[ChatCompletionMessageToolCall]) -> None:
+            if on_tool_call is None:
+                return
+            for tool_call in tool_calls:
+                result = on_tool_call(tool_call)
+                if asyncio.iscoroutine(result):
+                    await result
+
+        try:
+            params, input_tokens = self._prepare_tool_request(
+                messages,
+                system_msgs=system_msgs,
+                timeout=timeout,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=temperature,
+                **kwargs,
+            )
+
+            # Serve identical requests from the response cache if enabled
+            cache_key = self._make_cache_key("ask_tool", params)
+            cached = await self._get_cached_response(cache_key)
+            if cached is not None:
+                message = ChatCompletionMessage.model_validate(cached)
+                self.update_cached_token_count(
+                    input_tokens,
+                    self.token_counter.count_single_message(
+                        message.model_dump(exclude_none=True)
+                    ),
+                )
+                await dispatch(message.tool_calls or [])
+                return message
+
+            # For streaming, update estimated token count before making the request
+            self.update_token_count(input_tokens)
+
+            response = await self._create_completion(
+                params, input_tokens, priority, stream=True
+            )
+
+            accumulator = ToolCallAccumulator()
+            collected_content = []
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    collected_content.append(delta.content)
+                await dispatch(accumulator.add(delta.tool_calls))
+            await dispatch(accumulator.finish())
+
+            content = "".join(collected_content)
+            tool_calls = accumulator.tool_calls
+            if not content and not tool_calls:
+                return None
+
+            message = ChatCompletionMessage(
+                role="assistant",
+                content=content or None,
+                tool_calls=tool_calls or None,
+            )
+
+            # estimate completion tokens for streaming response
+            completion_tokens = self.token_counter.count_single_message(
+                message.model_dump(exclude_none=True)
+            )
+            self.update_token_count(0, completion_tokens, requests=0)
+
+            await self._set_cached_response(
+                cache_key, message.model_dump(exclude_none=True)
+            )
+            return message
+
+        except TokenLimitExceeded:
+            # Re-raise token limit errors without logging
+            raise
+        except ValueError as ve:
+            logger.error(f"Validation error in ask_tool_stream: {ve}")
+            raise
+        except OpenAIError as oe:
+            logger.error(f"OpenAI API error: {oe}")
+            if isinstance(oe, AuthenticationError):
+                logger.error("Authentication failed. Check API key.")
+            elif isinstance(oe, RateLimitError):
+                logger.error("Rate limit exceeded. Consider increasing max_retries.")
+            elif isinstance(oe, APIError):
+                logger.error(f"API error: {oe}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in ask_tool_stream: {e}")
+            raise
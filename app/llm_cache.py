@@ -0,0 +1,184 @@
+"""Persistent response cache for LLM requests.
+
+Stores completions in a local SQLite file keyed by a canonical hash of the
+request, with TTL expiry and size-bounded LRU eviction.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.config import PROJECT_ROOT, LLMCacheSettings
+from app.logger import logger
+
+
+class ResponseCache:
+    """SQLite-backed LRU cache for LLM responses.
+
+    Attributes:
+        path: Location of the SQLite database file.
+        max_size_bytes: Upper bound on the total size of stored responses.
+        ttl: Time-to-live of an entry in seconds.
+        hits: Number of lookups served from the cache.
+        misses: Number of lookups that found no valid entry.
+    """
+
+    def __init__(self, path: str | Path, max_size_mb: float = 256, ttl: int = 86400):
+        """Opens (or creates) the cache database.
+
+        Args:
+            path: Database file path. Relative paths are resolved against the
+                project root.
+            max_size_mb: Maximum total size of cached responses in megabytes.
+            ttl: Time-to-live of cached responses in seconds.
+        """
+        path = Path(path)
+        self.path = path if path.is_absolute() else PROJECT_ROOT / path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+            "ON responses (last_access)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_settings(cls, settings: LLMCacheSettings) -> "ResponseCache":
+        """Creates a cache from configuration settings."""
+        return cls(settings.path, settings.max_size_mb, settings.ttl)
+
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """Builds a canonical key for a request.
+
+        Args:
+            **request: Request fields (model, messages, tools, ...).
+
+        Returns:
+            Hex digest that is independent of dict ordering.
+        """
+        payload = json.dumps(
+            request,
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        """Looks up a cached response.
+
+        Args:
+            key: Request key from `make_key`.
+
+        Returns:
+            The cached value, or None if missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Stores a response and evicts least recently used entries if needed.
+
+        Args:
+            key: Request key from `make_key`.
+            value: JSON-serializable response.
+        """
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(data.encode("utf-8"))
+        if size > self.max_size_bytes:
+            logger.debug(f"Response of {size} bytes exceeds cache size, not cached")
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Removes expired entries, then the oldest ones until under the size limit."""
+        if self.ttl:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        to_delete = []
+        for key, size in rows:
+            if total <= self.max_size_bytes:
+                break
+            to_delete.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+
+    def clear(self) -> None:
+        """Removes all cached responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
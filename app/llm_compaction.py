@@ -0,0 +1,190 @@
+"""Compaction of the conversation history to fit the model's context window.
+
+Before a request, the history is checked against a share of the context
+window. When it is over, old tool observations and images are elided first;
+if that is not enough, the oldest turns are dropped. Assistant tool calls and
+their tool results are always kept or removed together, so the compacted
+history stays a valid request.
+"""
+
+import re
+from typing import Callable
+
+from app.logger import logger
+from app.schema import Message, Role
+
+
+COMPACTED_NOTICE = "[Context compacted: {count} earlier messages were removed]"
+NOTICE_PATTERN = re.compile(
+    r"\[Context compacted: (\d+) earlier messages were removed\]"
+)
+
+
+class ContextCompactor:
+    """Keeps the conversation history within a share of the context window.
+
+    Compaction starts when the request exceeds `threshold` of the context window
+    and reduces it to `target` of the window, so it happens in batches rather
+    than on every step.
+
+    Attributes:
+        context_window: Context window of the model in tokens.
+        threshold: Share of the window above which the history is compacted.
+        target: Share of the window the history is reduced to.
+        keep_recent: Number of most recent messages that are never compacted.
+    """
+
+    # Characters of an elided observation kept as a preview
+    PREVIEW_CHARS = 200
+    # Observations shorter than this are not worth eliding
+    MIN_ELIDE_CHARS = 500
+
+    def __init__(
+        self,
+        context_window: int,
+        threshold: float = 0.8,
+        target: float | None = None,
+        keep_recent: int = 6,
+    ):
+        self.context_window = context_window
+        self.threshold = threshold
+        self.target = target if target is not None else threshold * 0.75
+        self.keep_recent = keep_recent
+
+        # Metrics
+        self.compactions = 0
+        self.elided_messages = 0
+        self.dropped_messages = 0
+
+    @property
+    def limit_tokens(self) -> int:
+        return int(self.context_window * self.threshold)
+
+    @property
+    def target_tokens(self) -> int:
+        return int(self.context_window * self.target)
+
+    def _elide(self, message: Message) -> Message | None:
+        """Shortened copy of an old observation, None if it cannot be shortened"""
+        content = message.content or ""
+        long_observation = (
+            message.role == Role.TOOL and len(content) > self.MIN_ELIDE_CHARS
+        )
+        if not long_observation and not message.has_image:
+            return None
+
+        update: dict = {"base64_image": None, "image_ref": None}
+        if long_observation:
+            update["content"] = (
+                f"{content[: self.PREVIEW_CHARS]}... "
+                f"[{len(content) - self.PREVIEW_CHARS} characters elided to save context]"
+            )
+        return message.model_copy(update=update)
+
+    @staticmethod
+    def _drop_orphans(messages: list[Message]) -> list[Message]:
+        """Removes tool results whose tool call is not in the history"""
+        call_ids: set[str] = set()
+        result = []
+        for message in messages:
+            if message.role == Role.ASSISTANT and message.tool_calls:
+                call_ids.update(call.id for call in message.tool_calls)
+            elif message.role == Role.TOOL and message.tool_call_id not in call_ids:
+                continue
+            result.append(message)
+        return result
+
+    def compact(
+        self,
+        messages: list[Message],
+        count_tokens: Callable[[Message], int],
+        reserved_tokens: int = 0,
+    ) -> list[Message]:
+        """Compacts the history if the request would exceed the threshold.
+
+        Args:
+            messages: Conversation history, oldest first.
+            count_tokens: Returns the tokens of a single message.
+            reserved_tokens: Tokens of the rest of the request (system prompt,
+                tool schemas).
+
+        Returns:
+            The history unchanged (the same list) if it fits, otherwise a new
+            compacted list.
+        """
+        sizes = [count_tokens(m) for m in messages]
+        total = reserved_tokens + sum(sizes)
+        if total <= self.limit_tokens:
+            return messages
+
+        before = total
+        messages = list(messages)
+        recent_start = max(0, len(messages) - self.keep_recent)
+
+        # Pass 1: elide old observations and images, oldest first
+        for i in range(recent_start):
+            if total <= self.target_tokens:
+                break
+            elided = self._elide(messages[i])
+            if elided is None:
+                continue
+            messages[i] = elided
+            size = count_tokens(elided)
+            total += size - sizes[i]
+            sizes[i] = size
+            self.elided_messages += 1
+
+        # Pass 2: drop the oldest turns, keeping the task (first user message)
+        first = next((i for i, m in enumerate(messages) if m.role == Role.USER), None)
+        keep_from = 0 if first is None else first + 1
+        # Reuse the notice left by an earlier compaction
+        notice_index = None
+        previous = 0
+        if keep_from < len(messages) and messages[keep_from].role == Role.USER:
+            match = NOTICE_PATTERN.fullmatch(messages[keep_from].content or "")
+            if match:
+                notice_index = keep_from
+                previous = int(match.group(1))
+                keep_from += 1
+
+        drop_end = keep_from
+        while total > self.target_tokens and drop_end < recent_start:
+            total -= sizes[drop_end]
+            drop_end += 1
+        # Tool results belong to the assistant message before them
+        while (
+            keep_from < drop_end < len(messages) - 1
+            and messages[drop_end].role == Role.TOOL
+        ):
+            total -= sizes[drop_end]
+            drop_end += 1
+
+        dropped = drop_end - keep_from
+        if dropped:
+            notice = Message.user_message(
+                COMPACTED_NOTICE.format(count=previous + dropped)
+            )
+            head = messages[: notice_index if notice_index is not None else keep_from]
+            messages = head + [notice] + messages[drop_end:]
+            self.dropped_messages += dropped
+
+        messages = self._drop_orphans(messages)
+        self.compactions += 1
+        logger.info(
+            f"Compacted context from ~{before} to ~{total} tokens "
+            f"(limit {self.limit_tokens}, {dropped} messages dropped)"
+        )
+        return messages
+
+    def get_stats(self) -> dict:
+        """Gets compaction statistics.
+
+        Returns:
+            dict: Statistics information.
+        """
+        return {
+            "context_window": self.context_window,
+            "compactions": self.compactions,
+            "elided_messages": self.elided_messages,
+            "dropped_messages": self.dropped_messages,
+        }
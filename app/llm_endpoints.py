@@ -0,0 +1,182 @@
+"""Load balancing and failover across several endpoints serving one model.
+
+An `[llm]` entry may declare several `endpoints` (for example replicas of a
+self-hosted vLLM or Ollama server). Requests are routed to the healthy endpoint
+with the fewest outstanding requests, weighted by its recent latency, and are
+retried on another endpoint when one fails with a retryable error. Each endpoint
+has its own circuit breaker, so a failing replica is skipped until it recovers.
+"""
+
+import time
+from typing import Any, Awaitable, Callable
+
+from openai import AsyncAzureOpenAI, AsyncOpenAI
+
+from app.config import EndpointSettings
+from app.exceptions import CircuitBreakerOpen
+from app.llm_retry import CircuitBreaker, is_retryable
+from app.logger import logger
+
+
+def create_client(
+    api_type: str, base_url: str, api_key: str, api_version: str = ""
+) -> AsyncOpenAI:
+    """Create an OpenAI-compatible async client for an endpoint"""
+    if api_type == "azure":
+        return AsyncAzureOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            api_version=api_version,
+        )
+    return AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+
+class Endpoint:
+    """A single endpoint with its client and health statistics.
+
+    Attributes:
+        base_url: API base URL.
+        client: Async client bound to the endpoint.
+        breaker: Circuit breaker guarding the endpoint.
+        outstanding: Number of requests currently in flight.
+        latency: Exponentially weighted moving average of request latency.
+    """
+
+    # Weight of the newest sample in the latency average
+    LATENCY_ALPHA = 0.3
+    # Latency assumed for endpoints without samples, in seconds
+    INITIAL_LATENCY = 1.0
+
+    def __init__(
+        self, base_url: str, client: Any, breaker: CircuitBreaker | None = None
+    ):
+        self.base_url = base_url
+        self.client = client
+        self.breaker = breaker or CircuitBreaker()
+        self.outstanding = 0
+        self.latency = self.INITIAL_LATENCY
+        self.total_requests = 0
+        self.total_failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.breaker.allows_request
+
+    @property
+    def score(self) -> float:
+        """Routing cost: expected wait if the request is queued behind the others"""
+        return (self.outstanding + 1) * self.latency
+
+    def record_latency(self, latency: float) -> None:
+        self.latency += self.LATENCY_ALPHA * (latency - self.latency)
+
+
+class EndpointPool:
+    """Routes requests across endpoints with health tracking and failover.
+
+    Attributes:
+        endpoints: Endpoints in the pool.
+    """
+
+    def __init__(self, endpoints: list[Endpoint]):
+        if not endpoints:
+            raise ValueError("EndpointPool requires at least one endpoint")
+        self.endpoints = endpoints
+
+    @classmethod
+    def from_settings(
+        cls,
+        endpoints: list[EndpointSettings],
+        api_type: str,
+        api_key: str,
+        api_version: str = "",
+    ) -> "EndpointPool":
+        """Creates a pool from endpoint settings of an `[llm]` entry"""
+        return cls(
+            [
+                Endpoint(
+                    endpoint.base_url,
+                    create_client(
+                        api_type,
+                        endpoint.base_url,
+                        endpoint.api_key or api_key,
+                        api_version,
+                    ),
+                )
+                for endpoint in endpoints
+            ]
+        )
+
+    def _candidates(self) -> list[Endpoint]:
+        """Healthy endpoints in the order they should be tried"""
+        return sorted((e for e in self.endpoints if e.healthy), key=lambda e: e.score)
+
+    async def request(self, call: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Sends a request to the best endpoint, failing over on retryable errors.
+
+        Args:
+            call: Coroutine function receiving the endpoint's client.
+
+        Returns:
+            The result of `call`.
+
+        Raises:
+            CircuitBreakerOpen: If the circuit breakers of all endpoints are open.
+            Exception: The last error if every endpoint failed, or any error that
+                does not warrant a failover.
+        """
+        candidates = self._candidates()
+        if not candidates:
+            retry_in = min(e.breaker.retry_in for e in self.endpoints)
+            raise CircuitBreakerOpen(
+                f"All {len(self.endpoints)} endpoints are failing, "
+                f"retry in {retry_in:.0f}s"
+            )
+
+        last_error: Exception | None = None
+        for endpoint in candidates:
+            endpoint.outstanding += 1
+            endpoint.total_requests += 1
+            start = time.monotonic()
+            try:
+                result = await endpoint.breaker.call(
+                    lambda: call(endpoint.client), endpoint.base_url
+                )
+            except CircuitBreakerOpen as e:
+                # Another request took the half-open trial meanwhile
+                last_error = e
+                continue
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                endpoint.total_failures += 1
+                logger.warning(f"Endpoint {endpoint.base_url} failed: {e}")
+                last_error = e
+                continue
+            finally:
+                endpoint.outstanding -= 1
+
+            endpoint.record_latency(time.monotonic() - start)
+            return result
+
+        assert last_error is not None
+        raise last_error
+
+    def get_stats(self) -> list[dict]:
+        """Gets per-endpoint statistics.
+
+        Returns:
+            list[dict]: Statistics for each endpoint.
+        """
+        return [
+            {
+                "base_url": e.base_url,
+                "healthy": e.healthy,
+                "breaker": e.breaker.state,
+                "outstanding": e.outstanding,
+                "latency": e.latency,
+                "total_requests": e.total_requests,
+                "total_failures": e.total_failures,
+            }
+            for e in self.endpoints
+        ]
@@ -0,0 +1,146 @@
+"""Hedged LLM requests to cut tail latency.
+
+When a request has not completed within a percentile of recently observed
+latencies, a duplicate is sent and whichever finishes first is used; the other
+one is cancelled. The share of requests that may be hedged is capped so the
+extra spend stays bounded.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from app.logger import logger
+
+
+class HedgePolicy:
+    """Decides when to hedge a request and runs the primary and hedge.
+
+    Attributes:
+        percentile: Latency percentile (0-1) after which a hedge is sent.
+        max_extra_ratio: Maximum number of hedges as a fraction of requests.
+        requests: Number of requests run through the policy.
+        hedges_sent: Number of duplicate requests sent.
+        hedge_wins: Number of times the duplicate finished first.
+        primary_wins: Number of hedged requests where the original finished first.
+    """
+
+    # Latency samples kept to estimate the percentile
+    WINDOW_SIZE = 200
+    # Samples required before any request is hedged
+    MIN_SAMPLES = 20
+
+    def __init__(self, percentile: float = 0.95, max_extra_ratio: float = 0.1):
+        """Initializes the policy.
+
+        Args:
+            percentile: Latency percentile that triggers a hedge.
+            max_extra_ratio: Cap on hedges relative to the number of requests.
+        """
+        if not 0 < percentile < 1:
+            raise ValueError("Hedge percentile must be between 0 and 1")
+        self.percentile = percentile
+        self.max_extra_ratio = max_extra_ratio
+        self._latencies: deque[float] = deque(maxlen=self.WINDOW_SIZE)
+
+        # Metrics
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait before hedging, None if the request must not be hedged"""
+        if len(self._latencies) < self.MIN_SAMPLES:
+            return None
+        if self.hedges_sent + 1 > self.max_extra_ratio * self.requests:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return ordered[index]
+
+    def record_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+
+    async def _timed(self, call: Callable[[], Awaitable[Any]]) -> tuple[Any, float]:
+        start = time.monotonic()
+        result = await call()
+        return result, time.monotonic() - start
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        on_hedge: Callable[[], None] | None = None,
+    ) -> Any:
+        """Runs a request, sending a duplicate if it is slower than usual.
+
+        Args:
+            call: Coroutine function sending the request; called again for the hedge.
+            on_hedge: Callback invoked when a hedge is sent, e.g. to account for
+                its cost.
+
+        Returns:
+            The result of whichever request completed successfully first.
+
+        Raises:
+            Exception: The primary request's error if no request succeeded.
+        """
+        self.requests += 1
+        delay = self.hedge_delay()
+        primary = asyncio.create_task(self._timed(call))
+        hedge: asyncio.Task | None = None
+        if delay is None:
+            result, latency = await primary
+            self.record_latency(latency)
+            return result
+
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                result, latency = primary.result()
+                self.record_latency(latency)
+                return result
+
+            logger.debug(f"Request slower than {delay:.2f}s, sending hedge")
+            self.hedges_sent += 1
+            if on_hedge is not None:
+                on_hedge()
+            hedge = asyncio.create_task(self._timed(call))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    if task is hedge:
+                        self.hedge_wins += 1
+                    else:
+                        self.primary_wins += 1
+                    result, latency = task.result()
+                    self.record_latency(latency)
+                    return result
+
+            # Both failed: surface the original request's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> dict:
+        """Gets hedging statistics.
+
+        Returns:
+            dict: Statistics information.
+        """
+        return {
+            "requests": self.requests,
+            "hedges_sent": self.hedges_sent,
+            "hedge_wins": self.hedge_wins,
+            "primary_wins": self.primary_wins,
+            "hedge_delay": self.hedge_delay(),
+        }
@@ -0,0 +1,243 @@
+"""Retry policy and circuit breaker for LLM requests.
+
+Errors are classified as retryable (connection problems, timeouts, rate limits,
+server errors) or fatal (bad requests, authentication, exceeded token limits).
+Fatal errors are raised immediately, retryable ones are retried with jittered
+exponential backoff or after the delay the server asks for in `Retry-After`.
+A circuit breaker per endpoint makes requests fail fast while an endpoint keeps
+failing.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable
+
+from openai import APIConnectionError, APIStatusError
+
+from app.exceptions import CircuitBreakerOpen
+from app.logger import logger
+
+
+# HTTP status codes below 500 worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a request that failed with `error` may succeed when repeated"""
+    if isinstance(error, APIConnectionError):  # Includes APITimeoutError
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+def get_retry_after(error: BaseException) -> float | None:
+    """Delay in seconds requested by the server's Retry-After headers, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Circuit breaker guarding one endpoint.
+
+    The breaker opens after `failure_threshold` consecutive failures and rejects
+    requests until `reset_timeout` has passed. It then lets a single trial
+    request through (half-open): success closes it, failure opens it again for
+    twice as long.
+
+    Attributes:
+        failure_threshold: Consecutive failures that open the breaker.
+        reset_timeout: Base time in seconds the breaker stays open.
+        consecutive_failures: Failures since the last success.
+        trips: Number of times the breaker opened since it was last closed.
+    """
+
+    # Upper bound on the open period, as a multiple of reset_timeout
+    MAX_BACKOFF_FACTOR = 32
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.trips = 0
+        self._opened_until = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.trips == 0:
+            return "closed"
+        if time.monotonic() < self._opened_until:
+            return "open"
+        return "half_open"
+
+    @property
+    def allows_request(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial_in_flight)
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a trial request through"""
+        return max(0.0, self._opened_until - time.monotonic())
+
+    def before_request(self, name: str = "endpoint") -> None:
+        """Checks the breaker before sending a request.
+
+        Args:
+            name: Endpoint name used in the error message.
+
+        Raises:
+            CircuitBreakerOpen: If the breaker rejects the request.
+        """
+        if not self.allows_request:
+            raise CircuitBreakerOpen(
+                f"Circuit breaker for {name} is open, retry in {self.retry_in:.0f}s"
+            )
+        if self.state == "half_open":
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.trips = 0
+        self._opened_until = 0.0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        half_open = self.state == "half_open"
+        self._trial_in_flight = False
+        if half_open or self.consecutive_failures >= self.failure_threshold:
+            self.trips += 1
+            factor = min(2 ** (self.trips - 1), self.MAX_BACKOFF_FACTOR)
+            self._opened_until = time.monotonic() + self.reset_timeout * factor
+            logger.warning(
+                f"Circuit breaker opened for {self.reset_timeout * factor:.0f}s "
+                f"after {self.consecutive_failures} consecutive failures"
+            )
+
+    def release(self) -> None:
+        """Releases a half-open trial that ended without a verdict (e.g. fatal error)"""
+        self._trial_in_flight = False
+
+    async def call(
+        self, request: Callable[[], Awaitable[Any]], name: str = "endpoint"
+    ) -> Any:
+        """Sends a request through the breaker, recording its outcome.
+
+        Only retryable errors count as failures; fatal errors are the
+        request's fault, not the endpoint's.
+        """
+        self.before_request(name)
+        try:
+            result = await request()
+        except BaseException as e:
+            if isinstance(e, Exception) and is_retryable(e):
+                self.record_failure()
+            else:
+                self.release()
+            raise
+        self.record_success()
+        return result
+
+    def get_stats(self) -> dict:
+        """Gets circuit breaker statistics.
+
+        Returns:
+            dict: Statistics information.
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": self.retry_in,
+        }
+
+
+class RetryPolicy:
+    """Retries retryable errors with backoff, raising fatal errors immediately.
+
+    Attributes:
+        max_retries: Retries after the first attempt.
+        base_delay: Backoff before the first retry, in seconds.
+        max_delay: Upper bound on a single backoff, in seconds.
+        max_retry_after: Upper bound on a server-requested delay, in seconds.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 20.0,
+        max_retry_after: float = 60.0,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+        # Metrics
+        self.retries = 0
+        self.fatal_errors = 0
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Delay before retry number `attempt` (starting at 1)"""
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        # Full jitter exponential backoff
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def call(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs a request, retrying it on retryable errors.
+
+        Args:
+            request: Coroutine function sending the request.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            Exception: The first fatal error, or the last retryable error once
+                the retries are used up.
+        """
+        attempt = 0
+        while True:
+            try:
+                return await request()
+            except Exception as e:
+                if not is_retryable(e):
+                    self.fatal_errors += 1
+                    raise
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = self.backoff(attempt, e)
+                self.retries += 1
+                logger.warning(
+                    f"LLM request failed ({type(e).__name__}: {e}), "
+                    f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
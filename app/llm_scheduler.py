@@ -0,0 +1,183 @@
+"""Rate limiting and prioritization of LLM requests.
+
+All requests made through one `LLM` instance share a scheduler that enforces
+the requests-per-minute and tokens-per-minute limits of its configuration, so
+many agents running in one process stay under the provider limits instead of
+running into rate-limit errors and backoff.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+from app.logger import logger
+
+
+class RequestPriority(IntEnum):
+    """Priority lanes for LLM requests, lower values are served first"""
+
+    PLANNING = 0
+    ACTING = 1
+    EXTRACTION = 2
+
+
+class TokenBucket:
+    """Token bucket that refills continuously up to its capacity.
+
+    Attributes:
+        capacity: Maximum number of tokens held by the bucket.
+        rate: Refill rate in tokens per second.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available, negative when usage was under-estimated"""
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        amount = min(amount, self.capacity)
+        missing = amount - self.available
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float) -> None:
+        """Take tokens from the bucket; the balance may go negative"""
+        self._refill()
+        self._tokens -= amount
+
+
+class RequestScheduler:
+    """Priority scheduler that admits requests within RPM and TPM limits.
+
+    Waiting requests are admitted strictly by priority, then in arrival order.
+
+    Attributes:
+        rpm_limit: Requests per minute limit, None for unlimited.
+        tpm_limit: Tokens per minute limit, None for unlimited.
+    """
+
+    def __init__(self, rpm_limit: int | None = None, tpm_limit: int | None = None):
+        """Initializes the scheduler.
+
+        Args:
+            rpm_limit: Maximum requests per minute.
+            tpm_limit: Maximum tokens per minute.
+        """
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self._requests = TokenBucket(rpm_limit, rpm_limit / 60) if rpm_limit else None
+        self._tokens = TokenBucket(tpm_limit, tpm_limit / 60) if tpm_limit else None
+
+        self._queue: list[tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+
+        # Metrics
+        self.max_queue_depth = 0
+        self.total_wait_time = 0.0
+        self.admitted: dict[RequestPriority, int] = {p: 0 for p in RequestPriority}
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for admission"""
+        return sum(1 for *_, future in self._queue if not future.done())
+
+    async def acquire(
+        self,
+        tokens: int = 0,
+        priority: RequestPriority = RequestPriority.ACTING,
+    ) -> None:
+        """Waits until a request may be sent.
+
+        Args:
+            tokens: Estimated tokens the request will use.
+            priority: Priority lane of the request.
+        """
+        if not self.enabled:
+            self.admitted[priority] += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), tokens, future))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        start = time.monotonic()
+        await future
+        self.total_wait_time += time.monotonic() - start
+        self.admitted[priority] += 1
+
+    def record_usage(self, extra_tokens: int) -> None:
+        """Corrects the token bucket once the actual usage of a request is known.
+
+        Args:
+            extra_tokens: Actual minus estimated tokens (may be negative).
+        """
+        if self._tokens is not None and extra_tokens:
+            self._tokens.consume(extra_tokens)
+
+    async def _dispatch(self) -> None:
+        """Admits queued requests as capacity becomes available."""
+        while self._queue:
+            _, _, tokens, future = self._queue[0]
+            if future.done():  # Cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+
+            wait = 0.0
+            if self._requests is not None:
+                wait = max(wait, self._requests.wait_time(1))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.wait_time(tokens))
+
+            if wait > 0:
+                logger.debug(
+                    f"Rate limit reached, waiting {wait:.2f}s "
+                    f"({self.queue_depth} requests queued)"
+                )
+                await asyncio.sleep(wait)
+                continue
+
+            heapq.heappop(self._queue)
+            if self._requests is not None:
+                self._requests.consume(1)
+            if self._tokens is not None:
+                self._tokens.consume(tokens)
+            future.set_result(None)
+
+    def get_stats(self) -> dict:
+        """Gets scheduler statistics.
+
+        Returns:
+            dict: Statistics information.
+        """
+        return {
+            "rpm_limit": self.rpm_limit,
+            "tpm_limit": self.tpm_limit,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "total_wait_time": self.total_wait_time,
+            "admitted": {p.name.lower(): n for p, n in self.admitted.items()},
+        }
@@ -0,0 +1,395 @@
+"""Local OpenAI-compatible server for load testing without a real LLM.
+
+Serves `POST /v1/chat/completions` with and without streaming. The reply to a
+request is chosen from a script by the number of assistant messages in the
+conversation, so every concurrent session walks through the same sequence of
+tool calls without the server keeping any state. Latency follows a lognormal
+distribution around a median, and a share of requests can fail with 500 or
+429 responses.
+
+Point an `LLM` at it with `base_url = "http://127.0.0.1:8000/v1"`, or run it
+standalone:
+
+    python -m app.mock_server --port 8000 --latency-ms 800 --error-rate 0.01
+
+The server is built on asyncio streams only, so it adds little overhead of
+its own to what is being measured.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from pathlib import Path
+
+from app.logger import logger
+
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+# Tools called by the default script, with harmless arguments
+DEFAULT_TOOL_CALLS = {
+    "bash": {"command": "echo mock"},
+    "python_execute": {"code": "print('mock')"},
+    "str_replace_editor": {"command": "view", "path": "/tmp"},
+}
+
+
+class MockLLMServer:
+    """OpenAI-compatible chat completions server with scripted replies.
+
+    Attributes:
+        script: Reply for each assistant turn: `content` and/or `tool_calls`
+            (a list of `name`/`arguments`). The last entry repeats. None to
+            call a tool from `DEFAULT_TOOL_CALLS` for `turns - 1` turns and
+            terminate afterwards.
+        latency_ms: Median time to the first token.
+        latency_sigma: Shape of the lognormal latency, 0 for a fixed latency.
+        tokens_per_second: Generation speed after the first token.
+        error_rate: Share of requests answered with a 500 error.
+        rate_limit_rate: Share of requests answered with a 429 error.
+        turns: Assistant turns of the default script.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        script: list[dict] | None = None,
+        latency_ms: float = 0,
+        latency_sigma: float = 0.5,
+        tokens_per_second: float = 0,
+        error_rate: float = 0,
+        rate_limit_rate: float = 0,
+        turns: int = 3,
+        seed: int | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.script = script
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.turns = turns
+        self._random = random.Random(seed)
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+
+        # Metrics
+        self.requests = 0
+        self.streams = 0
+        self.errors = 0
+        self.active = 0
+        self.peak_active = 0
+
+    @property
+    def url(self) -> str:
+        """Base URL to configure as the LLM's `base_url`."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> None:
+        """Starts listening; a port of 0 picks a free port."""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Mock LLM server listening on {self.url}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise stay open
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "MockLLMServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves HTTP/1.1 requests of one keep-alive connection."""
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self._dispatch(method, path, body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _dispatch(
+        self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter
+    ) -> None:
+        path = path.split("?", 1)[0].rstrip("/")
+        if method != "POST" or not path.endswith("/chat/completions"):
+            await self._send_json(writer, 404, _error("Not found", "not_found"))
+            return
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError:
+            await self._send_json(writer, 400, _error("Invalid JSON", "invalid"))
+            return
+
+        self.requests += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await self._complete(request, writer)
+        finally:
+            self.active -= 1
+
+    async def _complete(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        await asyncio.sleep(self._sample_latency())
+
+        roll = self._random.random()
+        if roll < self.error_rate:
+            self.errors += 1
+            await self._send_json(writer, 500, _error("Mock server error", "server"))
+            return
+        if roll < self.error_rate + self.rate_limit_rate:
+            self.errors += 1
+            await self._send_json(
+                writer, 429, _error("Mock rate limit", "rate_limit_exceeded")
+            )
+            return
+
+        message = self._reply(request)
+        prompt_tokens = max(1, len(json.dumps(request.get("messages", []))) // 4)
+        completion_tokens = max(1, len(json.dumps(message)) // 4)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+        }
+
+        if not request.get("stream"):
+            if self.tokens_per_second:
+                await asyncio.sleep(completion_tokens / self.tokens_per_second)
+            await self._send_json(
+                writer,
+                200,
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {"index": 0, "message": message, "finish_reason": "stop"}
+                    ],
+                    "usage": usage,
+                },
+            )
+            return
+
+        self.streams += 1
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        for delta, tokens in _stream_deltas(message):
+            if self.tokens_per_second:
+                await asyncio.sleep(tokens / self.tokens_per_second)
+            chunk = {
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+            await self._send_chunk(writer, f"data: {json.dumps(chunk)}\n\n")
+        last = {
+            **base,
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+        await self._send_chunk(writer, f"data: {json.dumps(last)}\n\n")
+        await self._send_chunk(writer, "data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _sample_latency(self) -> float:
+        if not self.latency_ms:
+            return 0.0
+        factor = math.exp(self._random.gauss(0, self.latency_sigma))
+        return self.latency_ms * factor / 1000
+
+    def _reply(self, request: dict) -> dict:
+        """Chooses the reply for the conversation's next assistant turn."""
+        messages = request.get("messages", [])
+        turn = sum(1 for m in messages if m.get("role") == "assistant")
+
+        if self.script:
+            step = self.script[min(turn, len(self.script) - 1)]
+            calls = [
+                (c["name"], c.get("arguments", {})) for c in step.get("tool_calls", [])
+            ]
+            return _message(step.get("content"), calls)
+
+        tools = {t["function"]["name"] for t in request.get("tools") or []}
+        if turn < self.turns - 1:
+            for name, arguments in DEFAULT_TOOL_CALLS.items():
+                if name in tools:
+                    return _message(f"Step {turn + 1}.", [(name, arguments)])
+        if "terminate" in tools:
+            return _message("Done.", [("terminate", {"status": "success"})])
+        return _message("This is a mock response.", [])
+
+    @staticmethod
+    async def _send_json(writer: asyncio.StreamWriter, status: int, payload) -> None:
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def _send_chunk(writer: asyncio.StreamWriter, text: str) -> None:
+        data = text.encode()
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        await writer.drain()
+
+    def get_stats(self) -> dict:
+        """Gets server statistics.
+
+        Returns:
+            dict: Statistics information.
+        """
+        return {
+            "requests": self.requests,
+            "streams": self.streams,
+            "errors": self.errors,
+            "active": self.active,
+            "peak_active": self.peak_active,
+        }
+
+
+def _error(message: str, error_type: str) -> dict:
+    return {"error": {"message": message, "type": error_type}}
+
+
+def _message(content: str | None, tool_calls: list[tuple[str, dict]]) -> dict:
+    message: dict = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }
+            for name, arguments in tool_calls
+        ]
+    return message
+
+
+def _stream_deltas(message: dict) -> list[tuple[dict, int]]:
+    """Splits a message into stream deltas with their approximate token counts."""
+    deltas: list[tuple[dict, int]] = [({"role": "assistant", "content": ""}, 0)]
+    for word in (message.get("content") or "").split(" "):
+        deltas.append(({"content": word + " "}, 1))
+    if deltas[-1][0].get("content"):
+        # No trailing space after the last word
+        deltas[-1] = ({"content": deltas[-1][0]["content"][:-1]}, 1)
+    for index, call in enumerate(message.get("tool_calls") or []):
+        arguments = call["function"]["arguments"]
+        deltas.append(
+            (
+                {
+                    "tool_calls": [
+                        {
+                            "index": index,
+                            "id": call["id"],
+                            "type": "function",
+                            "function": {
+                                "name": call["function"]["name"],
+                                "arguments": "",
+                            },
+                        }
+                    ]
+                },
+                1,
+            )
+        )
+        deltas.append(
+            (
+                {
+                    "tool_calls": [
+                        {"index": index, "function": {"arguments": arguments}}
+                    ]
+                },
+                max(1, len(arguments) // 4),
+            )
+        )
+    return deltas
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--script", help="JSON file with the reply of each turn")
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0)
+    parser.add_argument("--turns", type=int, default=3)
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        script = json.loads(Path(args.script).read_text(encoding="utf-8"))
+    server = MockLLMServer(
+        args.host,
+        args.port,
+        script=script,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        turns=args.turns,
+    )
+    async with server:
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
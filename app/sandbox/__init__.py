@@ -16,12 +16,14 @@ from app.sandbox.core.exceptions import (
     SandboxTimeoutError,
 )
 from app.sandbox.core.manager import SandboxManager
+from app.sandbox.core.pool import SandboxPool
 from app.sandbox.core.sandbox import DockerSandbox
 
 
 __all__ = [
     "DockerSandbox",
     "SandboxManager",
+    "SandboxPool",
     "BaseSandboxClient",
     "LocalSandboxClient",
     "create_sandbox_client",
@@ -46,6 +46,25 @@ class SandboxFileOperations(Protocol):
         """
         ...
 
+    async def read_files(self, paths: list[str]) -> dict[str, bytes]:
+        """Reads several files from container in one round trip.
+
+        Args:
+            paths: File paths in container.
+
+        Returns:
+            dict[str, bytes]: File contents keyed by path.
+        """
+        ...
+
+    async def write_files(self, files: dict[str, bytes | str]) -> None:
+        """Writes several files to container in one round trip.
+
+        Args:
+            files: File contents keyed by path in container.
+        """
+        ...
+
 
 class BaseSandboxClient(ABC):
     """Base sandbox client interface."""
@@ -78,6 +97,14 @@ class BaseSandboxClient(ABC):
     async def write_file(self, path: str, content: str) -> None:
         """Writes file."""
 
+    @abstractmethod
+    async def read_files(self, paths: list[str]) -> dict[str, bytes]:
+        """Reads several files."""
+
+    @abstractmethod
+    async def write_files(self, files: dict[str, bytes | str]) -> None:
+        """Writes several files."""
+
     @abstractmethod
     async def cleanup(self) -> None:
         """Cleans up resources."""
@@ -182,6 +209,35 @@ class LocalSandboxClient(BaseSandboxClient):
             raise RuntimeError("Sandbox not initialized")
         await self.sandbox.write_file(path, content)
 
+    async def read_files(self, paths: list[str]) -> dict[str, bytes]:
+        """Reads several files from container in one round trip.
+
+        Args:
+            paths: File paths in container.
+
+        Returns:
+            File contents keyed by path.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        return await self.sandbox.read_files(paths)
+
+    async def write_files(self, files: dict[str, bytes | str]) -> None:
+        """Writes several files to container in one round trip.
+
+        Args:
+            files: File contents keyed by path in container.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        await self.sandbox.write_files(files)
+
     async def cleanup(self) -> None:
         """Cleans up resources."""
         if self.sandbox:
@@ -0,0 +1,118 @@
+"""Shared Docker client for the sandbox stack.
+
+Every sandbox, terminal and session used to build its own Docker client, each
+with its own HTTP connection pool and environment parsing. They now share one
+client, created on first use, and run their blocking docker-py calls on one
+bounded executor so Docker I/O neither blocks the event loop nor exhausts the
+default executor.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+import docker
+from docker import APIClient, DockerClient
+
+from app.config import SandboxSettings, config
+
+
+T = TypeVar("T")
+
+
+class DockerClientProvider:
+    """Thread-safe provider of a shared Docker client and executor.
+
+    Attributes:
+        max_pool_size: Connections kept open to the Docker daemon.
+        max_workers: Threads running blocking Docker calls.
+    """
+
+    def __init__(
+        self, max_pool_size: int | None = None, max_workers: int | None = None
+    ):
+        """Initializes the provider.
+
+        Args:
+            max_pool_size: Connection pool size, `[sandbox] docker_pool_size`
+                if None.
+            max_workers: Executor threads, `[sandbox] docker_max_workers` if None.
+        """
+        self._max_pool_size = max_pool_size
+        self._max_workers = max_workers
+        self._client: DockerClient | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _setting(name: str) -> int:
+        settings = config.sandbox or SandboxSettings.model_construct()
+        return getattr(settings, name)
+
+    @property
+    def max_pool_size(self) -> int:
+        if self._max_pool_size is None:
+            self._max_pool_size = self._setting("docker_pool_size")
+        return self._max_pool_size
+
+    @property
+    def max_workers(self) -> int:
+        if self._max_workers is None:
+            self._max_workers = self._setting("docker_max_workers")
+        return self._max_workers
+
+    @property
+    def client(self) -> DockerClient:
+        """The shared Docker client, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = docker.from_env(max_pool_size=self.max_pool_size)
+        return self._client
+
+    @property
+    def api(self) -> APIClient:
+        """Low-level API client of the shared client."""
+        return self.client.api
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Executor dedicated to blocking Docker calls."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="docker"
+                    )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs a blocking Docker call on the dedicated executor.
+
+        Args:
+            func: Blocking function, e.g. a docker-py method.
+            *args: Positional arguments for `func`.
+            **kwargs: Keyword arguments for `func`.
+
+        Returns:
+            The return value of `func`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def close(self) -> None:
+        """Closes the client and stops the executor."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+DOCKER = DockerClientProvider()
@@ -3,11 +3,12 @@ import uuid
 from contextlib import asynccontextmanager
 from typing import Set
 
-import docker
 from docker.errors import APIError, ImageNotFound
 
 from app.config import SandboxSettings
 from app.logger import logger
+from app.sandbox.core.docker_client import DOCKER
+from app.sandbox.core.pool import SandboxPool
 from app.sandbox.core.sandbox import DockerSandbox
 
 
@@ -24,6 +25,7 @@ class SandboxManager:
         cleanup_interval: Cleanup check interval in seconds.
         _sandboxes: Active sandbox instance mapping.
         _last_used: Last used time record for sandboxes.
+        _pools: Warm sandbox pools per sandbox configuration.
     """
 
     def __init__(
@@ -43,13 +45,17 @@ class SandboxManager:
         self.idle_timeout = idle_timeout
         self.cleanup_interval = cleanup_interval
 
-        # Docker client
-        self._client = docker.from_env()
+        # Shared Docker client
+        self._client = DOCKER.client
 
         # Resource mappings
         self._sandboxes: dict[str, DockerSandbox] = {}
         self._last_used: dict[str, float] = {}
 
+        # Warm pools per configuration and the pool of each checked out sandbox
+        self._pools: dict[str, SandboxPool] = {}
+        self._pooled: dict[str, SandboxPool] = {}
+
         # Concurrency control
         self._locks: dict[str, asyncio.Lock] = {}
         self._global_lock = asyncio.Lock()
@@ -72,19 +78,48 @@ class SandboxManager:
             bool: Whether image is available.
         """
         try:
-            self._client.images.get(image)
+            await DOCKER.run(self._client.images.get, image)
             return True
         except ImageNotFound:
             try:
                 logger.info(f"Pulling image {image}...")
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self._client.images.pull, image
-                )
+                await DOCKER.run(self._client.images.pull, image)
                 return True
             except (APIError, Exception) as e:
                 logger.error(f"Failed to pull image {image}: {e}")
                 return False
 
+    def _get_pool(
+        self, config: SandboxSettings, volume_bindings: dict[str, str] | None
+    ) -> SandboxPool | None:
+        """Gets the warm pool for a configuration, None if it is not pooled.
+
+        Sandboxes with custom volume bindings are never pooled since bindings
+        are fixed when the container is created.
+        """
+        if volume_bindings or config.pool_max_size <= 0:
+            return None
+        key = config.model_dump_json()
+        if key not in self._pools:
+            self._pools[key] = SandboxPool(
+                config, config.pool_min_size, config.pool_max_size
+            )
+        return self._pools[key]
+
+    async def warm_up(self, config: SandboxSettings | None = None) -> None:
+        """Starts filling the warm pool of a configuration in the background.
+
+        Args:
+            config: Sandbox configuration with `pool_max_size` set.
+        """
+        config = config or SandboxSettings.model_construct()
+        pool = self._get_pool(config, None)
+        if pool is None:
+            return
+        if not await self.ensure_image(config.image):
+            raise RuntimeError(f"Failed to ensure Docker image: {config.image}")
+        pool.refill()
+
     @asynccontextmanager
     async def sandbox_operation(self, sandbox_id: str):
         """Context manager for sandbox operations.
@@ -140,8 +175,13 @@ class SandboxManager:
 
             sandbox_id = str(uuid.uuid4())
             try:
-                sandbox = DockerSandbox(config, volume_bindings)
-                await sandbox.create()
+                pool = self._get_pool(config, volume_bindings)
+                if pool is not None:
+                    sandbox = await pool.acquire()
+                    self._pooled[sandbox_id] = pool
+                else:
+                    sandbox = DockerSandbox(config, volume_bindings)
+                    await sandbox.create()
 
                 self._sandboxes[sandbox_id] = sandbox
                 self._last_used[sandbox_id] = asyncio.get_event_loop().time()
@@ -233,8 +273,17 @@ class SandboxManager:
             except asyncio.TimeoutError:
                 logger.error("Sandbox cleanup timed out")
 
+        # Remove warm sandboxes
+        pools = list(self._pools.values())
+        self._pools.clear()
+        if pools:
+            await asyncio.gather(
+                *(pool.close() for pool in pools), return_exceptions=True
+            )
+
         # Clean up remaining references
         self._sandboxes.clear()
+        self._pooled.clear()
         self._last_used.clear()
         self._locks.clear()
         self._active_operations.clear()
@@ -264,7 +313,12 @@ class SandboxManager:
             # Get reference to sandbox object
             sandbox = self._sandboxes.get(sandbox_id)
             if sandbox:
-                await sandbox.cleanup()
+                # Pooled sandboxes are reset and reused unless shutting down
+                pool = self._pooled.pop(sandbox_id, None)
+                if pool is not None and not self._is_shutting_down:
+                    pool.release(sandbox)
+                else:
+                    await sandbox.cleanup()
 
                 # Remove sandbox record from manager
                 async with self._global_lock:
@@ -310,4 +364,5 @@ class SandboxManager:
             "idle_timeout": self.idle_timeout,
             "cleanup_interval": self.cleanup_interval,
             "is_shutting_down": self._is_shutting_down,
+            "pools": [pool.get_stats() for pool in self._pools.values()],
         }
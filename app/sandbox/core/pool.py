@@ -0,0 +1,156 @@
+import asyncio
+from collections import deque
+
+from app.config import SandboxSettings
+from app.logger import logger
+from app.sandbox.core.sandbox import DockerSandbox
+
+
+class SandboxPool:
+    """Pool of pre-warmed sandboxes sharing one configuration.
+
+    Creating a container, starting it and opening its terminal takes seconds.
+    The pool keeps started sandboxes ready so checkouts skip that work.
+    Returned sandboxes are reset (processes killed, working directory wiped)
+    and reused. Both refilling and resetting happen in the background.
+
+    Attributes:
+        config: Sandbox configuration of all pooled sandboxes.
+        min_size: Number of idle sandboxes the pool refills to.
+        max_size: Maximum number of idle sandboxes kept.
+    """
+
+    def __init__(self, config: SandboxSettings, min_size: int, max_size: int):
+        """Initializes a sandbox pool.
+
+        Args:
+            config: Sandbox configuration.
+            min_size: Idle sandboxes to keep ready.
+            max_size: Maximum idle sandboxes; extra returned sandboxes are removed.
+        """
+        self.config = config
+        self.max_size = max(0, max_size)
+        self.min_size = min(max(0, min_size), self.max_size)
+
+        self._idle: deque[DockerSandbox] = deque()
+        self._creating = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._closed = False
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.resets = 0
+        self.reset_failures = 0
+
+    def _spawn(self, coro) -> None:
+        """Runs a background task, keeping a reference until it is done."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _create(self) -> DockerSandbox:
+        return await DockerSandbox(self.config).create()
+
+    async def _add_warm(self) -> None:
+        """Creates one sandbox and adds it to the idle sandboxes."""
+        try:
+            sandbox = await self._create()
+        except Exception as e:
+            logger.error(f"Failed to warm sandbox: {e}")
+            return
+        finally:
+            self._creating -= 1
+
+        if self._closed or len(self._idle) >= self.max_size:
+            await sandbox.cleanup()
+        else:
+            self._idle.append(sandbox)
+
+    def refill(self) -> None:
+        """Starts creating sandboxes until `min_size` are idle or being created."""
+        if self._closed:
+            return
+        while len(self._idle) + self._creating < self.min_size:
+            self._creating += 1
+            self._spawn(self._add_warm())
+
+    async def acquire(self) -> DockerSandbox:
+        """Checks out a sandbox.
+
+        Returns:
+            DockerSandbox: A warm sandbox if one is idle, otherwise a new one.
+
+        Raises:
+            RuntimeError: If the pool is closed or sandbox creation fails.
+        """
+        if self._closed:
+            raise RuntimeError("Sandbox pool is closed")
+
+        if self._idle:
+            sandbox = self._idle.popleft()
+            self.hits += 1
+        else:
+            sandbox = None
+            self.misses += 1
+
+        self.refill()
+        return sandbox or await self._create()
+
+    async def _reset_and_return(self, sandbox: DockerSandbox) -> None:
+        try:
+            await sandbox.reset()
+            self.resets += 1
+        except Exception as e:
+            logger.warning(f"Failed to reset pooled sandbox, removing it: {e}")
+            self.reset_failures += 1
+            await sandbox.cleanup()
+            self.refill()
+            return
+
+        if self._closed or len(self._idle) >= self.max_size:
+            await sandbox.cleanup()
+        else:
+            self._idle.append(sandbox)
+
+    def release(self, sandbox: DockerSandbox) -> None:
+        """Returns a checked out sandbox; it is reset in the background.
+
+        Args:
+            sandbox: Sandbox obtained from `acquire`.
+        """
+        if self._closed:
+            self._spawn(sandbox.cleanup())
+        else:
+            self._spawn(self._reset_and_return(sandbox))
+
+    async def close(self) -> None:
+        """Waits for background work and removes all idle sandboxes."""
+        self._closed = True
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=30.0)
+
+        idle = list(self._idle)
+        self._idle.clear()
+        if idle:
+            await asyncio.gather(
+                *(sandbox.cleanup() for sandbox in idle), return_exceptions=True
+            )
+
+    def get_stats(self) -> dict:
+        """Gets pool statistics.
+
+        Returns:
+            dict: Statistics information.
+        """
+        return {
+            "image": self.config.image,
+            "idle": len(self._idle),
+            "creating": self._creating,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "resets": self.resets,
+            "reset_failures": self.reset_failures,
+        }
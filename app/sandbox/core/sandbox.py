@@ -1,8 +1,8 @@
-import asyncio
 import io
 import os
 import tarfile
 import tempfile
+import time
 import uuid
 
 import docker
@@ -10,8 +10,10 @@ import docker.errors
 from docker.models.containers import Container
 
 from app.config import SandboxSettings
+from app.sandbox.core.docker_client import DOCKER
 from app.sandbox.core.exceptions import SandboxTimeoutError
 from app.sandbox.core.terminal import AsyncDockerizedTerminal
+from app.tracing import traced
 
 
 class DockerSandbox:
@@ -23,7 +25,7 @@ class DockerSandbox:
     Attributes:
         config: Sandbox configuration.
         volume_bindings: Volume mapping configuration.
-        client: Docker client.
+        client: Shared Docker client.
         container: Docker container instance.
         terminal: Container terminal interface.
     """
@@ -41,10 +43,11 @@ class DockerSandbox:
         """
         self.config = config or SandboxSettings.model_construct()
         self.volume_bindings = volume_bindings or {}
-        self.client = docker.from_env()
+        self.client = DOCKER.client
         self.container: Container | None = None
         self.terminal: AsyncDockerizedTerminal | None = None
 
+    @traced("sandbox.create")
     async def create(self) -> "DockerSandbox":
         """Creates and starts the sandbox container.
 
@@ -69,7 +72,7 @@ class DockerSandbox:
             container_name = f"sandbox_{uuid.uuid4().hex[:8]}"
 
             # Create container
-            container = await asyncio.to_thread(
+            container = await DOCKER.run(
                 self.client.api.create_container,
                 image=self.config.image,
                 command="tail -f /dev/null",
@@ -81,14 +84,16 @@ class DockerSandbox:
                 detach=True,
             )
 
-            self.container = self.client.containers.get(container["Id"])
+            self.container = await DOCKER.run(
+                self.client.containers.get, container["Id"]
+            )
 
             # Start container
-            await asyncio.to_thread(self.container.start)
+            await DOCKER.run(self.container.start)
 
             # Initialize terminal
             self.terminal = AsyncDockerizedTerminal(
-                container["Id"],
+                self.container,
                 self.config.work_dir,
                 env_vars={"PYTHONUNBUFFERED": "1"},
                 # Ensure Python output is not buffered
@@ -136,6 +141,7 @@ class DockerSandbox:
         os.makedirs(host_path, exist_ok=True)
         return host_path
 
+    @traced("sandbox.run_command")
     async def run_command(self, cmd: str, timeout: int | None = None) -> str:
         """Runs a command in the sandbox.
 
@@ -162,6 +168,7 @@ class DockerSandbox:
                 f"Command execution timed out after {timeout or self.config.timeout} seconds"
             )
 
+    @traced("sandbox.read_file")
     async def read_file(self, path: str) -> str:
         """Reads a file from the container.
 
@@ -181,9 +188,7 @@ class DockerSandbox:
         try:
             # Get file archive
             resolved_path = self._safe_resolve_path(path)
-            tar_stream, _ = await asyncio.to_thread(
-                self.container.get_archive, resolved_path
-            )
+            tar_stream, _ = await DOCKER.run(self.container.get_archive, resolved_path)
 
             # Read file content from tar stream
             content = await self._read_from_tar(tar_stream)
@@ -194,6 +199,7 @@ class DockerSandbox:
         except Exception as e:
             raise RuntimeError(f"Failed to read file: {e}")
 
+    @traced("sandbox.write_file")
     async def write_file(self, path: str, content: str) -> None:
         """Writes content to a file in the container.
 
@@ -204,26 +210,96 @@ class DockerSandbox:
         Raises:
             RuntimeError: If write operation fails.
         """
+        await self.write_files({path: content})
+
+    @traced("sandbox.read_files")
+    async def read_files(self, paths: list[str]) -> dict[str, bytes]:
+        """Reads several files from the container in one round trip.
+
+        The files are packed into a single tar stream by `tar` inside the
+        container and unpacked in memory.
+
+        Args:
+            paths: File paths.
+
+        Returns:
+            File contents keyed by the given paths.
+
+        Raises:
+            FileNotFoundError: If any of the files does not exist.
+            RuntimeError: If read operation fails.
+        """
         if not self.container:
             raise RuntimeError("Sandbox not initialized")
+        if not paths:
+            return {}
 
+        members = {self._safe_resolve_path(path).lstrip("/"): path for path in paths}
         try:
-            resolved_path = self._safe_resolve_path(path)
-            parent_dir = os.path.dirname(resolved_path)
+            exit_code, (stdout, stderr) = await DOCKER.run(
+                self.container.exec_run,
+                ["tar", "-cf", "-", "-C", "/", "--", *members],
+                demux=True,
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to read files: {e}")
 
-            # Create parent directory
-            if parent_dir:
-                await self.run_command(f"mkdir -p {parent_dir}")
+        files: dict[str, bytes] = {}
+        try:
+            # tar still archives the files it found if some are missing
+            with tarfile.open(fileobj=io.BytesIO(stdout or b"")) as tar:
+                for member in tar:
+                    path = members.get(member.name)
+                    file = tar.extractfile(member) if member.isfile() else None
+                    if path is not None and file is not None:
+                        files[path] = file.read()
+        except tarfile.TarError as e:
+            if exit_code == 0:
+                raise RuntimeError(f"Failed to read files: {e}")
+
+        missing = [path for path in paths if path not in files]
+        if missing:
+            if exit_code != 0 and stderr and b"No such file" not in stderr:
+                raise RuntimeError(f"Failed to read files: {stderr.decode()}")
+            raise FileNotFoundError(f"Files not found: {', '.join(missing)}")
+        return files
+
+    @traced("sandbox.write_files")
+    async def write_files(self, files: dict[str, bytes | str]) -> None:
+        """Writes several files to the container in one round trip.
+
+        All files go into a single in-memory tar stream. Docker creates
+        missing parent directories when extracting it, so no `mkdir` command
+        is needed, and existing directories keep their mode, owner and mtime.
 
-            # Prepare file data
-            tar_stream = await self._create_tar_stream(
-                os.path.basename(path), content.encode("utf-8")
-            )
+        Args:
+            files: File contents keyed by path; text is encoded as UTF-8.
 
-            # Write file
-            await asyncio.to_thread(
-                self.container.put_archive, parent_dir or "/", tar_stream
+        Raises:
+            RuntimeError: If write operation fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+        if not files:
+            return
+
+        try:
+            resolved = {
+                os.path.normpath(self._safe_resolve_path(path)): (
+                    content.encode("utf-8") if isinstance(content, str) else content
+                )
+                for path, content in files.items()
+            }
+
+            # Extract into the working directory if all files are below it
+            work_dir = os.path.normpath(self.config.work_dir)
+            inside = all(
+                os.path.commonpath([work_dir, path]) == work_dir for path in resolved
             )
+            root = work_dir if inside else "/"
+
+            tar_stream = await self._create_tar_stream_for(root, resolved)
+            await DOCKER.run(self.container.put_archive, root, tar_stream)
 
         except Exception as e:
             raise RuntimeError(f"Failed to write file: {e}")
@@ -251,6 +327,7 @@ class DockerSandbox:
         )
         return resolved
 
+    @traced("sandbox.copy_from")
     async def copy_from(self, src_path: str, dst_path: str) -> None:
         """Copies a file from the container.
 
@@ -271,47 +348,36 @@ class DockerSandbox:
             # Get file stream
             resolved_src = self._safe_resolve_path(src_path)
             assert self.container is not None, "Sandbox not initialized"
-            stream, stat = await asyncio.to_thread(
-                self.container.get_archive, resolved_src
-            )
-
-            # Create temporary directory to extract file
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                # Write stream to temporary file
-                tar_path = os.path.join(tmp_dir, "temp.tar")
-                with open(tar_path, "wb") as f:
-                    for chunk in stream:
-                        f.write(chunk)
-
-                # Extract file
-                with tarfile.open(tar_path) as tar:
-                    members = tar.getmembers()
-                    if not members:
-                        raise FileNotFoundError(f"Source file is empty: {src_path}")
-
-                    # If destination is a directory, we should preserve relative path structure
-                    if os.path.isdir(dst_path):
-                        tar.extractall(dst_path)
-                    else:
-                        # If destination is a file, we only extract the source file's content
-                        if len(members) > 1:
-                            raise RuntimeError(
-                                f"Source path is a directory but destination is a file: {src_path}"
-                            )
-
-                        with open(dst_path, "wb") as dst:
-                            src_file = tar.extractfile(members[0])
-                            if src_file is None:
-                                raise RuntimeError(
-                                    f"Failed to extract file: {src_path}"
-                                )
-                            dst.write(src_file.read())
+            stream, stat = await DOCKER.run(self.container.get_archive, resolved_src)
+
+            # Extract file from the archive in memory
+            with tarfile.open(fileobj=io.BytesIO(b"".join(stream))) as tar:
+                members = tar.getmembers()
+                if not members:
+                    raise FileNotFoundError(f"Source file is empty: {src_path}")
+
+                # If destination is a directory, we should preserve relative path structure
+                if os.path.isdir(dst_path):
+                    tar.extractall(dst_path)
+                else:
+                    # If destination is a file, we only extract the source file's content
+                    if len(members) > 1:
+                        raise RuntimeError(
+                            f"Source path is a directory but destination is a file: {src_path}"
+                        )
+
+                    with open(dst_path, "wb") as dst:
+                        src_file = tar.extractfile(members[0])
+                        if src_file is None:
+                            raise RuntimeError(f"Failed to extract file: {src_path}")
+                        dst.write(src_file.read())
 
         except docker.errors.NotFound:
             raise FileNotFoundError(f"Source file not found: {src_path}")
         except Exception as e:
             raise RuntimeError(f"Failed to copy file: {e}")
 
+    @traced("sandbox.copy_to")
     async def copy_to(self, src_path: str, dst_path: str) -> None:
         """Copies a file to the container.
 
@@ -358,7 +424,7 @@ class DockerSandbox:
 
                 # Upload to container
                 assert self.container is not None, "Sandbox not initialized"
-                await asyncio.to_thread(
+                await DOCKER.run(
                     self.container.put_archive,
                     os.path.dirname(resolved_dst) or "/",
                     data,
@@ -394,6 +460,32 @@ class DockerSandbox:
         tar_stream.seek(0)
         return tar_stream
 
+    @staticmethod
+    async def _create_tar_stream_for(root: str, files: dict[str, bytes]) -> io.BytesIO:
+        """Creates a tar stream of files to extract at `root`.
+
+        The archive holds no directory entries: extracting one would reset the
+        mode, owner and mtime of a directory that already exists. Docker
+        creates missing parent directories itself.
+
+        Args:
+            root: Absolute directory the archive is extracted in.
+            files: File contents keyed by absolute path below `root`.
+
+        Returns:
+            Tar file stream.
+        """
+        mtime = time.time()
+        tar_stream = io.BytesIO()
+        with tarfile.open(fileobj=tar_stream, mode="w") as tar:
+            for path, content in files.items():
+                tarinfo = tarfile.TarInfo(name=os.path.relpath(path, root))
+                tarinfo.size = len(content)
+                tarinfo.mtime = mtime
+                tar.addfile(tarinfo, io.BytesIO(content))
+        tar_stream.seek(0)
+        return tar_stream
+
     @staticmethod
     async def _read_from_tar(tar_stream) -> bytes:
         """Reads file content from a tar stream.
@@ -407,21 +499,52 @@ class DockerSandbox:
         Raises:
             RuntimeError: If read operation fails.
         """
-        with tempfile.NamedTemporaryFile() as tmp:
-            for chunk in tar_stream:
-                tmp.write(chunk)
-            tmp.seek(0)
+        data = io.BytesIO(b"".join(tar_stream))
+        with tarfile.open(fileobj=data) as tar:
+            member = tar.next()
+            if not member:
+                raise RuntimeError("Empty tar archive")
+
+            file_content = tar.extractfile(member)
+            if not file_content:
+                raise RuntimeError("Failed to extract file content")
 
-            with tarfile.open(fileobj=tmp) as tar:
-                member = tar.next()
-                if not member:
-                    raise RuntimeError("Empty tar archive")
+            return file_content.read()
 
-                file_content = tar.extractfile(member)
-                if not file_content:
-                    raise RuntimeError("Failed to extract file content")
+    @traced("sandbox.reset")
+    async def reset(self) -> None:
+        """Resets the sandbox to a clean state for reuse.
 
-                return file_content.read()
+        Kills all processes except the container's init process, wipes the
+        working directory and opens a fresh terminal session.
+
+        Raises:
+            RuntimeError: If sandbox not initialized or reset fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        if self.terminal:
+            await self.terminal.close()
+            self.terminal = None
+
+        # `kill -9 -1` run as root signals every process except PID 1 and itself
+        reset_command = (
+            "kill -9 -1 2>/dev/null; "
+            f"find {self.config.work_dir} -mindepth 1 -delete"
+        )
+        exit_code, output = await DOCKER.run(
+            self.container.exec_run, ["sh", "-c", reset_command], user="root"
+        )
+        if exit_code != 0:
+            raise RuntimeError(f"Failed to reset sandbox: {output.decode()}")
+
+        self.terminal = AsyncDockerizedTerminal(
+            self.container,
+            self.config.work_dir,
+            env_vars={"PYTHONUNBUFFERED": "1"},
+        )
+        await self.terminal.init()
 
     async def cleanup(self) -> None:
         """Cleans up sandbox resources."""
@@ -437,12 +560,12 @@ class DockerSandbox:
 
             if self.container:
                 try:
-                    await asyncio.to_thread(self.container.stop, timeout=5)
+                    await DOCKER.run(self.container.stop, timeout=5)
                 except Exception as e:
                     errors.append(f"Container stop error: {e}")
 
                 try:
-                    await asyncio.to_thread(self.container.remove, force=True)
+                    await DOCKER.run(self.container.remove, force=True)
                 except Exception as e:
                     errors.append(f"Container remove error: {e}")
                 finally:
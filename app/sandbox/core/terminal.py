@@ -8,24 +8,38 @@ allowing interactive command execution with timeout control.
 import asyncio
 import re
 import socket
+import uuid
 
-import docker
 from docker import APIClient
 from docker.errors import APIError
 from docker.models.containers import Container
 
+from app.sandbox.core.docker_client import DOCKER
+
 
 class DockerSession:
+    # Bytes requested from the socket per read
+    READ_CHUNK_SIZE = 65536
+
     def __init__(self, container_id: str) -> None:
         """Initializes a Docker session.
 
         Args:
             container_id: ID of the Docker container.
         """
-        self.api = APIClient()
         self.container_id = container_id
         self.exec_id = None
         self.socket: socket.socket | None = None
+        self.last_exit_code: int | None = None
+        self._buffer = bytearray()
+        self._lock = asyncio.Lock()
+        # Markers of timed out commands whose output is still to be discarded
+        self._stale_markers: list[re.Pattern[bytes]] = []
+
+    @property
+    def api(self) -> APIClient:
+        """Low-level API client of the shared Docker client."""
+        return DOCKER.api
 
     async def create(self, working_dir: str, env_vars: dict[str, str]) -> None:
         """Creates an interactive session with the container.
@@ -37,16 +51,20 @@ class DockerSession:
         Raises:
             RuntimeError: If socket connection fails.
         """
+        # Terminal echo and prompts are disabled so the output holds only what
+        # commands print; completion is detected with a marker instead
         startup_command = [
             "bash",
             "-c",
             f"cd {working_dir} && "
+            "stty -echo 2>/dev/null; "
             "PROMPT_COMMAND='' "
-            "PS1='$ ' "
+            "PS1='' PS2='' "
             "exec bash --norc --noprofile",
         ]
 
-        exec_data = self.api.exec_create(
+        exec_data = await DOCKER.run(
+            self.api.exec_create,
             self.container_id,
             startup_command,
             stdin=True,
@@ -55,12 +73,17 @@ class DockerSession:
             stderr=True,
             privileged=True,
             user="root",
-            environment={**env_vars, "TERM": "dumb", "PS1": "$ ", "PROMPT_COMMAND": ""},
+            environment={**env_vars, "TERM": "dumb", "PS1": "", "PROMPT_COMMAND": ""},
         )
         self.exec_id = exec_data["Id"]
 
-        socket_data = self.api.exec_start(
-            self.exec_id, socket=True, tty=True, stream=True, demux=True
+        socket_data = await DOCKER.run(
+            self.api.exec_start,
+            self.exec_id,
+            socket=True,
+            tty=True,
+            stream=True,
+            demux=True,
         )
 
         if hasattr(socket_data, "_sock"):
@@ -70,7 +93,7 @@ class DockerSession:
         else:
             raise RuntimeError("Failed to get socket connection")
 
-        await self._read_until_prompt()
+        await self._sync()
 
     async def close(self) -> None:
         """Cleans up session resources.
@@ -83,7 +106,9 @@ class DockerSession:
             if self.socket:
                 # Send exit command to close bash session
                 try:
-                    self.socket.sendall(b"exit\n")
+                    await asyncio.get_running_loop().sock_sendall(
+                        self.socket, b"exit\n"
+                    )
                     # Allow time for command execution
                     await asyncio.sleep(0.1)
                 except:
@@ -97,11 +122,13 @@ class DockerSession:
 
                 self.socket.close()
                 self.socket = None
+                self._buffer.clear()
+                self._stale_markers.clear()
 
             if self.exec_id:
                 try:
                     # Check exec instance status
-                    exec_inspect = self.api.exec_inspect(self.exec_id)
+                    exec_inspect = await DOCKER.run(self.api.exec_inspect, self.exec_id)
                     if exec_inspect.get("Running", False):
                         # If still running, wait for it to complete
                         await asyncio.sleep(0.5)
@@ -114,38 +141,79 @@ class DockerSession:
             # Log error but don't raise, ensure cleanup continues
             print(f"Warning: Error during session cleanup: {e}")
 
-    async def _read_until_prompt(self) -> str:
-        """Reads output until prompt is found.
+    @staticmethod
+    def _new_marker() -> tuple[str, re.Pattern[bytes]]:
+        """Creates a completion marker and the pattern matching its output.
+
+        The marker is printed followed by the exit code. The command text only
+        contains the marker followed by a quote, so echoed input never matches.
 
         Returns:
-            String containing output up to the prompt.
+            Tuple of (printf command, pattern).
+        """
+        marker = f"__OPENMANUS_DONE_{uuid.uuid4().hex}__"
+        command = f"printf '\\n%s%s\\n' '{marker}' \"$?\"\n"
+        pattern = re.compile(rb"\r?\n" + marker.encode() + rb"(\d+)\r?\n")
+        return command, pattern
+
+    async def _read_until(self, pattern: re.Pattern[bytes]) -> bytes:
+        """Reads from the socket until the pattern appears in the output.
+
+        Reads wait on the event loop for data instead of polling, so a command
+        returns as soon as its marker arrives.
+
+        Args:
+            pattern: Pattern matching the end of the output; its first group
+                is the exit code.
+
+        Returns:
+            Output before the pattern. It is removed from the buffer together
+            with the match.
 
         Raises:
-            socket.error: If socket communication fails.
+            ConnectionError: If the session ends before the pattern appears.
         """
         assert self.socket is not None, "Socket not initialized"
-        buffer = b""
-        while b"$ " not in buffer:
-            try:
-                chunk = self.socket.recv(4096)
-                if chunk:
-                    buffer += chunk
-            except socket.error as e:
-                if e.errno == socket.EWOULDBLOCK:
-                    await asyncio.sleep(0.1)
-                    continue
-                raise
-        return buffer.decode("utf-8")
+        loop = asyncio.get_running_loop()
+        # Only the tail of the buffer can contain a marker that was split
+        # across reads, so earlier output is not searched again
+        overlap = len(pattern.pattern) + 16
+        start = 0
+        while True:
+            match = pattern.search(self._buffer, start)
+            if match:
+                break
+            start = max(0, len(self._buffer) - overlap)
+            chunk = await loop.sock_recv(self.socket, self.READ_CHUNK_SIZE)
+            if not chunk:
+                raise ConnectionError("Session closed by the container")
+            self._buffer += chunk
+
+        output = bytes(self._buffer[: match.start()])
+        self.last_exit_code = int(match.group(1))
+        del self._buffer[: match.end()]
+        return output
+
+    async def _sync(self) -> None:
+        """Waits until the shell is ready and discards its startup output."""
+        assert self.socket is not None, "Socket not initialized"
+        marker_command, pattern = self._new_marker()
+        await asyncio.get_running_loop().sock_sendall(
+            self.socket, marker_command.encode()
+        )
+        await self._read_until(pattern)
 
     async def execute(self, command: str, timeout: int | None = None) -> str:
         """Executes a command and returns cleaned output.
 
+        The exit code of the command is stored in `last_exit_code`.
+
         Args:
             command: Shell command to execute.
             timeout: Maximum execution time in seconds.
 
         Returns:
-            Command output as string with prompt markers removed.
+            Command output as string.
 
         Raises:
             RuntimeError: If session not initialized or execution fails.
@@ -157,59 +225,32 @@ class DockerSession:
         try:
             # Sanitize command to prevent shell injection
             sanitized_command = self._sanitize_command(command)
-            full_command = f"{sanitized_command}\necho $?\n"
-            self.socket.sendall(full_command.encode())
+            marker_command, pattern = self._new_marker()
+            full_command = f"{sanitized_command}\n{marker_command}"
 
             async def read_output() -> str:
-                buffer = b""
-                result_lines = []
-                command_sent = False
-
                 assert self.socket is not None, "Socket not initialized"
-
-                while True:
-                    try:
-                        chunk = self.socket.recv(4096)
-                        if not chunk:
-                            break
-
-                        buffer += chunk
-                        lines = buffer.split(b"\n")
-
-                        buffer = lines[-1]
-                        lines = lines[:-1]
-
-                        for line in lines:
-                            line = line.rstrip(b"\r")
-
-                            if not command_sent:
-                                command_sent = True
-                                continue
-
-                            if line.strip() == b"echo $?" or line.strip().isdigit():
-                                continue
-
-                            if line.strip():
-                                result_lines.append(line)
-
-                        if buffer.endswith(b"$ "):
-                            break
-
-                    except socket.error as e:
-                        if e.errno == socket.EWOULDBLOCK:
-                            await asyncio.sleep(0.1)
-                            continue
-                        raise
-
-                output = b"\n".join(result_lines).decode("utf-8")
-                output = re.sub(r"\n\$ echo \$\$?.*$", "", output)
-
-                return output
-
-            if timeout:
-                result = await asyncio.wait_for(read_output(), timeout)
-            else:
-                result = await read_output()
+                await asyncio.get_running_loop().sock_sendall(
+                    self.socket, full_command.encode()
+                )
+                # The shell runs commands in order, so the output of timed out
+                # commands arrives first and is dropped up to their markers
+                while self._stale_markers:
+                    await self._read_until(self._stale_markers[0])
+                    self._stale_markers.pop(0)
+                output = await self._read_until(pattern)
+                return output.replace(b"\r\n", b"\n").decode("utf-8", errors="replace")
+
+            # Commands share one shell, so they must not interleave
+            async with self._lock:
+                try:
+                    if timeout:
+                        result = await asyncio.wait_for(read_output(), timeout)
+                    else:
+                        result = await read_output()
+                except asyncio.TimeoutError:
+                    self._stale_markers.append(pattern)
+                    raise
 
             return result.strip()
 
@@ -267,12 +308,12 @@ class AsyncDockerizedTerminal:
             env_vars: Environment variables to set.
             default_timeout: Default command execution timeout in seconds.
         """
-        self.client = docker.from_env()
-        self.container = (
-            container
-            if isinstance(container, Container)
-            else self.client.containers.get(container)
+        self.client = DOCKER.client
+        # A container given by ID is looked up in `init`
+        self.container: Container | None = (
+            container if isinstance(container, Container) else None
         )
+        self._container_id = container if isinstance(container, str) else None
         self.working_dir = working_dir
         self.env_vars = env_vars or {}
         self.default_timeout = default_timeout
@@ -286,6 +327,11 @@ class AsyncDockerizedTerminal:
         Raises:
             RuntimeError: If initialization fails.
         """
+        if self.container is None:
+            self.container = await DOCKER.run(
+                self.client.containers.get, self._container_id
+            )
+
         await self._ensure_workdir()
 
         container_id = self.container.id
@@ -315,7 +361,8 @@ class AsyncDockerizedTerminal:
         Returns:
             Tuple of (exit_code, output).
         """
-        result = await asyncio.to_thread(
+        assert self.container is not None, "Terminal not initialized"
+        result = await DOCKER.run(
             self.container.exec_run, cmd, environment=self.env_vars
         )
         return result.exit_code, result.output.decode("utf-8")
@@ -6,6 +6,8 @@ from openai.types.chat.chat_completion_message_tool_call import (
 )
 from pydantic import BaseModel, Field
 
+from app.image_store import IMAGE_STORE
+
 
 class Role(str, Enum):
     """Message role options"""
@@ -63,6 +65,8 @@ class Message(BaseModel):
     name: str | None = Field(default=None)
     tool_call_id: str | None = Field(default=None)
     base64_image: str | None = Field(default=None)
+    # Reference into the image store, replacing base64_image once stored
+    image_ref: str | None = Field(default=None)
 
     def __add__(self, other) -> list["Message"]:
         """支持 Message + list 或 Message + Message 的操作"""
@@ -97,8 +101,21 @@ class Message(BaseModel):
             message["tool_call_id"] = self.tool_call_id
         if self.base64_image is not None:
             message["base64_image"] = self.base64_image
+        if self.image_ref is not None:
+            message["image_ref"] = self.image_ref
         return message
 
+    @property
+    def has_image(self) -> bool:
+        return self.base64_image is not None or self.image_ref is not None
+
+    def store_image(self) -> "Message":
+        """Move the inline base64 image to the image store, keeping a reference"""
+        if self.base64_image is not None:
+            self.image_ref = IMAGE_STORE.put(self.base64_image)
+            self.base64_image = None
+        return self
+
     @classmethod
     def user_message(cls, content: str, base64_image: str | None = None) -> "Message":
         """Create a user message"""
@@ -165,17 +182,21 @@ class Message(BaseModel):
 class Memory(BaseModel):
     messages: list[Message] = Field(default_factory=list)
     max_messages: int = Field(default=100)
+    # Messages kept when trimming; below max_messages, trimming happens in
+    # batches so the history prefix stays unchanged between trims
+    trim_to: int | None = Field(default=None)
 
     def add_message(self, message: Message) -> None:
         """Add a message to memory"""
-        self.messages.append(message)
+        self.messages.append(message.store_image())
         # Optional: Implement message limit
         if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+            keep = min(self.trim_to or self.max_messages, self.max_messages)
+            self.messages = self.messages[-keep:]
 
     def add_messages(self, messages: list[Message]) -> None:
         """Add multiple messages to memory"""
-        self.messages.extend(messages)
+        self.messages.extend(message.store_image() for message in messages)
 
     def clear(self) -> None:
         """Clear all messages"""
@@ -0,0 +1,80 @@
+"""State owned by one agent run, so many runs can share a process.
+
+LLM clients, connection pools and rate limiters are shared by all runs, but
+token accounting, cached tool results and the sandbox belong to a session. Code running inside
+`async with Session():` (and every task it starts) sees that session through
+`current_session()`; code outside of any session uses a process-wide default
+session, which keeps the single-run behavior unchanged.
+"""
+
+import uuid
+from contextvars import ContextVar, Token
+
+from app.llm import TokenUsage, _current_usage
+from app.logger import logger
+from app.sandbox.client import SANDBOX_CLIENT, LocalSandboxClient
+from app.tool_cache import ToolResultCache
+
+
+class Session:
+    """Per-run state: token usage, tool results and sandbox client.
+
+    Attributes:
+        id: Session identifier, used in logs.
+        usage: Tokens used by LLM requests made within the session. Token
+            limits of the LLM are checked against it.
+        tool_cache: Results of cacheable tool calls made within the session.
+    """
+
+    def __init__(
+        self,
+        session_id: str | None = None,
+        sandbox_client: LocalSandboxClient | None = None,
+    ):
+        self.id = session_id or uuid.uuid4().hex
+        self.usage = TokenUsage()
+        self.tool_cache = ToolResultCache()
+        self._sandbox_client = sandbox_client
+        self._tokens: list[tuple[Token, Token]] = []
+
+    @property
+    def sandbox_client(self) -> LocalSandboxClient:
+        """Sandbox client of the session, created on first use."""
+        if self._sandbox_client is None:
+            self._sandbox_client = LocalSandboxClient()
+        return self._sandbox_client
+
+    async def cleanup(self) -> None:
+        """Releases the session's sandbox."""
+        if self._sandbox_client is not None:
+            try:
+                await self._sandbox_client.cleanup()
+            except Exception as e:
+                logger.warning(f"Error cleaning up sandbox of session {self.id}: {e}")
+
+    async def __aenter__(self) -> "Session":
+        self._tokens.append(
+            (_current_session.set(self), _current_usage.set(self.usage))
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        session_token, usage_token = self._tokens.pop()
+        _current_usage.reset(usage_token)
+        _current_session.reset(session_token)
+        await self.cleanup()
+
+
+# Session used by code that does not run inside one, e.g. a single CLI run
+DEFAULT_SESSION = Session("default", sandbox_client=SANDBOX_CLIENT)
+
+_current_session: ContextVar[Session | None] = ContextVar("session", default=None)
+
+
+def current_session() -> Session:
+    """Gets the session of the running task.
+
+    Returns:
+        Session: The innermost active session, or the default session.
+    """
+    return _current_session.get() or DEFAULT_SESSION
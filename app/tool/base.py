@@ -1,13 +1,29 @@
 from abc import ABC, abstractmethod
+from enum import Enum
 from typing import Any
 
 from pydantic import BaseModel, Field
 
 
+class ToolConcurrency(str, Enum):
+    """How a tool call may overlap with the other tool calls of a step"""
+
+    # No side effects: runs concurrently with other calls
+    READ_ONLY = "read_only"
+    # Changes only the tool's own state: calls to the same tool keep their order
+    STATEFUL = "stateful"
+    # May change anything (files, processes): runs alone, in order
+    EXCLUSIVE = "exclusive"
+
+
 class BaseTool(ABC, BaseModel):
     name: str
     description: str
     parameters: dict = Field(default_factory=dict)
+    concurrency: ToolConcurrency = ToolConcurrency.EXCLUSIVE
+    # Seconds a result may be reused for an identical read-only call within a
+    # session; None never reuses results
+    cache_ttl: float | None = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -20,6 +36,25 @@ class BaseTool(ABC, BaseModel):
     async def execute(self, *args, **kwargs) -> Any:
         """Execute the tool with given parameters."""
 
+    def get_concurrency(self, **kwargs) -> ToolConcurrency:
+        """Concurrency class of a call with the given arguments."""
+        return self.concurrency
+
+    def is_cacheable(self, **kwargs) -> bool:
+        """Whether the result of a call with the given arguments may be reused."""
+        return (
+            self.cache_ttl is not None
+            and self.get_concurrency(**kwargs) == ToolConcurrency.READ_ONLY
+        )
+
+    def cache_scope(self, **kwargs) -> str | None:
+        """Resource a call reads or writes, e.g. a file path.
+
+        A call that is not cached drops the tool's cached results within its
+        scope, including nested paths; None stands for everything.
+        """
+        return None
+
     def to_param(self) -> dict:
         """Convert tool to function call format."""
         return {
@@ -75,6 +110,14 @@ class ToolResult(BaseModel):
 class CLIResult(ToolResult):
     """A ToolResult that can be rendered as a CLI output."""
 
+    exit_code: int | None = Field(default=None)
+
+    def __str__(self):
+        text = super().__str__()
+        if self.exit_code:
+            return f"{text or ''}\n[exit code: {self.exit_code}]".lstrip("\n")
+        return text
+
 
 class ToolFailure(ToolResult):
     """A ToolResult that represents a failure."""
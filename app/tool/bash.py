@@ -1,6 +1,7 @@
 import asyncio
 import os
-from typing import Any, cast
+import re
+import uuid
 
 from app.exceptions import ToolError
 from app.tool.base import BaseTool, CLIResult, ToolResult
@@ -13,6 +14,45 @@ _BASH_DESCRIPTION = """Execute a bash command in the terminal.
 """
 
 
+class _OutputBuffer:
+    """Output of a stream, keeping only its head and tail beyond `limit` bytes."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+
+    def append(self, data: bytes) -> None:
+        self.tail += data
+        if len(self.head) + len(self.tail) <= self.limit:
+            return
+        if not self.head:
+            # First overflow: freeze the beginning of the output
+            half = self.limit // 2
+            self.head = self.tail[:half]
+            del self.tail[:half]
+        excess = len(self.head) + len(self.tail) - self.limit
+        if excess > 0:
+            del self.tail[:excess]
+            self.dropped += excess
+
+    def search(self, pattern: re.Pattern[bytes]) -> re.Match | None:
+        """Finds the pattern in the most recent output."""
+        return pattern.search(self.tail)
+
+    def take(self, start: int, end: int) -> str:
+        """Returns the output before `start` of the tail and keeps what follows `end`."""
+        output = bytes(self.head)
+        if self.dropped:
+            output += f"\n... [{self.dropped} bytes of output omitted] ...\n".encode()
+        output += bytes(self.tail[:start])
+        del self.tail[:end]
+        self.head.clear()
+        self.dropped = 0
+        return output.decode(errors="replace")
+
+
 class _BashSession:
     """A session of a bash shell."""
 
@@ -20,13 +60,16 @@ class _BashSession:
     _process: asyncio.subprocess.Process
 
     command: str = "/bin/bash"
-    _output_delay: float = 0.2  # seconds
     _timeout: float = 120.0  # seconds
-    _sentinel: str = "<<exit>>"
+    _max_output: int = 100_000  # bytes retained per stream and command
 
     def __init__(self):
         self._started = False
         self._timed_out = False
+        self._stdout = _OutputBuffer(self._max_output)
+        self._stderr = _OutputBuffer(self._max_output)
+        self._data_received = asyncio.Event()
+        self._readers: list[asyncio.Task] = []
 
     async def start(self):
         if self._started:
@@ -45,8 +88,23 @@ class _BashSession:
             stderr=asyncio.subprocess.PIPE,
         )
 
+        # we know these are not None because we created the process with PIPEs
+        assert self._process.stdout
+        assert self._process.stderr
+        self._readers = [
+            asyncio.create_task(self._read(self._process.stdout, self._stdout)),
+            asyncio.create_task(self._read(self._process.stderr, self._stderr)),
+        ]
+
         self._started = True
 
+    async def _read(self, stream: asyncio.StreamReader, buffer: _OutputBuffer):
+        """Moves output into the buffer as it arrives and wakes up `run`."""
+        while data := await stream.read(65536):
+            buffer.append(data)
+            self._data_received.set()
+        self._data_received.set()
+
     def stop(self):
         """Terminate the bash shell."""
         if not self._started:
@@ -69,47 +127,52 @@ class _BashSession:
                 f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
             )
 
-        # we know these are not None because we created the process with PIPEs
         assert self._process.stdin
-        assert self._process.stdout
-        assert self._process.stderr
 
-        # send command to the process
+        # A fresh sentinel per command, printed after the command on both streams.
+        # The one on stdout carries the exit code.
+        sentinel = f"__openmanus_exit_{uuid.uuid4().hex}__"
+        stdout_end = re.compile(rb"\n" + sentinel.encode() + rb"(\d+)\n")
+        stderr_end = re.compile(rb"\n" + sentinel.encode() + rb"\n")
         self._process.stdin.write(
-            command.encode() + f"; echo '{self._sentinel}'\n".encode()
+            f"{command}\n"
+            f"__openmanus_rc=$?; printf '\\n%s%s\\n' '{sentinel}' \"$__openmanus_rc\"; "
+            f"printf '\\n%s\\n' '{sentinel}' >&2\n".encode()
         )
         await self._process.stdin.drain()
 
-        # read output from the process, until the sentinel is found
+        # wait for output until both sentinels are found
         try:
             async with asyncio.timeout(self._timeout):
                 while True:
-                    await asyncio.sleep(self._output_delay)
-                    # if we read directly from stdout/stderr, it will wait forever for
-                    # EOF. use the StreamReader buffer directly instead.
-                    output = cast(Any, self._process.stdout)._buffer.decode()
-                    if self._sentinel in output:
-                        # strip the sentinel and break
-                        output = output[: output.index(self._sentinel)]
+                    self._data_received.clear()
+                    stdout_match = self._stdout.search(stdout_end)
+                    stderr_match = self._stderr.search(stderr_end)
+                    if stdout_match and stderr_match:
                         break
+                    if all(reader.done() for reader in self._readers):
+                        await self._process.wait()
+                        return ToolResult(
+                            system="tool must be restarted",
+                            error=f"bash has exited with returncode {self._process.returncode}",
+                        )
+                    await self._data_received.wait()
         except asyncio.TimeoutError:
             self._timed_out = True
             raise ToolError(
                 f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
             ) from None
 
+        exit_code = int(stdout_match.group(1))
+        output = self._stdout.take(stdout_match.start(), stdout_match.end())
+        error = self._stderr.take(stderr_match.start(), stderr_match.end())
+
         if output.endswith("\n"):
             output = output[:-1]
-
-        error = cast(Any, self._process.stderr)._buffer.decode()
         if error.endswith("\n"):
             error = error[:-1]
 
-        # clear the buffers so that the next output can be read correctly
-        cast(Any, self._process.stdout)._buffer.clear()
-        cast(Any, self._process.stderr)._buffer.clear()
-
-        return CLIResult(output=output, error=error)
+        return CLIResult(output=output, error=error, exit_code=exit_code)
 
 
 class Bash(BaseTool):
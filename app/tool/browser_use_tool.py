@@ -12,8 +12,10 @@ from pydantic_core.core_schema import ValidationInfo
 
 from app.config import config
 from app.llm import LLM
-from app.tool.base import BaseTool, ToolResult
+from app.llm_scheduler import RequestPriority
+from app.tool.base import BaseTool, ToolConcurrency, ToolResult
 from app.tool.web_search import WebSearch
+from app.tracing import traced
 
 
 _BROWSER_DESCRIPTION = """
@@ -133,6 +135,9 @@ class BrowserUseTool(BaseTool, Generic[Context]):
             "extract_content": ["goal"],
         },
     }
+    concurrency: ToolConcurrency = ToolConcurrency.STATEFUL
+    # Extracted content is reused until another action changes the page
+    cache_ttl: float | None = 120
 
     lock: asyncio.Lock = Field(default_factory=asyncio.Lock)
     browser: BrowserUseBrowser | None = Field(default=None, exclude=True)
@@ -151,6 +156,12 @@ class BrowserUseTool(BaseTool, Generic[Context]):
             raise ValueError("Parameters cannot be empty")
         return v
 
+    def get_concurrency(self, **kwargs) -> ToolConcurrency:
+        """Content extraction leaves the page unchanged, other actions change it."""
+        if kwargs.get("action") == "extract_content":
+            return ToolConcurrency.READ_ONLY
+        return self.concurrency
+
     async def _ensure_browser_initialized(self) -> BrowserContext:
         """Ensure browser and context are initialized."""
         if self.browser is None:
@@ -466,6 +477,7 @@ Page content:
                             list(messages),
                             tools=[extraction_function],
                             tool_choice="required",
+                            priority=RequestPriority.EXTRACTION,
                         )
 
                         # Extract content from function call response
@@ -536,6 +548,7 @@ Page content:
             except Exception as e:
                 return ToolResult(error=f"Browser action '{action}' failed: {str(e)}")
 
+    @traced("browser.get_state")
     async def get_current_state(
         self, context: BrowserContext | None = None
     ) -> ToolResult:
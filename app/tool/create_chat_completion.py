@@ -4,6 +4,7 @@ from typing import Any, Type, Union, cast, get_args, get_origin
 from pydantic import BaseModel, Field
 
 from app.tool import BaseTool
+from app.tool.base import ToolConcurrency
 
 
 class CreateChatCompletion(BaseTool):
@@ -11,6 +12,7 @@ class CreateChatCompletion(BaseTool):
     description: str = (
         "Creates a structured completion with specified output formatting."
     )
+    concurrency: ToolConcurrency = ToolConcurrency.READ_ONLY
 
     # Type mapping for JSON schema
     type_mapping: dict = {
@@ -1,8 +1,10 @@
 # tool/planning.py
 from typing import Literal
 
+from pydantic import Field
+
 from app.exceptions import ToolError
-from app.tool.base import BaseTool, ToolResult
+from app.tool.base import BaseTool, ToolConcurrency, ToolResult
 
 
 _PLANNING_TOOL_DESCRIPTION = """
@@ -65,8 +67,9 @@ class PlanningTool(BaseTool):
         "required": ["command"],
         "additionalProperties": False,
     }
+    concurrency: ToolConcurrency = ToolConcurrency.STATEFUL
 
-    plans: dict = {}  # Dictionary to store plans by plan_id
+    plans: dict = Field(default_factory=dict)  # Dictionary to store plans by plan_id
     _current_plan_id: str | None = None  # Track the current active plan
 
     async def execute(
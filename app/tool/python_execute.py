@@ -1,12 +1,18 @@
-import multiprocessing
-import sys
-from io import StringIO
+import uuid
 
+from pydantic import PrivateAttr
+
+from app.interpreter_pool import INTERPRETER_POOL
 from app.tool.base import BaseTool
 
 
 class PythonExecute(BaseTool):
-    """A tool for executing Python code with timeout and safety restrictions."""
+    """A tool for executing Python code with timeout and safety restrictions.
+
+    Code runs in warm worker processes of the shared interpreter pool. With
+    `persistent_namespace`, variables and imports are kept between calls of the
+    same tool instance until `cleanup`, which agents call when a run ends.
+    """
 
     name: str = "python_execute"
     description: str = "Executes Python code string. Note: Only print outputs are visible, function return values are not captured. Use print statements to see results."
@@ -20,20 +26,10 @@ class PythonExecute(BaseTool):
         },
         "required": ["code"],
     }
+    persistent_namespace: bool = False
+    max_output_chars: int = 10000
 
-    def _run_code(self, code: str, result_dict: dict, safe_globals: dict) -> None:
-        original_stdout = sys.stdout
-        try:
-            output_buffer = StringIO()
-            sys.stdout = output_buffer
-            exec(code, safe_globals, safe_globals)
-            result_dict["observation"] = output_buffer.getvalue()
-            result_dict["success"] = True
-        except Exception as e:
-            result_dict["observation"] = str(e)
-            result_dict["success"] = False
-        finally:
-            sys.stdout = original_stdout
+    _session_id: str = PrivateAttr(default_factory=lambda: uuid.uuid4().hex)
 
     async def execute(
         self,
@@ -50,25 +46,13 @@ class PythonExecute(BaseTool):
         Returns:
             dict: Contains 'output' with execution output or error message and 'success' status.
         """
-
-        with multiprocessing.Manager() as manager:
-            result = manager.dict({"observation": "", "success": False})
-            if isinstance(__builtins__, dict):
-                safe_globals = {"__builtins__": __builtins__}
-            else:
-                safe_globals = {"__builtins__": __builtins__.__dict__.copy()}
-            proc = multiprocessing.Process(
-                target=self._run_code, args=(code, result, safe_globals)
-            )
-            proc.start()
-            proc.join(timeout)
-
-            # timeout process
-            if proc.is_alive():
-                proc.terminate()
-                proc.join(1)
-                return {
-                    "observation": f"Execution timeout after {timeout} seconds",
-                    "success": False,
-                }
-            return dict(result)
+        return await INTERPRETER_POOL.run(
+            code,
+            timeout=timeout,
+            session_id=self._session_id if self.persistent_namespace else None,
+            max_output=self.max_output_chars,
+        )
+
+    async def cleanup(self) -> None:
+        """Discard the persistent namespace of this tool."""
+        await INTERPRETER_POOL.release_session(self._session_id)
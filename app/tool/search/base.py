@@ -1,4 +1,14 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
 class WebSearchEngine(object):
+    # Threads of an engine whose client library blocks, so a hanging engine
+    # cannot use up the event loop's default executor
+    MAX_WORKERS = 4
+
+    _executor: ThreadPoolExecutor | None = None
+
     def perform_search(
         self, query: str, num_results: int = 10, *args, **kwargs
     ) -> list[dict | str]:
@@ -15,3 +25,35 @@ class WebSearchEngine(object):
             list[dict | str]: A list of dict matching the search query.
         """
         raise NotImplementedError
+
+    async def perform_search_async(
+        self, query: str, num_results: int = 10
+    ) -> list[dict | str]:
+        """
+        Perform a web search without blocking the event loop.
+
+        Engines with an async HTTP client override this; by default the
+        blocking search runs on a thread pool of the engine's own.
+
+        Args:
+            query (str): The search query to submit to the search engine.
+            num_results (int, optional): The number of search results to return. Default is 10.
+
+        Returns:
+            list[dict | str]: A list of dict matching the search query.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.MAX_WORKERS, thread_name_prefix=type(self).__name__
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            lambda: list(self.perform_search(query, num_results=num_results)),
+        )
+
+    async def close(self) -> None:
+        """Release the engine's connections and threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,5 +1,8 @@
+import asyncio
+import weakref
 from typing import Any, cast
 
+import httpx
 import requests
 from bs4 import BeautifulSoup, Tag
 
@@ -34,6 +37,9 @@ HEADERS = {
 BING_HOST_URL = "https://www.bing.com"
 BING_SEARCH_URL = "https://www.bing.com/search?q="
 
+# Connections kept open to Bing by the async client
+MAX_CONNECTIONS = 10
+
 
 class BingSearchEngine(WebSearchEngine):
     session: requests.Session
@@ -43,6 +49,26 @@ class BingSearchEngine(WebSearchEngine):
         super().__init__(**data)
         self.session = requests.Session()
         self.session.headers.update(HEADERS)
+        # One pooled client per event loop, since connections are bound to the
+        # loop that opened them; a client goes away with its loop
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncClient
+        ] = weakref.WeakKeyDictionary()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled async HTTP client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = httpx.AsyncClient(
+                headers=HEADERS,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_CONNECTIONS,
+                ),
+            )
+        return client
 
     def _search_sync(self, query: str, num_results: int = 10) -> list[str]:
         """
@@ -81,7 +107,7 @@ class BingSearchEngine(WebSearchEngine):
 
     def _parse_html(self, url: str, rank_start: int = 0, first: int = 1) -> tuple:
         """
-        Parse Bing search result HTML synchronously to extract search results and the next page URL.
+        Fetch a Bing search result page synchronously and parse it.
 
         Args:
             url (str): The URL of the Bing search results page to parse.
@@ -95,60 +121,122 @@ class BingSearchEngine(WebSearchEngine):
         try:
             res = self.session.get(url=url)
             res.encoding = "utf-8"
-            root = BeautifulSoup(res.text, "lxml")
-
-            list_data = []
-            ol_result = root.find("ol", id="b_results")
-            if not ol_result or not isinstance(ol_result, Tag):
-                return [], None
-
-            for li in ol_result.find_all("li", class_="b_algo"):
-                if not isinstance(li, Tag):
-                    continue
-                title = ""
-                url = ""
-                abstract = ""
-                try:
-                    h2 = li.find("h2")
-                    if h2 and isinstance(h2, Tag):
-                        title = h2.text.strip()
-                        a = h2.a
-                        if a:
-                            url = str(a["href"]).strip()
-
-                    p = li.find("p")
-                    if p:
-                        abstract = p.text.strip()
-
-                    if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
-                        abstract = abstract[:ABSTRACT_MAX_LENGTH]
-
-                    rank_start += 1
-                    list_data.append(
-                        {
-                            "title": title,
-                            "abstract": abstract,
-                            "url": url,
-                            "rank": rank_start,
-                        }
-                    )
-                except Exception:
-                    continue
-
-            next_btn = root.find("a", title="Next page")
-            if not next_btn or not isinstance(next_btn, Tag):
-                return list_data, None
-
-            href = next_btn["href"]
-            if isinstance(href, list):
-                href = href[0]
-
-            next_url = BING_HOST_URL + href
-            return list_data, next_url
+            return self._parse_page(res.text, rank_start)
         except Exception as e:
             logger.warning(f"Error parsing HTML: {e}")
             return [], None
 
+    async def _parse_html_async(self, url: str, rank_start: int = 0) -> tuple:
+        """
+        Fetch a Bing search result page with the async client and parse it.
+
+        Args:
+            url (str): The URL of the Bing search results page to parse.
+            rank_start (int, optional): The starting rank for numbering the search results. Defaults to 0.
+        Returns:
+            tuple: The results of the page and the URL of the next page, as from `_parse_html`.
+        """
+        try:
+            res = await self._get_client().get(url)
+            res.encoding = "utf-8"
+            return self._parse_page(res.text, rank_start)
+        except Exception as e:
+            logger.warning(f"Error parsing HTML: {e}")
+            return [], None
+
+    def _parse_page(self, html: str, rank_start: int = 0) -> tuple:
+        """
+        Parse Bing search result HTML to extract search results and the next page URL.
+
+        Args:
+            html (str): The HTML of the Bing search results page.
+            rank_start (int, optional): The starting rank for numbering the search results. Defaults to 0.
+        Returns:
+            tuple: A tuple containing:
+                - list: A list of dictionaries with keys 'title', 'abstract', 'url', and 'rank' for each result.
+                - str or None: The URL of the next results page, or None if there is no next page.
+        """
+        root = BeautifulSoup(html, "lxml")
+
+        list_data = []
+        ol_result = root.find("ol", id="b_results")
+        if not ol_result or not isinstance(ol_result, Tag):
+            return [], None
+
+        for li in ol_result.find_all("li", class_="b_algo"):
+            if not isinstance(li, Tag):
+                continue
+            title = ""
+            url = ""
+            abstract = ""
+            try:
+                h2 = li.find("h2")
+                if h2 and isinstance(h2, Tag):
+                    title = h2.text.strip()
+                    a = h2.a
+                    if a:
+                        url = str(a["href"]).strip()
+
+                p = li.find("p")
+                if p:
+                    abstract = p.text.strip()
+
+                if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
+                    abstract = abstract[:ABSTRACT_MAX_LENGTH]
+
+                rank_start += 1
+                list_data.append(
+                    {
+                        "title": title,
+                        "abstract": abstract,
+                        "url": url,
+                        "rank": rank_start,
+                    }
+                )
+            except Exception:
+                continue
+
+        next_btn = root.find("a", title="Next page")
+        if not next_btn or not isinstance(next_btn, Tag):
+            return list_data, None
+
+        href = next_btn["href"]
+        if isinstance(href, list):
+            href = href[0]
+
+        next_url = BING_HOST_URL + href
+        return list_data, next_url
+
     def perform_search(self, query, num_results=10, *args, **kwargs):
         """Bing search engine."""
         return cast(list[Any], list(self._search_sync(query, num_results=num_results)))
+
+    async def perform_search_async(self, query, num_results=10):
+        """Bing search engine, over the pooled async HTTP client."""
+        if not query:
+            return []
+
+        list_result = []
+        next_url = BING_SEARCH_URL + query
+
+        while len(list_result) < num_results:
+            data, next_url = await self._parse_html_async(
+                next_url, rank_start=len(list_result)
+            )
+            if data:
+                list_result.extend([item["url"] for item in data])
+            if not next_url:
+                break
+
+        return cast(list[Any], list_result[:num_results])
+
+    async def close(self) -> None:
+        """Release the engine's connections and threads."""
+        await super().close()
+        current = asyncio.get_running_loop()
+        for loop, client in list(self._clients.items()):
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        self._clients.clear()
@@ -4,10 +4,12 @@ from collections import defaultdict
 from pathlib import Path
 from typing import Any, DefaultDict, Literal, get_args
 
+from pydantic import PrivateAttr
+
 from app.config import config
 from app.exceptions import ToolError
 from app.tool import BaseTool
-from app.tool.base import CLIResult, ToolResult
+from app.tool.base import CLIResult, ToolConcurrency, ToolResult
 from app.tool.file_operators import (
     FileOperator,
     LocalFileOperator,
@@ -96,7 +98,12 @@ class StrReplaceEditor(BaseTool):
         },
         "required": ["command", "path"],
     }
-    _file_history: DefaultDict[PathLike, list[str]] = defaultdict(list)
+    # Views are reused until an edit of the path or a command that may change
+    # any file, e.g. bash, drops them
+    cache_ttl: float | None = 300
+    _file_history: DefaultDict[PathLike, list[str]] = PrivateAttr(
+        default_factory=lambda: defaultdict(list)
+    )
     _local_operator: LocalFileOperator = LocalFileOperator()
     _sandbox_operator: SandboxFileOperator = SandboxFileOperator()
 
@@ -109,6 +116,16 @@ class StrReplaceEditor(BaseTool):
             else self._local_operator
         )
 
+    def get_concurrency(self, **kwargs) -> ToolConcurrency:
+        """Viewing is read-only, all other commands modify files."""
+        if kwargs.get("command") == "view":
+            return ToolConcurrency.READ_ONLY
+        return ToolConcurrency.EXCLUSIVE
+
+    def cache_scope(self, **kwargs) -> str | None:
+        """Views are cached per path and dropped when the path is modified."""
+        return kwargs.get("path")
+
     async def execute(
         self,
         *,
@@ -1,9 +1,12 @@
 """Collection classes for managing multiple tools."""
 
-from typing import Any, Type, TypeVar, cast
+from typing import Any, Collection, Type, TypeVar, cast
 
+from app.cassette import current_cassette
 from app.exceptions import ToolError
+from app.session import current_session
 from app.tool.base import BaseTool, ToolFailure, ToolResult
+from app.tracing import TRACER
 
 
 T = TypeVar("T", bound=BaseTool)
@@ -15,12 +18,31 @@ class ToolCollection:
     def __init__(self, *tools: BaseTool):
         self.tools = tools
         self.tool_map = {tool.name: tool for tool in tools}
+        # Schemas of the tools, built on first use and kept until a tool is added
+        self._params: list[dict[str, Any]] | None = None
 
     def __iter__(self):
         return iter(self.tools)
 
-    def to_params(self) -> list[dict[str, Any]]:
-        return [tool.to_param() for tool in self.tools]
+    def to_params(self, names: Collection[str] | None = None) -> list[dict[str, Any]]:
+        """Gets the schemas of the tools in the format of the API's tools parameter.
+
+        The schema dicts are built once and shared between calls, so callers
+        must not modify them.
+
+        Args:
+            names: Only include the tools with these names; all tools if None.
+
+        Returns:
+            list[dict[str, Any]]: Tool schemas, in the order the tools were added.
+        """
+        if self._params is None:
+            self._params = [tool.to_param() for tool in self.tools]
+        if names is None:
+            return list(self._params)
+        return [
+            param for tool, param in zip(self.tools, self._params) if tool.name in names
+        ]
 
     async def execute(
         self, *, name: str, tool_input: dict[str, Any] | None = None
@@ -29,8 +51,16 @@ class ToolCollection:
         if not tool:
             return ToolFailure(error=f"Tool {name} is invalid")
         try:
-            result = await tool(**(tool_input or {}))
-            return result
+            tool_input = tool_input or {}
+            cassette = current_cassette()
+
+            async def run() -> Any:
+                if cassette is not None:
+                    return await cassette.execute_tool(tool, tool_input)
+                return await tool(**tool_input)
+
+            with TRACER.span("tool.execute", tool=name):
+                return await current_session().tool_cache.call(tool, tool_input, run)
         except ToolError as e:
             return ToolFailure(error=e.message)
 
@@ -57,6 +87,7 @@ class ToolCollection:
     def add_tool(self, tool: BaseTool):
         self.tools += (tool,)
         self.tool_map[tool.name] = tool
+        self._params = None
         return self
 
     def add_tools(self, *tools: BaseTool):
@@ -1,9 +1,11 @@
 import asyncio
 
-from tenacity import retry, stop_after_attempt, wait_exponential
+from pydantic import PrivateAttr
 
-from app.config import config
-from app.tool.base import BaseTool
+from app.config import SearchSettings, config
+from app.llm_cache import ResponseCache
+from app.logger import logger
+from app.tool.base import BaseTool, ToolConcurrency
 from app.tool.search import (
     BaiduSearchEngine,
     BingSearchEngine,
@@ -13,6 +15,29 @@ from app.tool.search import (
 )
 
 
+# Engines are shared by all WebSearch instances, so are their connection pools
+SEARCH_ENGINES: dict[str, WebSearchEngine] = {
+    "google": GoogleSearchEngine(),
+    "baidu": BaiduSearchEngine(),
+    "duckduckgo": DuckDuckGoSearchEngine(),
+    "bing": BingSearchEngine(),
+}
+
+_query_cache: ResponseCache | None = None
+
+
+def get_query_cache(settings: SearchSettings) -> ResponseCache | None:
+    """Gets the on-disk cache of query results, shared by all searches."""
+    global _query_cache
+    if not settings.cache:
+        return None
+    if _query_cache is None:
+        _query_cache = ResponseCache(
+            settings.cache_path, settings.cache_max_size_mb, settings.cache_ttl
+        )
+    return _query_cache
+
+
 class WebSearch(BaseTool):
     name: str = "web_search"
     description: str = """Perform a web search and return a list of relevant links.
@@ -33,17 +58,20 @@ class WebSearch(BaseTool):
         },
         "required": ["query"],
     }
-    _search_engine: dict[str, WebSearchEngine] = {
-        "google": GoogleSearchEngine(),
-        "baidu": BaiduSearchEngine(),
-        "duckduckgo": DuckDuckGoSearchEngine(),
-        "bing": BingSearchEngine(),
-    }
+    concurrency: ToolConcurrency = ToolConcurrency.READ_ONLY
+    cache_ttl: float | None = 600
+    _search_engine: dict[str, WebSearchEngine] = PrivateAttr(
+        default_factory=lambda: dict(SEARCH_ENGINES)
+    )
 
     async def execute(self, query: str, num_results: int = 10) -> list[dict | str]:
         """
         Execute a Web search and return a list of URLs.
 
+        The first `parallel_engines` engines are queried at the same time and
+        the first non-empty results win; if none has any, the next engines are
+        tried. Results are cached on disk, shared by all sessions.
+
         Args:
             query (str): The search query to submit to the search engine.
             num_results (int, optional): The number of search results to return. Default is 10.
@@ -51,17 +79,26 @@ class WebSearch(BaseTool):
         Returns:
             list[dict | str]: A list of URLs matching the search query.
         """
+        settings = config.search_config or SearchSettings()
+        cache = get_query_cache(settings)
+        key = ResponseCache.make_key(
+            kind="web_search", query=query, num_results=num_results
+        )
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached
+
         engine_order = self._get_engine_order()
-        for engine_name in engine_order:
-            engine = self._search_engine[engine_name]
-            try:
-                links = await self._perform_search_with_engine(
-                    engine, query, num_results
-                )
-                if links:
-                    return list(links)
-            except Exception as e:
-                print(f"Search engine '{engine_name}' failed with error: {e}")
+        parallel = max(1, settings.parallel_engines)
+        for i in range(0, len(engine_order), parallel):
+            links = await self._race_engines(
+                engine_order[i : i + parallel], query, num_results, settings.timeout
+            )
+            if links:
+                if cache is not None:
+                    await asyncio.to_thread(cache.set, key, links)
+                return links
         return []
 
     def _get_engine_order(self) -> list[str]:
@@ -84,17 +121,43 @@ class WebSearch(BaseTool):
                 engine_order.append(key)
         return engine_order
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-    )
+    async def _race_engines(
+        self, engine_names: list[str], query: str, num_results: int, timeout: float
+    ) -> list[dict | str]:
+        """Queries engines concurrently and returns the first non-empty results."""
+        tasks = [
+            asyncio.create_task(
+                self._perform_search_with_engine(name, query, num_results, timeout)
+            )
+            for name in engine_names
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                links = await next_done
+                if links:
+                    return links
+            return []
+        finally:
+            for task in tasks:
+                task.cancel()
+
     async def _perform_search_with_engine(
         self,
-        engine: WebSearchEngine,
+        engine_name: str,
         query: str,
         num_results: int,
+        timeout: float,
     ) -> list[dict | str]:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, lambda: list(engine.perform_search(query, num_results=num_results))
-        )
+        engine = self._search_engine[engine_name]
+        try:
+            return list(
+                await asyncio.wait_for(
+                    engine.perform_search_async(query, num_results=num_results),
+                    timeout,
+                )
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Search engine '{engine_name}' timed out after {timeout}s")
+        except Exception as e:
+            logger.warning(f"Search engine '{engine_name}' failed with error: {e}")
+        return []
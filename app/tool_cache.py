@@ -0,0 +1,149 @@
+"""Reuse of results of identical tool calls within a session.
+
+Agents often repeat a call they made a few steps earlier, e.g. the same web
+search or a view of a file they did not change since. Tools opt in by setting
+`cache_ttl`; calls whose `is_cacheable` holds are then served from the cache
+of the current session, and the observation notes that the result is cached.
+
+Cached results are dropped when they expire and when a call may have changed
+what they show: a call of the same tool that is not cached drops the results
+within its `cache_scope` (e.g. an edit drops the views of that file), and an
+exclusive call of a tool without caching, e.g. bash, drops all of them.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, NamedTuple
+
+
+if TYPE_CHECKING:
+    from app.tool.base import BaseTool
+
+
+class CacheEntry(NamedTuple):
+    tool: str
+    scope: str | None
+    result: Any
+    created: float
+
+
+def _in_scope(scope: str | None, changed: str | None) -> bool:
+    """Whether a result within `scope` may be affected by a change of `changed`."""
+    if scope is None or changed is None or scope == changed:
+        return True
+    return changed.startswith(scope.rstrip("/") + "/")
+
+
+def _tag_cached(result: Any, age: float) -> Any:
+    # Imported here since tool modules import the session, which owns the cache
+    from app.tool.base import ToolResult
+
+    note = f"[Cached result of an identical call {age:.0f}s ago]"
+    if isinstance(result, ToolResult):
+        return result.replace(output=f"{note}\n{result.output or ''}")
+    return f"{note}\n{result}"
+
+
+def _is_reusable(result: Any) -> bool:
+    from app.tool.base import ToolResult
+
+    if isinstance(result, ToolResult):
+        return result.error is None and bool(result)
+    return bool(result)
+
+
+class ToolResultCache:
+    """Results of cacheable tool calls, keyed by tool name and arguments.
+
+    Attributes:
+        max_entries: Results kept at most; the least recently used go first.
+        hits: Calls answered from the cache.
+        misses: Cacheable calls that had to be executed.
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(name: str, tool_input: dict) -> str:
+        return name + ":" + json.dumps(tool_input, sort_keys=True, default=str)
+
+    async def call(
+        self,
+        tool: "BaseTool",
+        tool_input: dict,
+        execute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Returns the cached result of a call, or executes it.
+
+        Args:
+            tool: Tool being called.
+            tool_input: Arguments of the call.
+            execute: Executes the call; not awaited on a cache hit.
+
+        Returns:
+            The result, tagged as cached if it was reused.
+        """
+        if not tool.is_cacheable(**tool_input):
+            self.invalidate(tool, tool_input)
+            return await execute()
+
+        key = self._key(tool.name, tool_input)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            if now - entry.created <= tool.cache_ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return _tag_cached(entry.result, now - entry.created)
+            del self._entries[key]
+
+        self.misses += 1
+        result = await execute()
+        if _is_reusable(result):
+            self._entries[key] = CacheEntry(
+                tool.name, tool.cache_scope(**tool_input), result, now
+            )
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, tool: "BaseTool", tool_input: dict) -> None:
+        """Drops the results a call that is not cached may change.
+
+        Args:
+            tool: Tool being called.
+            tool_input: Arguments of the call.
+        """
+        if tool.cache_ttl is not None:
+            changed = tool.cache_scope(**tool_input)
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if entry.tool == tool.name and _in_scope(entry.scope, changed)
+            ]
+            for key in stale:
+                del self._entries[key]
+        else:
+            from app.tool.base import ToolConcurrency
+
+            if tool.get_concurrency(**tool_input) == ToolConcurrency.EXCLUSIVE:
+                self._entries.clear()
+
+    def clear(self) -> None:
+        """Drops all cached results."""
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """Gets cache statistics.
+
+        Returns:
+            dict: Cached results, hits and misses.
+        """
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,273 @@
+"""Tracing spans for finding where an agent run spends its time.
+
+Spans nest through a context variable, so a span opened in a step becomes the
+parent of the LLM, tool and sandbox spans opened while it runs, including in
+tasks the step starts. Finished spans are handed to exporters and their
+durations are summarized per span name (p50/p95).
+
+Tracing is off unless enabled in the `[tracing]` config section; a disabled
+tracer hands out a shared no-op context manager.
+"""
+
+import functools
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+from app.config import PROJECT_ROOT, TracingSettings, config
+from app.logger import logger
+
+
+T = TypeVar("T")
+
+
+class Span:
+    """A timed operation, possibly nested in another span.
+
+    Attributes:
+        name: Operation type, e.g. "llm.ask_tool"; spans are summarized by it.
+        trace_id: Identifier shared by all spans of one root span.
+        span_id: Identifier of this span.
+        parent_id: Identifier of the enclosing span, None for a root span.
+        attributes: Details of the operation, e.g. the tool name.
+        start_time: Wall clock time the span started at (seconds since epoch).
+        duration: Seconds the span took; None while it is open.
+        error: Exception raised inside the span, if any.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_time",
+        "duration",
+        "error",
+    )
+
+    def __init__(self, name: str, parent: "Span | None", attributes: dict):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration: float | None = None
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class SpanExporter(ABC):
+    """Receives finished spans"""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        """Handles a finished span; must not block for long."""
+
+    def close(self) -> None:
+        """Releases resources held by the exporter."""
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends finished spans to a JSONL file, one span per line"""
+
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        self.path = path if path.is_absolute() else PROJECT_ROOT / path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class RingBufferExporter(SpanExporter):
+    """Keeps the most recent finished spans in memory"""
+
+    def __init__(self, size: int = 1000):
+        self.spans: deque[Span] = deque(maxlen=size)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    index = max(0, min(len(sorted_values) - 1, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+_current_span: ContextVar[Span | None] = ContextVar("span", default=None)
+
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    """Creates spans and forwards them to exporters.
+
+    Attributes:
+        enabled: Whether spans are recorded at all.
+        exporters: Receivers of finished spans.
+    """
+
+    # Most recent durations kept per span name for the summary
+    MAX_SAMPLES = 10000
+
+    def __init__(
+        self, enabled: bool = False, exporters: list[SpanExporter] | None = None
+    ):
+        self.enabled = enabled
+        self.exporters: list[SpanExporter] = list(exporters or [])
+        self._durations: dict[str, deque[float]] = {}
+        self._counts: dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls, settings: TracingSettings | None) -> "Tracer":
+        """Creates the tracer configured in the `[tracing]` section."""
+        if settings is None or not settings.enabled:
+            return cls()
+        exporters: list[SpanExporter] = [RingBufferExporter(settings.ring_size)]
+        if settings.path:
+            exporters.append(JsonlSpanExporter(settings.path))
+        return cls(enabled=True, exporters=exporters)
+
+    def span(self, name: str, **attributes):
+        """Opens a span, nested in the current one.
+
+        Usage:
+            with TRACER.span("tool.execute", tool=name):
+                ...
+
+        Args:
+            name: Operation type the span is summarized under.
+            **attributes: Details recorded with the span.
+
+        Returns:
+            A context manager yielding the Span, or None if tracing is disabled.
+        """
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name: str, attributes: dict) -> Iterator[Span]:
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        samples = self._durations.get(span.name)
+        if samples is None:
+            samples = self._durations[span.name] = deque(maxlen=self.MAX_SAMPLES)
+        samples.append(span.duration)
+        self._counts[span.name] = self._counts.get(span.name, 0) + 1
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"Span exporter {type(exporter).__name__} failed: {e}")
+
+    def get_stats(self) -> dict:
+        """Gets latency statistics per span name.
+
+        Returns:
+            dict: Count, p50, p95 and max in seconds for each span name.
+        """
+        stats = {}
+        for name, samples in sorted(self._durations.items()):
+            values = sorted(samples)
+            stats[name] = {
+                "count": self._counts[name],
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "max": values[-1],
+            }
+        return stats
+
+    def summary(self) -> str:
+        """Formats the latency statistics as a table."""
+        stats = self.get_stats()
+        if not stats:
+            return "No spans recorded"
+        width = max(len("Span"), *(len(name) for name in stats))
+        lines = [
+            f"{'Span':<{width}}  {'Count':>7}  {'p50 (ms)':>10}  {'p95 (ms)':>10}  {'Max (ms)':>10}"
+        ]
+        for name, s in stats.items():
+            lines.append(
+                f"{name:<{width}}  {s['count']:>7}  {s['p50'] * 1000:>10.1f}  "
+                f"{s['p95'] * 1000:>10.1f}  {s['max'] * 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def log_summary(self) -> None:
+        """Logs the latency summary if tracing is enabled."""
+        if self.enabled:
+            logger.info("Span latency summary:\n" + self.summary())
+
+    def reset(self) -> None:
+        """Clears the latency statistics."""
+        self._durations.clear()
+        self._counts.clear()
+
+    def close(self) -> None:
+        for exporter in self.exporters:
+            exporter.close()
+
+
+TRACER = Tracer.from_settings(config.tracing)
+
+
+def traced(
+    name: str,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorates a coroutine function to run inside a span of the given name."""
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> T:
+            with TRACER.span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,255 @@
+"""Benchmark: framework overhead of the agent loop, without any LLM latency.
+
+Runs of Manus, SWEAgent and PlanningFlow are replayed from cassettes, so
+completions and tool results return instantly and all measured time is the
+framework's own work: prompt formatting, token counting, scheduling, tool
+dispatch and memory handling. Run from the repository root:
+
+    python -m benchmarks.agent_loop --steps 20 --repeat 5
+
+By default scripted scenarios are replayed. To benchmark a real session,
+record it once and replay the cassette:
+
+    python -m benchmarks.agent_loop --record cassettes/manus.json --prompt "..."
+    python -m benchmarks.agent_loop --cassette cassettes/manus.json --prompt "..."
+
+With --max-step-ms the exit code is 1 if any scenario's per-step overhead
+exceeds the budget, so CI can catch regressions in the hot path.
+"""
+
+import argparse
+import asyncio
+import resource
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable
+
+from app.agent.manus import Manus
+from app.agent.swe import SWEAgent
+from app.cassette import Cassette, completion_interaction, tool_interaction
+from app.flow.base import FlowType
+from app.flow.flow_factory import FlowFactory
+from app.llm import LLM
+from app.logger import logger
+from app.tool.base import CLIResult
+
+
+# Runs a scenario's prompt, optionally with a given LLM instead of the default
+Runner = Callable[[str, LLM | None], Awaitable[object]]
+
+
+async def run_manus(prompt: str, llm: LLM | None = None) -> str:
+    agent = Manus(**({"llm": llm} if llm else {}))
+    return await agent.run(prompt)
+
+
+async def run_swe(prompt: str, llm: LLM | None = None) -> str:
+    agent = SWEAgent(**({"llm": llm} if llm else {}))
+    try:
+        return await agent.run(prompt)
+    finally:
+        # Closing stdin ends the shell the agent queried its directory with
+        session = agent.bash._session
+        if session is not None:
+            session._process.stdin.close()
+            await session._process.wait()
+
+
+async def run_planning_flow(prompt: str, llm: LLM | None = None) -> str:
+    agent = Manus(**({"llm": llm} if llm else {}))
+    flow = FlowFactory.create_flow(
+        flow_type=FlowType.PLANNING,
+        agents={"manus": agent},
+        **({"llm": llm} if llm else {}),
+    )
+    return await flow.execute(prompt)
+
+
+RUNNERS: dict[str, Runner] = {
+    "manus": run_manus,
+    "swe": run_swe,
+    "planning_flow": run_planning_flow,
+}
+
+
+def manus_script(steps: int) -> list[dict]:
+    """A Manus run executing Python `steps` times, then terminating."""
+    interactions = []
+    for i in range(steps):
+        arguments = {"code": f"print({i} * {i})"}
+        interactions.append(
+            completion_interaction(
+                f"Computing square {i}.", [("python_execute", arguments)]
+            )
+        )
+        interactions.append(
+            tool_interaction(
+                "python_execute",
+                arguments,
+                {"observation": f"{i * i}\n", "success": True},
+            )
+        )
+    interactions.append(
+        completion_interaction("Done.", [("terminate", {"status": "success"})])
+    )
+    return interactions
+
+
+def swe_script(steps: int) -> list[dict]:
+    """An SWE run alternating shell commands and file views, then terminating."""
+    interactions = []
+    for i in range(steps):
+        if i % 2:
+            name, arguments = "str_replace_editor", {
+                "command": "view",
+                "path": f"/repo/module{i}.py",
+            }
+            lines = "\n".join(f"{n:6}\tvalue_{n} = {n}" for n in range(1, 40))
+            result = CLIResult(output=lines)
+        else:
+            name, arguments = "bash", {"command": f"grep -rn value_{i} /repo"}
+            result = CLIResult(output=f"/repo/module{i}.py:{i}:value_{i} = {i}")
+        interactions.append(
+            completion_interaction(f"Inspecting step {i}.", [(name, arguments)])
+        )
+        interactions.append(tool_interaction(name, arguments, result))
+    interactions.append(
+        completion_interaction("Fixed.", [("terminate", {"status": "success"})])
+    )
+    return interactions
+
+
+def planning_flow_script(steps: int) -> list[dict]:
+    """A planning flow: its first step runs the Manus script, then a summary."""
+    plan = {
+        "command": "create",
+        "title": "Benchmark plan",
+        "steps": ["Compute squares", "Report results"],
+    }
+    return (
+        [completion_interaction("", [("planning", plan)])]
+        + manus_script(steps)
+        + manus_script(0)
+        + [completion_interaction("All squares were computed.")]
+    )
+
+
+SCRIPTS: dict[str, Callable[[int], list[dict]]] = {
+    "manus": manus_script,
+    "swe": swe_script,
+    "planning_flow": planning_flow_script,
+}
+
+
+async def replay(
+    runner: Runner, prompt: str, interactions: list[dict], llm: LLM | None = None
+) -> tuple[float, int]:
+    """Replays a run once.
+
+    Returns:
+        tuple[float, int]: Seconds the run took and completions it consumed.
+    """
+    cassette = Cassette(interactions=interactions)
+    total = sum(1 for i in interactions if i["kind"] == "completion")
+    start = time.perf_counter()
+    async with cassette:
+        await runner(prompt, llm)
+    elapsed = time.perf_counter() - start
+    return elapsed, total - len(cassette._completions)
+
+
+async def benchmark(
+    name: str,
+    runner: Runner,
+    prompt: str,
+    interactions: list[dict],
+    repeat: int,
+    llm: LLM | None = None,
+) -> dict:
+    """Replays a run `repeat` times after one warm-up run.
+
+    Returns:
+        dict: Median steps per second and per-step overhead, and peak RSS.
+    """
+    await replay(runner, prompt, interactions, llm)
+    timings = [await replay(runner, prompt, interactions, llm) for _ in range(repeat)]
+    elapsed = statistics.median(t for t, _ in timings)
+    steps = timings[0][1]
+    return {
+        "scenario": name,
+        "steps": steps,
+        "steps_per_sec": steps / elapsed if elapsed else float("inf"),
+        "step_overhead_ms": elapsed / max(steps, 1) * 1000,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def report(results: list[dict]) -> None:
+    print(
+        f"{'scenario':<14} {'steps':>6} {'steps/s':>10} {'ms/step':>10} {'peak RSS MB':>12}"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:<14} {r['steps']:>6} {r['steps_per_sec']:>10.1f} "
+            f"{r['step_overhead_ms']:>10.2f} {r['peak_rss_mb']:>12.1f}"
+        )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        choices=list(RUNNERS),
+        action="append",
+        help="Scenarios to run (default: all)",
+    )
+    parser.add_argument("--steps", type=int, default=20, help="Steps per script")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--prompt", default="Run the benchmark task.")
+    parser.add_argument("--record", help="Record a live run to this cassette")
+    parser.add_argument("--cassette", help="Replay this recorded cassette")
+    parser.add_argument(
+        "--max-step-ms", type=float, help="Fail if a step's overhead exceeds this"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+    scenarios = args.scenario or list(RUNNERS)
+
+    if args.record:
+        async with Cassette(args.record, mode="record"):
+            await RUNNERS[scenarios[0]](args.prompt, None)
+        return 0
+
+    if args.cassette:
+        # A recorded cassette belongs to a single scenario
+        scenarios = scenarios[:1]
+
+    results = []
+    for name in scenarios:
+        if args.cassette:
+            interactions = Cassette(args.cassette).interactions
+        else:
+            interactions = SCRIPTS[name](args.steps)
+        results.append(
+            await benchmark(name, RUNNERS[name], args.prompt, interactions, args.repeat)
+        )
+    report(results)
+
+    if args.max_step_ms is not None:
+        slow = [r for r in results if r["step_overhead_ms"] > args.max_step_ms]
+        for r in slow:
+            print(
+                f"{r['scenario']}: {r['step_overhead_ms']:.2f} ms/step exceeds "
+                f"{args.max_step_ms} ms"
+            )
+        return 1 if slow else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,206 @@
+"""Load test: many concurrent agent sessions against the mock LLM server.
+
+Starts `app.mock_server` in a thread of its own (or uses --server-url) and
+runs N Manus or SWEAgent sessions concurrently through one shared `LLM`, so
+the scheduler, rate limiter and connection pool are exercised as in a busy
+worker. Reports throughput, queueing delay in the rate limiter and tail
+latency of requests and sessions. Run from the repository root:
+
+    python -m benchmarks.llm_load --sessions 100 --concurrency 50 --latency-ms 800
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+from app.agent.manus import Manus
+from app.agent.swe import SWEAgent
+from app.config import LLMSettings
+from app.llm import LLM
+from app.logger import logger
+from app.mock_server import MockLLMServer
+from app.session import Session
+from app.tracing import TRACER
+
+
+AGENTS = {"manus": Manus, "swe": SWEAgent}
+
+
+def start_server_thread(server: MockLLMServer) -> asyncio.AbstractEventLoop:
+    """Runs the server on an event loop in a daemon thread.
+
+    Returns:
+        asyncio.AbstractEventLoop: Loop of the server, to stop it with.
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="mock-llm-server", daemon=True).start()
+    started.wait()
+    return loop
+
+
+def create_llm(base_url: str, rpm_limit: int | None, tpm_limit: int | None) -> LLM:
+    settings = LLMSettings(
+        model="mock-model",
+        base_url=base_url,
+        api_key="mock",
+        api_type="openai",
+        api_version="",
+        max_tokens=1024,
+        temperature=0.0,
+        rpm_limit=rpm_limit,
+        tpm_limit=tpm_limit,
+    )
+    return LLM(config_name="load-test", llm_config=settings)
+
+
+async def run_session(agent_name: str, llm: LLM, prompt: str) -> float:
+    """Runs one agent session; returns its latency in seconds."""
+    start = time.perf_counter()
+    async with Session():
+        agent = AGENTS[agent_name](llm=llm)
+        try:
+            await agent.run(prompt)
+        finally:
+            bash = getattr(agent, "bash", None)
+            if bash is not None and bash._session is not None:
+                bash._session._process.stdin.close()
+                await bash._session._process.wait()
+    return time.perf_counter() - start
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of sorted values, None if there are none."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_load(
+    agent_name: str, llm: LLM, sessions: int, concurrency: int, prompt: str
+) -> dict:
+    """Runs `sessions` agent sessions with at most `concurrency` at a time.
+
+    Returns:
+        dict: Throughput, queueing delay and latency statistics.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def bounded() -> float | None:
+        nonlocal failures
+        async with semaphore:
+            try:
+                return await run_session(agent_name, llm, prompt)
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Session failed: {type(e).__name__}: {e}")
+                return None
+
+    TRACER.enabled = True
+    TRACER.reset()
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(bounded() for _ in range(sessions)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(t for t in latencies if t is not None)
+
+    spans = TRACER.get_stats()
+    requests = spans.get("llm.request", {}).get("count", 0)
+    return {
+        "sessions": sessions,
+        "failed": failures,
+        "elapsed": elapsed,
+        "sessions_per_sec": len(latencies) / elapsed,
+        "requests_per_sec": requests / elapsed,
+        "queue": spans.get("llm.queue"),
+        "request": spans.get("llm.request"),
+        "session_p50": percentile(latencies, 0.50),
+        "session_p95": percentile(latencies, 0.95),
+        "session_p99": percentile(latencies, 0.99),
+    }
+
+
+def report(results: dict, server: MockLLMServer | None) -> None:
+    print(
+        f"sessions: {results['sessions']} ({results['failed']} failed) "
+        f"in {results['elapsed']:.1f}s"
+    )
+    print(
+        f"throughput: {results['sessions_per_sec']:.2f} sessions/s, "
+        f"{results['requests_per_sec']:.2f} requests/s"
+    )
+    for name in ("queue", "request"):
+        stats = results[name]
+        if stats:
+            print(
+                f"llm.{name}: p50 {stats['p50'] * 1000:.1f} ms  "
+                f"p95 {stats['p95'] * 1000:.1f} ms  max {stats['max'] * 1000:.1f} ms"
+            )
+    if results["session_p50"] is not None:
+        print(
+            f"session latency: p50 {results['session_p50']:.2f}s  "
+            f"p95 {results['session_p95']:.2f}s  p99 {results['session_p99']:.2f}s"
+        )
+    if server is not None:
+        print(f"server: {server.get_stats()}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agent", choices=list(AGENTS), default="manus")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--prompt", default="Run the load test task.")
+    parser.add_argument("--server-url", help="Use a running server instead")
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--rpm-limit", type=int)
+    parser.add_argument("--tpm-limit", type=int)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    server = None
+    if args.server_url:
+        base_url = args.server_url
+    else:
+        server = MockLLMServer(
+            latency_ms=args.latency_ms,
+            latency_sigma=args.latency_sigma,
+            tokens_per_second=args.tokens_per_second,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            turns=args.turns,
+        )
+        server_loop = start_server_thread(server)
+        base_url = server.url
+
+    llm = create_llm(base_url, args.rpm_limit, args.tpm_limit)
+    try:
+        results = await run_load(
+            args.agent, llm, args.sessions, args.concurrency, args.prompt
+        )
+        report(results, server)
+    finally:
+        if server is not None:
+            server_loop.call_soon_threadsafe(server_loop.stop)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
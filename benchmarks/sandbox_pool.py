@@ -0,0 +1,69 @@
+"""Benchmark: time to first command with and without the warm sandbox pool.
+
+Requires a running Docker daemon. Run from the repository root:
+
+    python -m benchmarks.sandbox_pool --sessions 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config import SandboxSettings
+from app.sandbox.core.manager import SandboxManager
+
+
+async def time_to_first_command(manager: SandboxManager, config) -> float:
+    """Seconds from requesting a sandbox until its first command returned."""
+    start = time.perf_counter()
+    sandbox_id = await manager.create_sandbox(config)
+    sandbox = await manager.get_sandbox(sandbox_id)
+    await sandbox.run_command("echo ready")
+    elapsed = time.perf_counter() - start
+    await manager.delete_sandbox(sandbox_id)
+    return elapsed
+
+
+async def run(config: SandboxSettings, sessions: int) -> list[float]:
+    async with SandboxManager() as manager:
+        if config.pool_max_size:
+            await manager.warm_up(config)
+            # Let the pool fill before measuring
+            while manager.get_stats()["pools"][0]["idle"] < config.pool_min_size:
+                await asyncio.sleep(0.1)
+
+        timings = []
+        for _ in range(sessions):
+            timings.append(await time_to_first_command(manager, config))
+            if config.pool_max_size:
+                # Sessions arrive slower than resets in steady state
+                await asyncio.sleep(1.0)
+        return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{name:>6}: mean {statistics.mean(timings) * 1000:8.1f} ms  "
+        f"p50 {statistics.median(timings) * 1000:8.1f} ms  "
+        f"p95 {p95 * 1000:8.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--image", default="python:3.12-slim")
+    args = parser.parse_args()
+
+    cold = SandboxSettings(image=args.image)
+    pooled = SandboxSettings(image=args.image, pool_min_size=2, pool_max_size=4)
+
+    report("cold", await run(cold, args.sessions))
+    report("pooled", await run(pooled, args.sessions))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,6 +2,7 @@ import asyncio
 
 from app.agent.manus import Manus
 from app.logger import logger
+from app.tracing import TRACER
 
 
 async def main():
@@ -15,6 +16,7 @@ async def main():
         logger.warning("Processing your request...")
         await agent.run(prompt)
         logger.info("Request processing completed.")
+        TRACER.log_summary()
     except KeyboardInterrupt:
         logger.warning("Operation interrupted.")
 
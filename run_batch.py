@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import time
+
+from app.agent.manus import Manus
+from app.batch import BatchRunner, load_tasks
+from app.flow.base import FlowType
+from app.flow.flow_factory import FlowFactory
+from app.logger import logger
+from app.tracing import TRACER
+
+
+async def run_manus(prompt: str) -> str:
+    return await Manus().run(prompt)
+
+
+async def run_planning_flow(prompt: str) -> str:
+    agent = Manus()
+    try:
+        flow = FlowFactory.create_flow(
+            flow_type=FlowType.PLANNING,
+            agents={"manus": agent},
+        )
+        return await flow.execute(prompt)
+    finally:
+        await agent.cleanup()
+
+
+async def run_batch():
+    parser = argparse.ArgumentParser(
+        description="Run the prompts of a JSONL file concurrently"
+    )
+    parser.add_argument("input", help="JSONL file with one prompt per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--timeout", type=float, default=3600, help="Seconds allowed per task"
+    )
+    parser.add_argument(
+        "--flow", action="store_true", help="Run each prompt with the planning flow"
+    )
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="Run failed tasks again"
+    )
+    args = parser.parse_args()
+
+    runner = BatchRunner(
+        run_planning_flow if args.flow else run_manus,
+        args.output,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+    )
+
+    start_time = time.time()
+    try:
+        stats = await runner.run(load_tasks(args.input), args.retry_failed)
+    except KeyboardInterrupt:
+        logger.warning("Batch interrupted; run again to resume.")
+        return
+    elapsed_time = time.time() - start_time
+    logger.info(f"Batch processed in {elapsed_time:.2f} seconds: {stats}")
+    TRACER.log_summary()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_batch())
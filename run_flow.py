@@ -5,6 +5,7 @@ from app.agent.manus import Manus
 from app.flow.base import FlowType
 from app.flow.flow_factory import FlowFactory
 from app.logger import logger
+from app.tracing import TRACER
 
 
 async def run_flow():
@@ -34,6 +35,7 @@ async def run_flow():
             elapsed_time = time.time() - start_time
             logger.info(f"Request processed in {elapsed_time:.2f} seconds")
             logger.info(result)
+            TRACER.log_summary()
         except asyncio.TimeoutError:
             logger.error("Request processing timed out after 1 hour")
             logger.info(
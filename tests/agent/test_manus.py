@@ -0,0 +1,67 @@
+"""Tests for the Manus agent."""
+
+import pytest
+
+from app.agent.manus import Manus
+from app.schema import Function, Message, ToolCall
+
+
+def tool_names(agent: Manus) -> list[str]:
+    _, tools = agent._get_prompt_prefix()
+    return [t["function"]["name"] for t in tools]
+
+
+def answer(agent: Manus) -> None:
+    agent.memory.add_message(Message.assistant_message("Working on it."))
+
+
+def test_browser_offered_for_web_requests(llm):
+    """Tests that the browser stays available unless the task is clearly local."""
+    agent = Manus(llm=llm)
+    agent.memory.add_message(Message.user_message("What is today's EUR/USD rate?"))
+
+    assert "browser_use" in tool_names(agent)
+    answer(agent)
+    assert "browser_use" in tool_names(agent)
+
+
+def test_browser_hidden_for_local_work(llm):
+    """Tests that the browser schema is dropped once a task is local work."""
+    agent = Manus(llm=llm)
+    agent.memory.add_message(Message.user_message("Compute the 10th prime."))
+
+    assert "browser_use" in tool_names(agent)
+    answer(agent)
+    assert "browser_use" not in tool_names(agent)
+    assert "python_execute" in tool_names(agent)
+
+    agent.memory.add_message(Message.user_message("Now search the web for it."))
+    answer(agent)
+    assert "browser_use" in tool_names(agent)
+
+    for i in range(3):
+        agent.memory.add_message(Message.user_message(str(i)))
+    assert "browser_use" in tool_names(agent)
+
+
+def test_browser_exposed_by_tool_call(llm):
+    """Tests that a call to the hidden browser exposes it."""
+    agent = Manus(llm=llm)
+    agent.memory.add_message(Message.user_message("Compute the 10th prime."))
+    answer(agent)
+    assert "browser_use" not in tool_names(agent)
+
+    agent.memory.add_message(
+        Message(
+            role="assistant",
+            tool_calls=[
+                ToolCall(id="c1", function=Function(name="browser_use", arguments="{}"))
+            ],
+        )
+    )
+
+    assert "browser_use" in tool_names(agent)
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,299 @@
+"""Tests for ToolCallAgent tool execution."""
+
+import asyncio
+import json
+
+import pytest
+from openai.types.completion_usage import PromptTokensDetails
+
+from app.agent.toolcall import ToolCallAgent
+from app.image_store import IMAGE_STORE
+from app.schema import Message
+from app.tool import Terminate, ToolCollection
+from app.tool.base import BaseTool, ToolConcurrency, ToolResult
+
+
+class RecordingTool(BaseTool):
+    """Tool that records the order of its invocations."""
+
+    name: str = "record"
+    description: str = "Records its input."
+    parameters: dict = {
+        "type": "object",
+        "properties": {"value": {"type": "string"}},
+    }
+    log: list = []
+
+    async def execute(self, value: str) -> str:
+        self.log.append(value)
+        return f"recorded {value}"
+
+
+def tool_call(call_id: str, value: str) -> dict:
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": "record", "arguments": f'{{"value": "{value}"}}'},
+    }
+
+
+@pytest.fixture
+def tool() -> RecordingTool:
+    """Creates a recording tool with a fresh log."""
+    return RecordingTool(log=[])
+
+
+@pytest.mark.asyncio
+async def test_early_dispatch_preserves_order(llm, chunks, tool: RecordingTool):
+    """Tests that tools dispatched while streaming produce ordered tool messages."""
+    agent = ToolCallAgent(
+        llm=llm,
+        available_tools=ToolCollection(tool, Terminate()),
+        early_tool_dispatch=True,
+    )
+    llm.client.chat.completions.responses = [
+        chunks("", [tool_call("c1", "first"), tool_call("c2", "second")])
+    ]
+    agent.memory.add_message(Message.user_message("record two values"))
+
+    result = await agent.step()
+
+    assert tool.log == ["first", "second"]
+    tool_messages = [m for m in agent.memory.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in tool_messages] == ["c1", "c2"]
+    assert "recorded first" in result and "recorded second" in result
+
+
+@pytest.mark.asyncio
+async def test_early_dispatch_falls_back_when_stream_fails(
+    llm, completion, tool: RecordingTool
+):
+    """Tests that a failed stream is retried through the non-streaming path."""
+    agent = ToolCallAgent(
+        llm=llm,
+        available_tools=ToolCollection(tool, Terminate()),
+        early_tool_dispatch=True,
+    )
+    llm.client.chat.completions.responses = [
+        RuntimeError("stream broke"),
+        completion(content="", tool_calls=[tool_call("c1", "only")]),
+    ]
+    agent.memory.add_message(Message.user_message("record a value"))
+
+    await agent.step()
+
+    assert tool.log == ["only"]
+
+
+@pytest.mark.asyncio
+async def test_stable_prompt_prefix(llm, completion, tool: RecordingTool):
+    """Tests that consecutive requests share a byte-identical prefix."""
+    agent = ToolCallAgent(
+        llm=llm,
+        available_tools=ToolCollection(tool, Terminate()),
+        stable_prompt_prefix=True,
+    )
+    llm.client.chat.completions.responses = [
+        completion(content="", tool_calls=[tool_call("c1", "one")]),
+        completion(content="", tool_calls=[tool_call("c2", "two")]),
+    ]
+    agent.memory.add_message(Message.user_message("record values"))
+
+    await agent.step()
+    await agent.step()
+
+    first, second = llm.client.chat.completions.calls
+    assert json.dumps(first["tools"]) == json.dumps(second["tools"])
+    assert list(first["tools"][0]) == sorted(first["tools"][0])
+    prefix = first["messages"]
+    assert second["messages"][: len(prefix)] == prefix
+
+
+def test_stable_prompt_prefix_trims_memory_in_batches(llm):
+    """Tests that memory is trimmed in batches rather than one message per step."""
+    agent = ToolCallAgent(llm=llm, stable_prompt_prefix=True)
+    agent.memory.max_messages = 10
+    agent._get_prompt_prefix()
+
+    for i in range(11):
+        agent.memory.add_message(Message.user_message(str(i)))
+    assert len(agent.memory.messages) == 5
+
+    agent.memory.add_message(Message.user_message("next"))
+    assert agent.memory.messages[0].content == "6"
+
+
+@pytest.mark.asyncio
+async def test_cached_prompt_tokens_are_reported(llm, completion):
+    """Tests that cached prompt tokens from usage are accumulated."""
+    response = completion(content="answer", prompt_tokens=100)
+    response.usage.prompt_tokens_details = PromptTokensDetails(cached_tokens=80)
+    llm.client.chat.completions.responses = [response]
+
+    await llm.ask([Message.user_message("question")], stream=False)
+
+    assert llm.total_cached_prompt_tokens == 80
+    assert llm.prompt_cache_hit_rate == pytest.approx(0.8)
+
+
+class SlowTool(BaseTool):
+    """Tool that sleeps and records how many of its calls overlap."""
+
+    name: str = "slow"
+    description: str = "Sleeps, then returns its input with a screenshot."
+    parameters: dict = {
+        "type": "object",
+        "properties": {"value": {"type": "string"}},
+    }
+    log: list = []
+    active: int = 0
+    max_active: int = 0
+
+    async def execute(self, value: str) -> ToolResult:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.log.append(f"start {value}")
+        await asyncio.sleep(0.05 if value == "first" else 0.01)
+        self.log.append(f"end {value}")
+        self.active -= 1
+        return ToolResult(output=f"slept {value}", base64_image=f"image-{value}")
+
+
+def slow_call(call_id: str, value: str) -> dict:
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": "slow", "arguments": f'{{"value": "{value}"}}'},
+    }
+
+
+async def run_slow_calls(llm, completion, tool: SlowTool, count: int):
+    """Runs one step in which the model calls the slow tool `count` times."""
+    agent = ToolCallAgent(llm=llm, available_tools=ToolCollection(tool, Terminate()))
+    values = ["first"] + [f"v{i}" for i in range(1, count)]
+    llm.client.chat.completions.responses = [
+        completion(
+            content="",
+            tool_calls=[slow_call(f"c{i}", value) for i, value in enumerate(values)],
+        )
+    ]
+    agent.memory.add_message(Message.user_message("sleep a few times"))
+    await agent.step()
+    return agent, values
+
+
+@pytest.mark.asyncio
+async def test_read_only_calls_run_concurrently(llm, completion):
+    """Tests that read-only calls overlap, bounded by max_parallel_tool_calls."""
+    tool = SlowTool(concurrency=ToolConcurrency.READ_ONLY)
+
+    agent, values = await run_slow_calls(llm, completion, tool, count=6)
+
+    assert tool.max_active == agent.max_parallel_tool_calls
+    # Results are appended in the requested order although "first" ends last
+    tool_messages = [m for m in agent.memory.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in tool_messages] == [f"c{i}" for i in range(6)]
+    assert [m.content.split("\n")[-1] for m in tool_messages] == [
+        f"slept {value}" for value in values
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "concurrency", [ToolConcurrency.STATEFUL, ToolConcurrency.EXCLUSIVE]
+)
+async def test_dependent_calls_keep_their_order(llm, completion, concurrency):
+    """Tests that calls to stateful and exclusive tools never overlap."""
+    tool = SlowTool(concurrency=concurrency)
+
+    await run_slow_calls(llm, completion, tool, count=3)
+
+    assert tool.max_active == 1
+    assert tool.log == [
+        "start first",
+        "end first",
+        "start v1",
+        "end v1",
+        "start v2",
+        "end v2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_keep_their_images(llm, completion):
+    """Tests that each tool message gets the screenshot of its own call."""
+    tool = SlowTool(concurrency=ToolConcurrency.READ_ONLY)
+
+    agent, values = await run_slow_calls(llm, completion, tool, count=3)
+
+    images = [
+        IMAGE_STORE.get(m.image_ref) for m in agent.memory.messages if m.role == "tool"
+    ]
+    assert images == [f"image-{value}" for value in values]
+
+
+class SelectiveAgent(ToolCallAgent):
+    """Agent exposing only the recording tool."""
+
+    tool_selection: bool = True
+
+    def select_tools(self) -> set[str] | None:
+        return {"record"}
+
+
+@pytest.mark.asyncio
+async def test_tool_selection_limits_schemas(llm, completion, tool: RecordingTool):
+    """Tests that only the selected tools are sent, while others still execute."""
+    agent = SelectiveAgent(llm=llm, available_tools=ToolCollection(tool, Terminate()))
+    terminate = {
+        "id": "c1",
+        "type": "function",
+        "function": {"name": "terminate", "arguments": '{"status": "success"}'},
+    }
+    llm.client.chat.completions.responses = [
+        completion(content="", tool_calls=[terminate])
+    ]
+    agent.memory.add_message(Message.user_message("finish"))
+
+    await agent.step()
+
+    (request,) = llm.client.chat.completions.calls
+    assert [t["function"]["name"] for t in request["tools"]] == ["record"]
+    assert agent.memory.messages[-1].name == "terminate"
+
+
+class CleanupTool(RecordingTool):
+    """Recording tool that counts how often it was cleaned up."""
+
+    cleanups: int = 0
+
+    async def cleanup(self) -> None:
+        self.cleanups += 1
+
+
+@pytest.mark.asyncio
+async def test_run_cleans_up_tools(llm, completion):
+    """Tests that a run releases its tools' resources, also when it fails."""
+    tool = CleanupTool(log=[])
+    agent = ToolCallAgent(llm=llm, available_tools=ToolCollection(tool, Terminate()))
+    terminate = {
+        "id": "c1",
+        "type": "function",
+        "function": {"name": "terminate", "arguments": '{"status": "success"}'},
+    }
+    llm.client.chat.completions.responses = [
+        completion(content="", tool_calls=[terminate])
+    ]
+
+    await agent.run("finish")
+    assert tool.cleanups == 1
+
+    agent.state = agent.state.IDLE
+    llm.client.chat.completions.responses = [ValueError("bad request")]
+    with pytest.raises(ValueError):
+        await agent.run("finish")
+    assert tool.cleanups == 2
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
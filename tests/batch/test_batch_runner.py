@@ -0,0 +1,126 @@
+"""Tests for the JSONL batch runner."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from app.batch import BatchRunner, load_tasks
+from app.llm import LLM
+
+
+def write_prompts(path: Path, count: int) -> Path:
+    """Writes a prompt file with `count` tasks."""
+    lines = [json.dumps({"id": f"t{i}", "prompt": f"task {i}"}) for i in range(count)]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def read_results(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(tmp_path: Path):
+    """Tests that at most `concurrency` tasks run and all results are written."""
+    active = 0
+    max_active = 0
+
+    async def run_task(prompt: str) -> str:
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return prompt.upper()
+
+    output = tmp_path / "out.jsonl"
+    runner = BatchRunner(run_task, output, concurrency=3)
+    stats = await runner.run(load_tasks(write_prompts(tmp_path / "in.jsonl", 10)))
+
+    assert max_active == 3
+    assert stats == {"succeeded": 10, "failed": 0, "skipped": 0}
+    results = {r["id"]: r for r in read_results(output)}
+    assert results["t4"]["result"] == "TASK 4"
+    assert results["t4"]["elapsed"] >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_failures_and_timeouts_are_recorded(tmp_path: Path):
+    """Tests that failing and slow tasks are recorded without stopping the batch."""
+
+    async def run_task(prompt: str) -> str:
+        if prompt == "task 0":
+            raise RuntimeError("boom")
+        if prompt == "task 1":
+            await asyncio.sleep(10)
+        return "ok"
+
+    output = tmp_path / "out.jsonl"
+    runner = BatchRunner(run_task, output, timeout=0.1)
+    await runner.run(load_tasks(write_prompts(tmp_path / "in.jsonl", 3)))
+
+    statuses = {r["id"]: (r["status"], r["error"]) for r in read_results(output)}
+    assert statuses["t0"] == ("error", "RuntimeError: boom")
+    assert statuses["t1"][0] == "timeout"
+    assert statuses["t2"] == ("success", None)
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_finished_tasks(tmp_path: Path):
+    """Tests that a second run only executes tasks missing from the output."""
+    prompts = write_prompts(tmp_path / "in.jsonl", 5)
+    output = tmp_path / "out.jsonl"
+    ran = []
+
+    async def run_task(prompt: str) -> str:
+        ran.append(prompt)
+        if prompt == "task 3" and len(ran) <= 5:
+            raise RuntimeError("flaky")
+        return "ok"
+
+    await BatchRunner(run_task, output).run(load_tasks(prompts))
+    # Simulate a crash that cut the last line short and lost one result, and
+    # a line without an id, e.g. one edited by hand
+    lines = output.read_text().splitlines()
+    output.write_text(
+        "\n".join(lines[:-1]) + '\n{"status": "success"}\n' + lines[-1][:10]
+    )
+    lost = json.loads(lines[-1])["id"]
+    ran.clear()
+
+    runner = BatchRunner(run_task, output)
+    stats = await runner.run(load_tasks(prompts))
+    assert ran == [f"task {lost[1:]}"]
+    assert stats["skipped"] == 4
+
+    ran.clear()
+    await BatchRunner(run_task, output).run(load_tasks(prompts), retry_failed=True)
+    assert ran == ["task 3"]
+
+
+@pytest.mark.asyncio
+async def test_usage_is_counted_per_task(tmp_path: Path, llm: LLM):
+    """Tests that concurrent tasks sharing an LLM get their own token usage."""
+
+    async def run_task(prompt: str) -> str:
+        tokens = int(prompt.split()[1]) + 1
+        for _ in range(tokens):
+            await asyncio.sleep(0)
+            llm.update_token_count(10, 1)
+        return "ok"
+
+    output = tmp_path / "out.jsonl"
+    await BatchRunner(run_task, output, concurrency=3).run(
+        load_tasks(write_prompts(tmp_path / "in.jsonl", 3))
+    )
+
+    usage = {r["id"]: r["usage"] for r in read_results(output)}
+    assert usage["t2"]["requests"] == 3
+    assert usage["t2"]["input_tokens"] == 30
+    assert usage["t0"]["completion_tokens"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
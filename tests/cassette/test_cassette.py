@@ -0,0 +1,105 @@
+"""Tests for recording and replaying LLM completions and tool calls."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.cassette import Cassette, CassetteError, completion_interaction
+from app.llm import LLM
+from app.schema import Message
+from app.tool import Terminate, ToolCollection
+from app.tool.base import BaseTool, ToolResult
+from benchmarks.agent_loop import RUNNERS, SCRIPTS, replay
+
+
+class CountingTool(BaseTool):
+    """Tool that counts its executions."""
+
+    name: str = "count"
+    description: str = "Counts its calls."
+    parameters: dict = {"type": "object", "properties": {"n": {"type": "integer"}}}
+    calls: int = 0
+
+    async def execute(self, n: int) -> ToolResult:
+        self.calls += 1
+        return ToolResult(output=f"counted {n}")
+
+
+def tool_call(call_id: str, name: str, arguments: dict) -> dict:
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+class OfflineClient:
+    """Client that fails the test if a replayed run reaches the network."""
+
+    @property
+    def chat(self):
+        raise AssertionError("Replay must not send requests")
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_agent_run(llm: LLM, completion, tmp_path: Path):
+    """Tests that a recorded run replays identically without network or tools."""
+    llm.client.chat.completions.responses = [
+        completion(content="", tool_calls=[tool_call("c1", "count", {"n": 1})]),
+        completion(
+            content="", tool_calls=[tool_call("c2", "terminate", {"status": "ok"})]
+        ),
+    ]
+    path = tmp_path / "run.json"
+
+    tool = CountingTool()
+    async with Cassette(path, mode="record"):
+        agent = ToolCallAgent(
+            llm=llm, available_tools=ToolCollection(tool, Terminate())
+        )
+        recorded = await agent.run("count once")
+    assert tool.calls == 1
+    assert len(json.loads(path.read_text())["interactions"]) == 4
+
+    llm.client = OfflineClient()
+    tool = CountingTool()
+    async with Cassette(path):
+        agent = ToolCallAgent(
+            llm=llm, available_tools=ToolCollection(tool, Terminate())
+        )
+        replayed = await agent.run("count once")
+    assert tool.calls == 0
+    assert replayed == recorded
+    assert "counted 1" in replayed
+
+
+@pytest.mark.asyncio
+async def test_recorded_completion_replays_as_stream(llm: LLM):
+    """Tests that a streaming request is served from a recorded completion."""
+    llm.client = OfflineClient()
+    cassette = Cassette(interactions=[completion_interaction("streamed answer")])
+
+    async with cassette:
+        answer = await llm.ask([Message.user_message("hi")], stream=True)
+        assert answer == "streamed answer"
+        with pytest.raises(CassetteError):
+            await llm.ask([Message.user_message("again")], stream=False)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("scenario", list(RUNNERS))
+async def test_benchmark_scenarios_replay(llm: LLM, scenario: str):
+    """Tests that every benchmark scenario replays to its end."""
+    llm.client = OfflineClient()
+    interactions = SCRIPTS[scenario](3)
+    completions = sum(1 for i in interactions if i["kind"] == "completion")
+
+    _, steps = await replay(RUNNERS[scenario], "benchmark", interactions, llm)
+
+    assert steps == completions
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,164 @@
+"""Shared fixtures for tests that need an LLM without network access."""
+
+import asyncio
+import uuid
+
+import pytest
+from openai.types.chat.chat_completion import ChatCompletion
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+
+from app.config import LLMSettings
+from app.llm import LLM
+
+
+def make_completion(
+    content: str | None = "ok",
+    tool_calls: list[dict] | None = None,
+    prompt_tokens: int = 10,
+    completion_tokens: int = 5,
+) -> ChatCompletion:
+    """Builds a chat completion response object."""
+    message: dict = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+    )
+
+
+def make_chunks(
+    content: str = "", tool_calls: list[dict] | None = None, pieces: int = 3
+) -> list[ChatCompletionChunk]:
+    """Splits a response into streamed chunks, tool-call arguments included."""
+
+    def chunk(delta: dict) -> ChatCompletionChunk:
+        return ChatCompletionChunk.model_validate(
+            {
+                "id": "chatcmpl-test",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": "gpt-4o",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+        )
+
+    chunks = [chunk({"role": "assistant", "content": content or None})]
+    for index, call in enumerate(tool_calls or []):
+        arguments = call["function"]["arguments"]
+        size = max(1, len(arguments) // pieces + 1)
+        parts = [arguments[i : i + size] for i in range(0, len(arguments), size)]
+        for n, part in enumerate(parts or [""]):
+            delta: dict = {"index": index, "function": {"arguments": part}}
+            if n == 0:
+                delta["id"] = call["id"]
+                delta["type"] = "function"
+                delta["function"]["name"] = call["function"]["name"]
+            chunks.append(chunk({"tool_calls": [delta]}))
+    return chunks
+
+
+class FakeStream:
+    """Async iterator over streamed chunks."""
+
+    def __init__(self, chunks: list[ChatCompletionChunk]):
+        self._chunks = list(chunks)
+
+    def __aiter__(self):
+        return self
+
+    @property
+    def remaining(self) -> int:
+        return len(self._chunks)
+
+    async def __anext__(self) -> ChatCompletionChunk:
+        # Yield to the event loop like a real network stream would
+        await asyncio.sleep(0)
+        if not self._chunks:
+            raise StopAsyncIteration
+        return self._chunks.pop(0)
+
+
+class WhitespaceTokenizer:
+    """Offline tokenizer so tests do not need to download tiktoken encodings."""
+
+    def encode(self, text: str) -> list[str]:
+        return text.split()
+
+
+class FakeCompletions:
+    """Stands in for `client.chat.completions`, returning scripted responses."""
+
+    def __init__(self):
+        self.calls: list[dict] = []
+        self.responses: list = []
+        self.streams: list[FakeStream] = []
+
+    async def create(self, **params):
+        self.calls.append(params)
+        response = self.responses.pop(0) if self.responses else make_completion()
+        if isinstance(response, Exception):
+            raise response
+        if isinstance(response, list):
+            self.streams.append(FakeStream(response))
+            return self.streams[-1]
+        return response
+
+
+class FakeClient:
+    """Minimal async OpenAI client replacement."""
+
+    def __init__(self):
+        self.completions = FakeCompletions()
+        self.chat = self
+
+
+@pytest.fixture
+def completion():
+    """Provides a factory for chat completion responses."""
+    return make_completion
+
+
+@pytest.fixture
+def chunks():
+    """Provides a factory for streamed chat completion chunks."""
+    return make_chunks
+
+
+@pytest.fixture
+def fake_client():
+    """Provides a factory for fake async OpenAI clients."""
+    return FakeClient
+
+
+@pytest.fixture
+def llm(monkeypatch) -> LLM:
+    """Creates an isolated LLM instance backed by a fake client."""
+    monkeypatch.setattr(
+        "app.llm.tiktoken.encoding_for_model", lambda model: WhitespaceTokenizer()
+    )
+    settings = LLMSettings(
+        model="gpt-4o",
+        base_url="http://localhost:1/v1",
+        api_key="test",
+        api_type="openai",
+        api_version="",
+        temperature=0.0,
+    )
+    config_name = f"test-{uuid.uuid4().hex}"
+    instance = LLM(config_name=config_name, llm_config=settings)
+    instance.client = FakeClient()
+    try:
+        yield instance
+    finally:
+        LLM._instances.pop(config_name, None)
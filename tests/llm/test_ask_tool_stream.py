@@ -0,0 +1,76 @@
+"""Tests for streaming tool calls with early dispatch."""
+
+import pytest
+
+from app.schema import Message
+
+
+def tool_call(call_id: str, name: str, arguments: str) -> dict:
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": name, "arguments": arguments},
+    }
+
+
+@pytest.mark.asyncio
+async def test_stream_assembles_tool_calls(llm, chunks):
+    """Tests that streamed deltas are assembled into complete tool calls."""
+    calls = [
+        tool_call("call_1", "web_search", '{"query": "openmanus"}'),
+        tool_call("call_2", "terminate", '{"status": "success"}'),
+    ]
+    llm.client.chat.completions.responses = [chunks("Searching", calls)]
+
+    response = await llm.ask_tool_stream(
+        messages=[Message.user_message("search")], tools=[]
+    )
+
+    assert response.content == "Searching"
+    assert [c.id for c in response.tool_calls] == ["call_1", "call_2"]
+    assert response.tool_calls[0].function.arguments == '{"query": "openmanus"}'
+    assert llm.client.chat.completions.calls[0]["stream"] is True
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_dispatched_before_stream_ends(llm, chunks):
+    """Tests that each tool call is delivered as soon as its arguments are complete."""
+    calls = [
+        tool_call("call_1", "web_search", '{"query": "a"}'),
+        tool_call("call_2", "web_search", '{"query": "b"}'),
+    ]
+    llm.client.chat.completions.responses = [chunks("", calls)]
+    dispatched = []
+
+    async def on_tool_call(call):
+        stream = llm.client.chat.completions.streams[-1]
+        dispatched.append((call.id, stream.remaining))
+
+    await llm.ask_tool_stream(
+        messages=[Message.user_message("search")], tools=[], on_tool_call=on_tool_call
+    )
+
+    assert [call_id for call_id, _ in dispatched] == ["call_1", "call_2"]
+    # The first call was handed over while the second was still streaming
+    assert dispatched[0][1] > 0
+
+
+@pytest.mark.asyncio
+async def test_stream_completes_calls_without_arguments(llm, chunks):
+    """Tests that calls with empty arguments are completed at the end of the stream."""
+    llm.client.chat.completions.responses = [
+        chunks("", [tool_call("call_1", "view", "")])
+    ]
+    dispatched = []
+
+    await llm.ask_tool_stream(
+        messages=[Message.user_message("look")],
+        tools=[],
+        on_tool_call=dispatched.append,
+    )
+
+    assert [call.id for call in dispatched] == ["call_1"]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
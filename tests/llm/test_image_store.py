@@ -0,0 +1,100 @@
+"""Tests for the out-of-line image store and image inlining limits."""
+
+import base64
+from pathlib import Path
+
+import pytest
+
+from app.image_store import ImageStore
+from app.llm import IMAGE_PLACEHOLDER, LLM
+from app.schema import Memory, Message
+
+
+def image(n: int) -> str:
+    """Builds a distinct base64 payload."""
+    return base64.b64encode(f"image-{n}".encode() * 100).decode()
+
+
+def test_put_and_get(tmp_path: Path):
+    """Tests that images round-trip through the store and are deduplicated."""
+    store = ImageStore(tmp_path)
+    ref = store.put(image(1))
+
+    assert store.put(image(1)) == ref
+    store.flush()
+    assert len(list(tmp_path.glob("*.b64"))) == 1
+    assert store.get(ref) == image(1)
+    assert store.get("missing") is None
+
+
+def test_get_after_cache_eviction(tmp_path: Path):
+    """Tests that images evicted from the in-memory cache are read from disk."""
+    store = ImageStore(tmp_path)
+    refs = [store.put(image(n)) for n in range(ImageStore.MAX_CACHED_IMAGES + 2)]
+
+    assert refs[0] not in store._cache
+    assert store.get(refs[0]) == image(0)
+
+
+def test_memory_keeps_references():
+    """Tests that messages added to memory hold a reference instead of the image."""
+    memory = Memory()
+    memory.add_message(Message.user_message("screenshot", base64_image=image(1)))
+
+    message = memory.messages[0]
+    assert message.base64_image is None
+    assert message.image_ref is not None
+    assert message.has_image
+
+
+def test_only_recent_images_are_inlined():
+    """Tests that older images are replaced by placeholders when formatting."""
+    memory = Memory()
+    for n in range(5):
+        memory.add_message(Message.user_message(f"step {n}", base64_image=image(n)))
+
+    formatted = LLM.format_messages(memory.messages, supports_images=True, max_images=2)
+
+    inlined = [m for m in formatted if isinstance(m["content"], list)]
+    assert len(inlined) == 2
+    assert inlined[-1]["content"][-1]["image_url"]["url"].endswith(image(4))
+    assert formatted[0]["content"] == f"step 0\n{IMAGE_PLACEHOLDER}"
+    assert all("image_ref" not in m for m in formatted)
+
+
+def test_images_dropped_for_text_models():
+    """Tests that references are removed for models without image support."""
+    memory = Memory()
+    memory.add_message(Message.user_message("screenshot", base64_image=image(1)))
+
+    formatted = LLM.format_messages(memory.messages, supports_images=False)
+    assert formatted == [{"role": "user", "content": "screenshot"}]
+
+
+def test_least_recently_used_images_are_deleted(tmp_path: Path):
+    """Tests that the store deletes old images beyond its size limit."""
+    store = ImageStore(tmp_path, max_bytes=len(image(0)) * 5 // 2)
+    first = store.put(image(0))
+    second = store.put(image(1))
+    store.flush()
+    store.get(first)
+    third = store.put(image(2))
+    store.flush()
+
+    assert {path.stem for path in tmp_path.glob("*.b64")} == {first, third}
+    assert store.get(second) is None
+
+
+def test_deleted_image_becomes_placeholder():
+    """Tests that an image no longer in the store is sent as a placeholder."""
+    message = Message.user_message("old screenshot")
+    message.image_ref = "deleted"
+
+    formatted = LLM.format_messages([message], supports_images=True)
+    assert formatted == [
+        {"role": "user", "content": f"old screenshot\n{IMAGE_PLACEHOLDER}"}
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,112 @@
+"""Tests for the persistent LLM response cache."""
+
+from pathlib import Path
+
+import pytest
+
+from app.llm_cache import ResponseCache
+from app.schema import Message
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ResponseCache:
+    """Creates a response cache in a temporary directory."""
+    cache = ResponseCache(tmp_path / "responses.db", max_size_mb=1, ttl=3600)
+    try:
+        yield cache
+    finally:
+        cache.close()
+
+
+def test_key_is_canonical():
+    """Tests that keys do not depend on dict ordering."""
+    a = ResponseCache.make_key(model="m", messages=[{"role": "user", "content": "hi"}])
+    b = ResponseCache.make_key(messages=[{"content": "hi", "role": "user"}], model="m")
+    c = ResponseCache.make_key(model="m", messages=[{"role": "user", "content": "yo"}])
+    assert a == b
+    assert a != c
+
+
+def test_get_and_set(cache: ResponseCache):
+    """Tests storing and retrieving a response."""
+    assert cache.get("missing") is None
+    cache.set("key", {"content": "hello"})
+    assert cache.get("key") == {"content": "hello"}
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_ttl_expiry(cache: ResponseCache):
+    """Tests that expired entries are not returned."""
+    cache.set("key", {"content": "hello"})
+    cache.ttl = -1
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction(tmp_path: Path):
+    """Tests that least recently used entries are evicted over the size limit."""
+    cache = ResponseCache(tmp_path / "small.db", max_size_mb=0.0007, ttl=0)
+    payload = "x" * 300
+    cache.set("a", payload)
+    cache.set("b", payload)
+    cache.get("a")  # "a" is now more recent than "b"
+    cache.set("c", payload)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == payload
+    assert cache.get("c") == payload
+    cache.close()
+
+
+def test_persistence(tmp_path: Path):
+    """Tests that entries survive reopening the database."""
+    path = tmp_path / "persist.db"
+    first = ResponseCache(path)
+    first.set("key", {"content": "kept"})
+    first.close()
+
+    second = ResponseCache(path)
+    assert second.get("key") == {"content": "kept"}
+    second.close()
+
+
+@pytest.mark.asyncio
+async def test_ask_tool_served_from_cache(llm, completion, cache: ResponseCache):
+    """Tests that a repeated ask_tool request does not hit the API."""
+    llm.response_cache = cache
+    tool_call = {
+        "id": "call_1",
+        "type": "function",
+        "function": {"name": "terminate", "arguments": '{"status": "success"}'},
+    }
+    llm.client.chat.completions.responses = [
+        completion(content="done", tool_calls=[tool_call])
+    ]
+    messages = [Message.user_message("finish the task")]
+
+    first = await llm.ask_tool(messages=messages, tools=[])
+    input_tokens = llm.total_input_tokens
+    second = await llm.ask_tool(messages=messages, tools=[])
+
+    assert len(llm.client.chat.completions.calls) == 1
+    assert second.content == first.content
+    assert second.tool_calls[0].function.name == "terminate"
+    assert llm.total_input_tokens == input_tokens
+    assert llm.cached_input_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_ask_served_from_cache(llm, completion, cache: ResponseCache):
+    """Tests that a repeated ask request does not hit the API."""
+    llm.response_cache = cache
+    llm.client.chat.completions.responses = [completion(content="answer")]
+    messages = [Message.user_message("question")]
+
+    assert await llm.ask(messages, stream=False) == "answer"
+    assert await llm.ask(messages, stream=False) == "answer"
+    assert len(llm.client.chat.completions.calls) == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
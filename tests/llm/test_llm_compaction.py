@@ -0,0 +1,164 @@
+"""Tests for context-window compaction of the conversation history."""
+
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.image_store import IMAGE_STORE
+from app.llm_compaction import ContextCompactor
+from app.schema import Function, Message, Role, ToolCall
+from app.tool import Terminate, ToolCollection
+from app.tool.base import BaseTool
+
+
+def count_words(message: Message) -> int:
+    """Counts one token per word of content."""
+    return len((message.content or "").split())
+
+
+def tool_turn(call_id: str, output: str) -> list[Message]:
+    """Builds an assistant tool call followed by its result."""
+    call = ToolCall(id=call_id, function=Function(name="echo", arguments="{}"))
+    return [
+        Message(role=Role.ASSISTANT, content="", tool_calls=[call]),
+        Message.tool_message(output, name="echo", tool_call_id=call_id),
+    ]
+
+
+def history(turns: int, words: int = 100) -> list[Message]:
+    """Builds a task followed by tool turns with long observations."""
+    messages = [Message.user_message("the task")]
+    for i in range(turns):
+        messages += tool_turn(f"c{i}", " ".join(["word"] * words))
+    return messages
+
+
+def assert_pairs_valid(messages: list[Message]) -> None:
+    """Checks that every tool result follows its tool call."""
+    seen = set()
+    for message in messages:
+        if message.tool_calls:
+            seen.update(call.id for call in message.tool_calls)
+        if message.role == Role.TOOL:
+            assert message.tool_call_id in seen
+
+
+def test_history_under_threshold_is_unchanged():
+    """Tests that a fitting history is returned as is."""
+    compactor = ContextCompactor(context_window=10_000)
+    messages = history(3)
+    assert compactor.compact(messages, count_words) is messages
+
+
+def test_old_observations_are_elided_first():
+    """Tests that old tool outputs are shortened before anything is dropped."""
+    compactor = ContextCompactor(context_window=1000, keep_recent=2)
+    compactor.MIN_ELIDE_CHARS = 100
+    compactor.PREVIEW_CHARS = 20
+    messages = history(10)
+
+    compacted = compactor.compact(messages, count_words)
+
+    assert len(compacted) == len(messages)
+    assert "elided to save context" in compacted[2].content
+    assert compacted[-1].content == messages[-1].content
+    assert sum(map(count_words, compacted)) <= compactor.target_tokens
+
+
+def test_oldest_turns_are_dropped_in_pairs():
+    """Tests that dropping keeps the task and valid tool call/result pairs."""
+    compactor = ContextCompactor(context_window=500, keep_recent=4)
+    compactor.MIN_ELIDE_CHARS = 10_000  # Force dropping instead of eliding
+    messages = history(10)
+
+    compacted = compactor.compact(messages, count_words)
+
+    assert compacted[0].content == "the task"
+    assert "earlier messages were removed" in compacted[1].content
+    assert compacted[-4:] == messages[-4:]
+    assert_pairs_valid(compacted)
+    assert compactor.dropped_messages > 0
+
+
+def test_repeated_compaction_updates_notice():
+    """Tests that a second compaction reuses the existing notice."""
+    compactor = ContextCompactor(context_window=500, keep_recent=4)
+    compactor.MIN_ELIDE_CHARS = 10_000
+    compacted = compactor.compact(history(10), count_words)
+    compacted += history(6)[1:]
+
+    again = compactor.compact(compacted, count_words)
+
+    notices = [m for m in again if "earlier messages were removed" in m.content]
+    assert len(notices) == 1
+    assert str(compactor.dropped_messages) in notices[0].content
+
+
+class EchoTool(BaseTool):
+    """Tool returning a long observation."""
+
+    name: str = "echo"
+    description: str = "Returns a long text."
+    parameters: dict = {"type": "object", "properties": {}}
+
+    async def execute(self) -> str:
+        return " ".join(["output"] * 200)
+
+
+@pytest.mark.asyncio
+async def test_input_tokens_stay_bounded_on_long_runs(llm, completion):
+    """Tests that per-step input tokens stay under the limit over 60 steps."""
+    llm.compactor = ContextCompactor(context_window=4000)
+    agent = ToolCallAgent(
+        llm=llm, available_tools=ToolCollection(EchoTool(), Terminate())
+    )
+    agent.memory.add_message(Message.user_message("keep echoing"))
+    call = {
+        "id": "",
+        "type": "function",
+        "function": {"name": "echo", "arguments": "{}"},
+    }
+
+    for step in range(60):
+        llm.client.chat.completions.responses = [
+            completion(content="", tool_calls=[{**call, "id": f"c{step}"}])
+        ]
+        await agent.step()
+
+    sizes = [
+        llm.count_request_tokens(c["messages"], tools=c["tools"])
+        for c in llm.client.chat.completions.calls
+    ]
+    assert max(sizes) <= llm.compactor.limit_tokens
+    assert llm.compactor.compactions > 0
+    assert_pairs_valid(agent.memory.messages)
+
+
+def test_history_counter_counts_only_inlined_images(llm, monkeypatch):
+    """Tests that images sent as placeholders are neither counted nor loaded."""
+    llm.max_inline_images = 1
+    messages = [Message.user_message("browse")]
+    for i in range(5):
+        messages.append(
+            Message.tool_message(
+                f"screenshot {i}",
+                name="browser_use",
+                tool_call_id=f"c{i}",
+                base64_image=f"image-{i}",
+            ).store_image()
+        )
+    loads = []
+    get = IMAGE_STORE.get
+    monkeypatch.setattr(IMAGE_STORE, "get", lambda ref: loads.append(ref) or get(ref))
+
+    count = llm.history_token_counter(messages)
+    estimate = sum(count(m) for m in messages)
+
+    assert len(loads) == 1
+    # Counted one message at a time, each count includes the request overhead
+    overhead = (len(messages) - 1) * llm.token_counter.FORMAT_TOKENS
+    assert estimate == llm.count_request_tokens(messages) + overhead
+    assert estimate < sum(llm.count_request_tokens([m]) for m in messages)
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,165 @@
+"""Tests for load balancing and failover across LLM endpoints."""
+
+import asyncio
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+from app.config import EndpointSettings
+from app.exceptions import CircuitBreakerOpen
+from app.llm_endpoints import Endpoint, EndpointPool
+from app.llm_retry import CircuitBreaker
+from app.schema import Message
+
+
+def connection_error() -> APIConnectionError:
+    """Builds a transient connection error."""
+    return APIConnectionError(request=httpx.Request("POST", "http://test/v1"))
+
+
+@pytest.fixture
+def make_pool(fake_client):
+    """Provides a factory for pools of endpoints backed by fake clients."""
+
+    def factory(count: int, **kwargs) -> EndpointPool:
+        return EndpointPool(
+            [Endpoint(f"http://replica-{i}/v1", fake_client()) for i in range(count)],
+            **kwargs,
+        )
+
+    return factory
+
+
+def create(client):
+    """Sends a completion request through a fake client."""
+    return client.chat.completions.create(model="m", messages=[])
+
+
+def test_from_settings_inherits_api_key():
+    """Tests that endpoints without an api_key use the configuration's key."""
+    pool = EndpointPool.from_settings(
+        [
+            EndpointSettings(base_url="http://a/v1"),
+            EndpointSettings(base_url="http://b/v1", api_key="other"),
+        ],
+        api_type="openai",
+        api_key="default",
+    )
+    assert [e.client.api_key for e in pool.endpoints] == ["default", "other"]
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_routing(make_pool):
+    """Tests that concurrent requests spread across endpoints."""
+    pool = make_pool(3)
+    release = asyncio.Event()
+    used = []
+
+    async def slow(client):
+        used.append(client)
+        await release.wait()
+
+    tasks = [asyncio.create_task(pool.request(slow)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert [e.outstanding for e in pool.endpoints] == [1, 1, 1]
+    assert len(set(map(id, used))) == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert all(e.outstanding == 0 for e in pool.endpoints)
+
+
+@pytest.mark.asyncio
+async def test_prefers_lower_latency(make_pool):
+    """Tests that idle endpoints are ranked by their latency average."""
+    pool = make_pool(2)
+    pool.endpoints[0].latency = 5.0
+    pool.endpoints[1].latency = 0.5
+
+    await pool.request(create)
+    assert len(pool.endpoints[1].client.completions.calls) == 1
+    assert len(pool.endpoints[0].client.completions.calls) == 0
+
+
+@pytest.mark.asyncio
+async def test_failover_on_transient_error(make_pool):
+    """Tests that a failed request is retried on the next endpoint."""
+    pool = make_pool(2)
+    pool.endpoints[1].latency = 2.0  # Endpoint 0 is tried first
+    pool.endpoints[0].client.completions.responses = [connection_error()]
+
+    response = await pool.request(create)
+    assert response.choices[0].message.content == "ok"
+    assert pool.endpoints[0].total_failures == 1
+    assert len(pool.endpoints[1].client.completions.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_no_failover_on_fatal_error(make_pool):
+    """Tests that non-transient errors are raised without trying other endpoints."""
+    pool = make_pool(2)
+    pool.endpoints[1].latency = 2.0
+    pool.endpoints[0].client.completions.responses = [ValueError("bad request")]
+
+    with pytest.raises(ValueError):
+        await pool.request(create)
+    assert len(pool.endpoints[1].client.completions.calls) == 0
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_endpoint_is_skipped(make_pool):
+    """Tests that an endpoint is skipped once its circuit breaker opens."""
+    pool = make_pool(2)
+    failing = pool.endpoints[0]
+    failing.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    failing.latency = 0.01
+    failing.client.completions.responses = [connection_error(), connection_error()]
+
+    await pool.request(create)
+    await pool.request(create)
+    assert not failing.healthy
+
+    await pool.request(create)
+    assert len(failing.client.completions.calls) == 2
+    assert pool.get_stats()[0]["breaker"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_all_breakers_open_fails_fast(make_pool):
+    """Tests that requests are rejected without a call when all endpoints are down."""
+    pool = make_pool(2)
+    for endpoint in pool.endpoints:
+        endpoint.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        endpoint.breaker.record_failure()
+
+    with pytest.raises(CircuitBreakerOpen):
+        await pool.request(create)
+    assert all(not e.client.completions.calls for e in pool.endpoints)
+
+
+@pytest.mark.asyncio
+async def test_all_endpoints_failing_raises_last_error(make_pool):
+    """Tests that the last error is raised when every endpoint fails."""
+    pool = make_pool(2)
+    for endpoint in pool.endpoints:
+        endpoint.client.completions.responses = [connection_error()]
+
+    with pytest.raises(APIConnectionError):
+        await pool.request(create)
+
+
+@pytest.mark.asyncio
+async def test_llm_routes_through_pool(llm, make_pool):
+    """Tests that LLM requests use the endpoint pool when configured."""
+    llm.endpoint_pool = make_pool(2)
+    llm.endpoint_pool.endpoints[0].client.completions.responses = [connection_error()]
+    llm.endpoint_pool.endpoints[1].latency = 2.0
+
+    answer = await llm.ask([Message.user_message("hi")], stream=False)
+    assert answer == "ok"
+    assert llm.client.chat.completions.calls == []
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,135 @@
+"""Tests for hedged LLM requests."""
+
+import asyncio
+
+import pytest
+
+from app.llm_hedging import HedgePolicy
+from app.schema import Message
+
+
+def warmed_up(latency: float = 0.01, **kwargs) -> HedgePolicy:
+    """Creates a policy with enough latency samples and budget to hedge."""
+    policy = HedgePolicy(**kwargs)
+    for _ in range(HedgePolicy.MIN_SAMPLES):
+        policy.record_latency(latency)
+    policy.requests = 100
+    return policy
+
+
+class ScriptedCall:
+    """Request whose successive invocations take scripted durations."""
+
+    def __init__(self, *delays: float):
+        self.delays = list(delays)
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self) -> int:
+        index = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delays[index])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return index
+
+
+def test_no_hedge_without_samples():
+    """Tests that requests are not hedged before latency is known."""
+    assert HedgePolicy().hedge_delay() is None
+
+
+def test_hedge_delay_uses_percentile():
+    """Tests that the hedge delay follows the configured percentile."""
+    policy = HedgePolicy(percentile=0.9)
+    for i in range(1, 101):
+        policy.record_latency(i / 100)
+    policy.requests = 100
+    assert policy.hedge_delay() == pytest.approx(0.9)
+
+
+def test_extra_spend_is_capped():
+    """Tests that hedging stops once the budget is used up."""
+    policy = warmed_up(max_extra_ratio=0.1)
+    policy.hedges_sent = 10
+    assert policy.hedge_delay() is None
+
+
+@pytest.mark.asyncio
+async def test_fast_request_is_not_hedged():
+    """Tests that a request finishing before the delay is not duplicated."""
+    policy = warmed_up(latency=0.05)
+    call = ScriptedCall(0)
+
+    assert await policy.run(call) == 0
+    assert call.started == 1
+    assert policy.hedges_sent == 0
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_and_primary_is_cancelled():
+    """Tests that a faster hedge is used and the slow request cancelled."""
+    policy = warmed_up()
+    call = ScriptedCall(10, 0)
+
+    assert await asyncio.wait_for(policy.run(call), timeout=1) == 1
+    await asyncio.sleep(0)
+    assert call.cancelled == 1
+    assert policy.get_stats()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_primary_wins_after_hedge():
+    """Tests that the original request is used when it finishes first."""
+    policy = warmed_up()
+    call = ScriptedCall(0.03, 10)
+
+    assert await asyncio.wait_for(policy.run(call), timeout=1) == 0
+    await asyncio.sleep(0)
+    assert call.cancelled == 1
+    assert policy.primary_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_falls_back_to_hedge():
+    """Tests that a hedge still succeeds when the original request fails."""
+    policy = warmed_up()
+    attempts = 0
+
+    async def call():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            await asyncio.sleep(0.03)
+            raise ConnectionError("reset")
+        await asyncio.sleep(0.05)
+        return "hedged"
+
+    assert await policy.run(call) == "hedged"
+
+
+@pytest.mark.asyncio
+async def test_llm_hedges_non_streaming_requests(llm, completion):
+    """Tests that ask uses the hedge policy for non-streaming requests."""
+    llm.hedge_policy = warmed_up()
+    calls = 0
+
+    async def create(**params):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(10)
+        return completion(content="fast")
+
+    llm.client.chat.completions.create = create
+    answer = await asyncio.wait_for(
+        llm.ask([Message.user_message("hi")], stream=False), timeout=1
+    )
+    assert answer == "fast"
+    assert llm.hedge_policy.hedge_wins == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
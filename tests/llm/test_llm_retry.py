@@ -0,0 +1,176 @@
+"""Tests for the LLM retry policy and circuit breaker."""
+
+import httpx
+import pytest
+from openai import (
+    APIConnectionError,
+    AuthenticationError,
+    BadRequestError,
+    InternalServerError,
+    RateLimitError,
+)
+
+from app.exceptions import CircuitBreakerOpen, TokenLimitExceeded
+from app.llm_retry import CircuitBreaker, RetryPolicy, get_retry_after, is_retryable
+from app.schema import Message
+
+
+REQUEST = httpx.Request("POST", "http://test/v1/chat/completions")
+
+
+def status_error(error_class, status_code: int, headers: dict | None = None):
+    """Builds an API status error with the given response headers."""
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    return error_class("error", response=response, body=None)
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """Records retry delays instead of sleeping."""
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr("app.llm_retry.asyncio.sleep", sleep)
+    return delays
+
+
+def test_error_classification():
+    """Tests that transient errors are retryable and deterministic ones fatal."""
+    assert is_retryable(APIConnectionError(request=REQUEST))
+    assert is_retryable(status_error(RateLimitError, 429))
+    assert is_retryable(status_error(InternalServerError, 503))
+    assert not is_retryable(status_error(BadRequestError, 400))
+    assert not is_retryable(status_error(AuthenticationError, 401))
+    assert not is_retryable(TokenLimitExceeded("too many tokens"))
+    assert not is_retryable(ValueError("invalid message"))
+
+
+def test_retry_after_headers():
+    """Tests parsing of Retry-After and retry-after-ms headers."""
+    assert get_retry_after(status_error(RateLimitError, 429, {"retry-after": "7"})) == 7
+    assert get_retry_after(
+        status_error(RateLimitError, 429, {"retry-after-ms": "250"})
+    ) == pytest.approx(0.25)
+    assert get_retry_after(status_error(RateLimitError, 429)) is None
+
+
+@pytest.mark.asyncio
+async def test_fatal_error_is_not_retried(no_sleep):
+    """Tests that fatal errors are raised on the first attempt."""
+    policy = RetryPolicy(max_retries=5)
+    attempts = 0
+
+    async def request():
+        nonlocal attempts
+        attempts += 1
+        raise status_error(BadRequestError, 400)
+
+    with pytest.raises(BadRequestError):
+        await policy.call(request)
+    assert attempts == 1
+    assert no_sleep == []
+
+
+@pytest.mark.asyncio
+async def test_retry_honours_retry_after(no_sleep):
+    """Tests that the server-requested delay is used between retries."""
+    policy = RetryPolicy(max_retries=3)
+    errors = [status_error(RateLimitError, 429, {"retry-after": "2"})]
+
+    async def request():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert await policy.call(request) == "ok"
+    assert no_sleep == [2]
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded(no_sleep):
+    """Tests that the last retryable error is raised after max_retries."""
+    policy = RetryPolicy(max_retries=2, max_delay=0.5)
+
+    async def request():
+        raise APIConnectionError(request=REQUEST)
+
+    with pytest.raises(APIConnectionError):
+        await policy.call(request)
+    assert len(no_sleep) == 2
+    assert all(delay <= 0.5 for delay in no_sleep)
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers():
+    """Tests the closed, open and half-open breaker states."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    async def failing():
+        raise APIConnectionError(request=REQUEST)
+
+    async def succeeding():
+        return "ok"
+
+    for _ in range(2):
+        with pytest.raises(APIConnectionError):
+            await breaker.call(failing)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitBreakerOpen):
+        await breaker.call(succeeding)
+
+    breaker._opened_until = 0  # Let the reset timeout pass
+    assert breaker.state == "half_open"
+    assert await breaker.call(succeeding) == "ok"
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_fatal_errors_do_not_trip_breaker():
+    """Tests that request errors are not counted against the endpoint."""
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    async def bad_request():
+        raise status_error(BadRequestError, 400)
+
+    with pytest.raises(BadRequestError):
+        await breaker.call(bad_request)
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_llm_fails_fast_on_fatal_error(llm, no_sleep):
+    """Tests that ask_tool does not retry a bad request."""
+    llm.client.chat.completions.responses = [status_error(BadRequestError, 400)]
+
+    with pytest.raises(BadRequestError):
+        await llm.ask_tool([Message.user_message("hi")], tools=[])
+    assert len(llm.client.chat.completions.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_retries_transient_error(llm, completion, no_sleep):
+    """Tests that ask_tool retries a rate-limited request."""
+    llm.client.chat.completions.responses = [
+        status_error(RateLimitError, 429, {"retry-after": "1"}),
+        completion(content="done"),
+    ]
+
+    response = await llm.ask_tool([Message.user_message("hi")], tools=[])
+    assert response.content == "done"
+    assert no_sleep == [1]
+
+
+@pytest.mark.asyncio
+async def test_token_limit_is_not_retried(llm, no_sleep):
+    """Tests that TokenLimitExceeded is raised directly, not wrapped."""
+    llm.max_input_tokens = 1
+
+    with pytest.raises(TokenLimitExceeded):
+        await llm.ask_tool([Message.user_message("a long question")], tools=[])
+    assert llm.client.chat.completions.calls == []
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,96 @@
+"""Tests for the LLM request scheduler."""
+
+import asyncio
+
+import pytest
+
+from app.llm_scheduler import RequestPriority, RequestScheduler, TokenBucket
+from app.schema import Message
+
+
+def test_token_bucket_wait_time():
+    """Tests token bucket consumption and refill estimates."""
+    bucket = TokenBucket(capacity=10, rate=10)
+    assert bucket.wait_time(10) == 0
+    bucket.consume(10)
+    assert bucket.wait_time(5) == pytest.approx(0.5, abs=0.05)
+    # Requests above capacity only wait for a full bucket
+    assert bucket.wait_time(100) == pytest.approx(1.0, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_unlimited_scheduler_admits_immediately():
+    """Tests that a scheduler without limits never queues."""
+    scheduler = RequestScheduler()
+    await asyncio.wait_for(scheduler.acquire(10_000), timeout=0.1)
+    assert scheduler.get_stats()["admitted"]["acting"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rpm_limit_throttles_requests():
+    """Tests that requests beyond the RPM budget are delayed."""
+    scheduler = RequestScheduler(rpm_limit=600)
+    scheduler._requests = TokenBucket(capacity=2, rate=20)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(scheduler.acquire() for _ in range(4)))
+    elapsed = loop.time() - start
+
+    # Two requests fit the burst, the other two wait 1/20 s each
+    assert elapsed >= 0.09
+    assert scheduler.max_queue_depth >= 2
+
+
+@pytest.mark.asyncio
+async def test_priority_lanes_order_admission():
+    """Tests that waiting requests are admitted by priority."""
+    scheduler = RequestScheduler(rpm_limit=60)
+    scheduler._requests = TokenBucket(capacity=1, rate=50)
+    await scheduler.acquire()  # Drain the bucket
+    order = []
+
+    async def request(priority: RequestPriority, name: str):
+        await scheduler.acquire(priority=priority)
+        order.append(name)
+
+    await asyncio.gather(
+        request(RequestPriority.EXTRACTION, "extract"),
+        request(RequestPriority.ACTING, "act"),
+        request(RequestPriority.PLANNING, "plan"),
+    )
+
+    assert order == ["plan", "act", "extract"]
+
+
+@pytest.mark.asyncio
+async def test_tpm_limit_and_usage_correction():
+    """Tests that actual usage above the estimate delays later requests."""
+    scheduler = RequestScheduler(tpm_limit=6000)
+    scheduler._tokens = TokenBucket(capacity=100, rate=1000)
+    await scheduler.acquire(tokens=50)
+    scheduler.record_usage(100)  # Used 150 in total
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await scheduler.acquire(tokens=10)
+    assert loop.time() - start >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_llm_requests_go_through_scheduler(llm):
+    """Tests that LLM requests are admitted by the scheduler with their priority."""
+    await llm.ask_tool(
+        messages=[Message.user_message("plan")],
+        tools=[],
+        priority=RequestPriority.PLANNING,
+    )
+    await llm.ask([Message.user_message("hi")], stream=False)
+
+    stats = llm.scheduler.get_stats()
+    assert stats["admitted"]["planning"] == 1
+    assert stats["admitted"]["acting"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,94 @@
+"""Tests for the mock OpenAI-compatible server and the load driver."""
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.llm import LLM
+from app.llm_endpoints import create_client
+from app.mock_server import MockLLMServer
+from app.schema import Message
+from benchmarks.llm_load import run_load
+
+
+@pytest_asyncio.fixture
+async def server():
+    """Runs a mock server without latency on a free port."""
+    async with MockLLMServer(seed=0) as server:
+        yield server
+
+
+@pytest_asyncio.fixture
+async def served_llm(llm: LLM, server: MockLLMServer):
+    """Points the test LLM at the mock server."""
+    llm.client = create_client("openai", server.url, "test")
+    try:
+        yield llm
+    finally:
+        await llm.client.close()
+
+
+@pytest.mark.asyncio
+async def test_scripted_tool_calls(served_llm: LLM, server: MockLLMServer):
+    """Tests that replies follow the script by assistant turn."""
+    server.script = [
+        {"tool_calls": [{"name": "bash", "arguments": {"command": "ls"}}]},
+        {"content": "finished"},
+    ]
+    messages = [Message.user_message("list files")]
+
+    reply = await served_llm.ask_tool(messages, tools=[])
+    assert reply.tool_calls[0].function.name == "bash"
+    assert reply.tool_calls[0].function.arguments == '{"command": "ls"}'
+
+    messages.append(Message.from_tool_calls(tool_calls=reply.tool_calls))
+    reply = await served_llm.ask_tool(messages, tools=[])
+    assert reply.content == "finished"
+    assert served_llm.total_completion_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_streaming(served_llm: LLM, server: MockLLMServer):
+    """Tests that streamed replies arrive as server-sent events."""
+    server.script = [{"content": "a streamed mock reply"}]
+
+    answer = await served_llm.ask([Message.user_message("hi")], stream=True)
+
+    assert answer == "a streamed mock reply"
+    assert server.get_stats()["streams"] == 1
+
+
+@pytest.mark.asyncio
+async def test_injected_errors(server: MockLLMServer):
+    """Tests that error rates produce 500 and 429 responses."""
+    request = {"model": "mock", "messages": [{"role": "user", "content": "hi"}]}
+    async with httpx.AsyncClient(base_url=server.url) as client:
+        server.error_rate = 1.0
+        assert (await client.post("/chat/completions", json=request)).status_code == 500
+        server.error_rate, server.rate_limit_rate = 0.0, 1.0
+        assert (await client.post("/chat/completions", json=request)).status_code == 429
+        server.rate_limit_rate = 0.0
+        assert (await client.post("/chat/completions", json=request)).status_code == 200
+        assert (await client.get("/models")).status_code == 404
+
+    assert server.get_stats()["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_load_driver(served_llm: LLM, server: MockLLMServer):
+    """Tests that concurrent agent sessions complete against the server."""
+    server.turns = 2
+    server.latency_ms = 20
+
+    results = await run_load(
+        "manus", served_llm, sessions=4, concurrency=4, prompt="go"
+    )
+
+    assert results["failed"] == 0
+    assert results["request"]["count"] == 8
+    assert server.get_stats()["peak_active"] > 1
+    assert results["session_p95"] >= results["session_p50"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
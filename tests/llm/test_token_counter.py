@@ -0,0 +1,145 @@
+"""Tests for incremental token counting in TokenCounter."""
+
+import time
+
+import pytest
+
+from app.llm import TokenCounter
+from app.schema import Memory, Message
+
+
+class CountingTokenizer:
+    """Whitespace tokenizer that records how much text it had to encode."""
+
+    def __init__(self):
+        self.calls = 0
+        self.encoded_chars = 0
+
+    def encode(self, text: str) -> list[str]:
+        self.calls += 1
+        self.encoded_chars += len(text)
+        return text.split()
+
+
+@pytest.fixture
+def tokenizer() -> CountingTokenizer:
+    """Creates a fresh counting tokenizer."""
+    return CountingTokenizer()
+
+
+@pytest.fixture
+def counter(tokenizer: CountingTokenizer) -> TokenCounter:
+    """Creates a token counter backed by the counting tokenizer."""
+    return TokenCounter(tokenizer)
+
+
+def test_cached_count_matches_uncached(counter: TokenCounter):
+    """Tests that cached counts equal a fresh computation."""
+    messages = [
+        Message.system_message("You are a helpful assistant").to_dict(),
+        Message.user_message("Hello there, how are you").to_dict(),
+        Message.tool_message("tool output", name="bash", tool_call_id="c1").to_dict(),
+    ]
+    expected = TokenCounter.FORMAT_TOKENS + sum(
+        TokenCounter(CountingTokenizer()).count_single_message(m) for m in messages
+    )
+
+    assert counter.count_message_tokens(messages) == expected
+    assert counter.count_message_tokens(messages) == expected
+    assert counter.cache_hits == len(messages)
+
+
+def test_only_new_messages_are_encoded(
+    counter: TokenCounter, tokenizer: CountingTokenizer
+):
+    """Tests that re-counting a grown history only encodes appended messages."""
+    history = [Message.user_message(f"message {i}").to_dict() for i in range(10)]
+    counter.count_message_tokens(history)
+    calls_before = tokenizer.calls
+
+    history.append(Message.assistant_message("a new reply").to_dict())
+    counter.count_message_tokens(history)
+
+    # role + content for exactly one message
+    assert tokenizer.calls - calls_before == 2
+
+
+def test_tool_schema_count_is_cached(
+    counter: TokenCounter, tokenizer: CountingTokenizer
+):
+    """Tests that tool schemas are encoded once."""
+    tools = [
+        {"type": "function", "function": {"name": "bash", "parameters": {}}},
+        {"type": "function", "function": {"name": "terminate", "parameters": {}}},
+    ]
+    first = counter.count_tool_tokens(tools)
+    calls = tokenizer.calls
+
+    assert counter.count_tool_tokens(tools) == first
+    assert tokenizer.calls == calls
+    assert counter.count_tool_tokens(None) == 0
+
+
+def test_tool_schema_counted_by_identity(counter: TokenCounter, monkeypatch):
+    """Tests that schema dicts passed again are not serialized for the cache key."""
+    tools = [{"type": "function", "function": {"name": "bash", "parameters": {}}}]
+    first = counter.count_tool_tokens(tools)
+
+    def fail(obj):
+        raise AssertionError("schema was serialized again")
+
+    monkeypatch.setattr(counter, "_hash", fail)
+    assert counter.count_tool_tokens(tools) == first
+
+
+def test_per_step_counting_cost_stays_flat(
+    counter: TokenCounter, tokenizer: CountingTokenizer
+):
+    """Benchmarks per-step counting cost over a long run with a growing memory.
+
+    Each simulated step appends an assistant and a tool message and re-counts the
+    whole history, as LLM.ask_tool does. The amount of text encoded per step must
+    not grow with the history length.
+    """
+    memory = Memory(max_messages=1000)
+    memory.add_message(Message.user_message("Plan a trip " * 50))
+    encoded_per_step = []
+    elapsed_per_step = []
+
+    for step in range(60):
+        memory.add_message(Message.assistant_message(f"Thinking about step {step:03d}"))
+        memory.add_message(
+            Message.tool_message(
+                "observation " * 200, name="python_execute", tool_call_id=f"c{step:03d}"
+            )
+        )
+        before = tokenizer.encoded_chars
+        start = time.perf_counter()
+        counter.count_message_tokens(memory.to_dict_list())
+        elapsed_per_step.append(time.perf_counter() - start)
+        encoded_per_step.append(tokenizer.encoded_chars - before)
+
+    print(
+        f"\nper-step count time: first={elapsed_per_step[1] * 1e3:.3f}ms "
+        f"last={elapsed_per_step[-1] * 1e3:.3f}ms"
+    )
+    # After the first step every step encodes exactly the two new messages
+    assert len(set(encoded_per_step[1:])) == 1
+    assert encoded_per_step[-1] < encoded_per_step[0]
+
+
+def test_cache_is_bounded(counter: TokenCounter):
+    """Tests that the message cache evicts the oldest entries."""
+    counter.MAX_CACHED_MESSAGES = 5
+    counter.count_message_tokens(
+        [Message.user_message(str(i)).to_dict() for i in range(20)]
+    )
+    assert len(counter._message_cache) == 5
+
+    counter.clear_cache()
+    assert len(counter._message_cache) == 0
+    assert counter.cache_hits == counter.cache_misses == 0
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
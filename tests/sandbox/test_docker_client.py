@@ -0,0 +1,77 @@
+"""Tests for the shared Docker client provider."""
+
+import threading
+
+import pytest
+
+from app.sandbox.core.docker_client import DockerClientProvider
+
+
+class FakeDockerClient:
+    """Docker client stand-in recording its construction arguments."""
+
+    instances = 0
+
+    def __init__(self, **kwargs):
+        FakeDockerClient.instances += 1
+        self.kwargs = kwargs
+        self.api = object()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Provides a provider that builds fake clients."""
+    FakeDockerClient.instances = 0
+    monkeypatch.setattr(
+        "app.sandbox.core.docker_client.docker.from_env", FakeDockerClient
+    )
+    provider = DockerClientProvider(max_pool_size=3, max_workers=2)
+    yield provider
+    provider.close()
+
+
+def test_client_is_shared(provider: DockerClientProvider):
+    """Tests that concurrent users get one client with the configured pool."""
+    clients = []
+    threads = [
+        threading.Thread(target=lambda: clients.append(provider.client))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert FakeDockerClient.instances == 1
+    assert all(client is clients[0] for client in clients)
+    assert clients[0].kwargs == {"max_pool_size": 3}
+    assert provider.api is clients[0].api
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_use_dedicated_executor(provider: DockerClientProvider):
+    """Tests that blocking calls run on the bounded docker executor."""
+    names = [
+        await provider.run(lambda: threading.current_thread().name) for _ in range(5)
+    ]
+
+    assert all(name.startswith("docker") for name in names)
+    assert provider.executor._max_workers == 2
+
+
+def test_close_releases_client(provider: DockerClientProvider):
+    """Tests that closing the provider closes the client."""
+    client = provider.client
+
+    provider.close()
+
+    assert client.closed
+    assert provider.client is not client
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,101 @@
+"""Tests for DockerSession output reading, against a local shell instead of Docker."""
+
+import asyncio
+import socket
+import subprocess
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.sandbox.core.terminal import DockerSession
+
+
+@pytest_asyncio.fixture
+async def session():
+    """Provides a session connected to a local bash over a socket pair."""
+    ours, theirs = socket.socketpair()
+    process = subprocess.Popen(
+        ["bash", "--norc", "--noprofile"],
+        stdin=theirs,
+        stdout=theirs,
+        stderr=theirs,
+    )
+    theirs.close()
+    ours.setblocking(False)
+
+    session = DockerSession("local")
+    session.socket = ours
+    await session._sync()
+    try:
+        yield session
+    finally:
+        await session.close()
+        process.wait(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_output_and_exit_code(session: DockerSession):
+    """Tests that output is returned without markers and the exit code is kept."""
+    assert await session.execute("echo hello; echo 42") == "hello\n42"
+    assert session.last_exit_code == 0
+
+    assert await session.execute("printf 'no newline'; false") == "no newline"
+    assert session.last_exit_code == 1
+
+
+@pytest.mark.asyncio
+async def test_large_output(session: DockerSession):
+    """Tests that output spanning many reads is returned completely."""
+    output = await session.execute("seq 1 100000")
+
+    lines = output.split("\n")
+    assert len(lines) == 100000
+    assert lines[-1] == "100000"
+    assert not session._buffer
+
+
+@pytest.mark.asyncio
+async def test_short_commands_return_quickly(session: DockerSession):
+    """Tests that commands do not wait for a polling interval."""
+    start = time.perf_counter()
+    for _ in range(20):
+        await session.execute("true")
+    assert (time.perf_counter() - start) / 20 < 0.01
+
+
+@pytest.mark.asyncio
+async def test_concurrent_commands_do_not_interleave(session: DockerSession):
+    """Tests that commands sharing a session are run one at a time."""
+    results = await asyncio.gather(
+        *(session.execute(f"sleep 0.01; echo {i}") for i in range(5))
+    )
+    assert results == [str(i) for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_timeout(session: DockerSession):
+    """Tests that a command exceeding the timeout raises TimeoutError."""
+    with pytest.raises(TimeoutError):
+        await session.execute("sleep 1", timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_command_after_timeout(session: DockerSession):
+    """Tests that output of a timed out command does not leak into the next one."""
+    with pytest.raises(TimeoutError):
+        await session.execute("sleep 0.3; echo late", timeout=0.1)
+
+    assert await session.execute("echo next") == "next"
+    assert session.last_exit_code == 0
+    assert not session._stale_markers
+
+    with pytest.raises(TimeoutError):
+        await session.execute("echo early; sleep 0.3; echo late", timeout=0.1)
+    await asyncio.sleep(0.5)
+    assert await session.execute("false") == ""
+    assert session.last_exit_code == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
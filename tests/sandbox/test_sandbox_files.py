@@ -0,0 +1,108 @@
+"""Tests for bulk file transfer, using a container backed by a local directory."""
+
+import io
+import os
+import subprocess
+import tarfile
+import time
+from pathlib import Path
+
+import pytest
+
+from app.config import SandboxSettings
+from app.sandbox.core.docker_client import DockerClientProvider
+from app.sandbox.core.sandbox import DockerSandbox
+
+
+class DirectoryContainer:
+    """Container stand-in whose file system root is a local directory."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.round_trips = 0
+
+    def put_archive(self, path: str, data: io.BytesIO) -> bool:
+        self.round_trips += 1
+        target = self.root / path.lstrip("/")
+        assert target.is_dir(), "Docker requires the target directory to exist"
+        with tarfile.open(fileobj=data) as tar:
+            tar.extractall(target, filter="data")
+        return True
+
+    def exec_run(self, cmd: list[str], demux: bool = False):
+        self.round_trips += 1
+        cmd = list(cmd)
+        cmd[cmd.index("-C") + 1] = str(self.root)
+        result = subprocess.run(cmd, capture_output=True)
+        return result.returncode, (result.stdout, result.stderr)
+
+
+@pytest.fixture
+def sandbox(tmp_path: Path, monkeypatch) -> DockerSandbox:
+    """Creates a sandbox whose container is a local directory."""
+    monkeypatch.setattr(DockerClientProvider, "client", property(lambda self: None))
+    (tmp_path / "workspace").mkdir()
+    (tmp_path / "tmp").mkdir()
+    sandbox = DockerSandbox(SandboxSettings(work_dir="/workspace"))
+    sandbox.container = DirectoryContainer(tmp_path)
+    return sandbox
+
+
+@pytest.mark.asyncio
+async def test_write_and_read_project_in_one_round_trip(sandbox: DockerSandbox):
+    """Tests that a 200-file project is synced with one round trip each way."""
+    files = {f"src/pkg{i % 10}/module{i}.py": f"value = {i}\n" for i in range(200)}
+
+    await sandbox.write_files(files)
+    assert sandbox.container.round_trips == 1
+
+    contents = await sandbox.read_files(list(files))
+    assert sandbox.container.round_trips == 2
+    assert contents == {path: text.encode() for path, text in files.items()}
+
+
+@pytest.mark.asyncio
+async def test_write_file_needs_no_mkdir(sandbox: DockerSandbox):
+    """Tests that single files create their parent directories in the archive."""
+    await sandbox.write_file("a/b/c.txt", "nested")
+
+    root = sandbox.container.root
+    assert (root / "workspace/a/b/c.txt").read_text() == "nested"
+    assert sandbox.container.round_trips == 1
+
+
+@pytest.mark.asyncio
+async def test_write_keeps_existing_directories(sandbox: DockerSandbox):
+    """Tests that writing a file does not reset the mode or mtime of its parents."""
+    src = sandbox.container.root / "workspace/src"
+    src.mkdir(mode=0o700)
+    os.utime(src, (1_700_000_000, 1_700_000_000))
+
+    await sandbox.write_files({"src/a.py": "x = 1\n"})
+
+    assert src.stat().st_mode & 0o777 == 0o700
+    assert src.stat().st_mtime >= 1_700_000_000
+    assert (src / "a.py").stat().st_mtime > time.time() - 60
+
+
+@pytest.mark.asyncio
+async def test_write_outside_work_dir(sandbox: DockerSandbox):
+    """Tests absolute paths outside the working directory."""
+    await sandbox.write_files({"/tmp/out/data.bin": b"\x00\x01", "notes.txt": "hi"})
+
+    root = sandbox.container.root
+    assert (root / "tmp/out/data.bin").read_bytes() == b"\x00\x01"
+    assert (root / "workspace/notes.txt").read_text() == "hi"
+
+
+@pytest.mark.asyncio
+async def test_read_missing_files(sandbox: DockerSandbox):
+    """Tests that missing files are reported by path."""
+    await sandbox.write_files({"present.txt": "here"})
+
+    with pytest.raises(FileNotFoundError, match="absent.txt"):
+        await sandbox.read_files(["present.txt", "absent.txt"])
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
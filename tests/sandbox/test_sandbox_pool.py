@@ -0,0 +1,122 @@
+"""Tests for the warm sandbox pool, using sandboxes that need no Docker."""
+
+import asyncio
+
+import pytest
+
+from app.config import SandboxSettings
+from app.sandbox.core.pool import SandboxPool
+
+
+class FakeSandbox:
+    """Sandbox stand-in recording resets and cleanups."""
+
+    def __init__(self, fail_reset: bool = False):
+        self.fail_reset = fail_reset
+        self.resets = 0
+        self.cleaned_up = False
+
+    async def reset(self) -> None:
+        if self.fail_reset:
+            raise RuntimeError("reset failed")
+        self.resets += 1
+
+    async def cleanup(self) -> None:
+        self.cleaned_up = True
+
+
+@pytest.fixture
+def pool(monkeypatch) -> SandboxPool:
+    """Creates a pool whose sandboxes are fakes."""
+    pool = SandboxPool(SandboxSettings.model_construct(), min_size=2, max_size=3)
+    created = []
+
+    async def create():
+        await asyncio.sleep(0)
+        sandbox = FakeSandbox()
+        created.append(sandbox)
+        return sandbox
+
+    monkeypatch.setattr(pool, "_create", create)
+    pool.created = created
+    return pool
+
+
+async def settle(pool: SandboxPool) -> None:
+    """Waits for the pool's background work."""
+    while pool._tasks:
+        await asyncio.wait(set(pool._tasks))
+
+
+@pytest.mark.asyncio
+async def test_refill_keeps_min_size_warm(pool: SandboxPool):
+    """Tests that the pool fills up to min_size and refills after checkouts."""
+    pool.refill()
+    await settle(pool)
+    assert len(pool._idle) == 2
+
+    sandbox = await pool.acquire()
+    await settle(pool)
+
+    assert sandbox in pool.created
+    assert pool.hits == 1 and pool.misses == 0
+    assert len(pool._idle) == 2
+
+
+@pytest.mark.asyncio
+async def test_cold_checkout_when_empty(pool: SandboxPool):
+    """Tests that an empty pool creates a sandbox on the request path."""
+    sandbox = await pool.acquire()
+    await settle(pool)
+
+    assert isinstance(sandbox, FakeSandbox)
+    assert pool.misses == 1
+    assert len(pool._idle) == 2
+
+
+@pytest.mark.asyncio
+async def test_released_sandboxes_are_reset_and_reused(pool: SandboxPool):
+    """Tests that returned sandboxes are reset and beyond max_size removed."""
+    sandboxes = [await pool.acquire() for _ in range(4)]
+    await settle(pool)
+
+    for sandbox in sandboxes:
+        pool.release(sandbox)
+    await settle(pool)
+
+    assert pool.resets == 4
+    assert len(pool._idle) == pool.max_size
+    assert sum(sandbox.cleaned_up for sandbox in pool.created) == len(
+        pool.created
+    ) - len(pool._idle)
+
+
+@pytest.mark.asyncio
+async def test_failed_reset_removes_sandbox(pool: SandboxPool):
+    """Tests that a sandbox that cannot be reset is not reused."""
+    broken = FakeSandbox(fail_reset=True)
+
+    pool.release(broken)
+    await settle(pool)
+
+    assert broken.cleaned_up
+    assert broken not in pool._idle
+    assert pool.reset_failures == 1
+
+
+@pytest.mark.asyncio
+async def test_close_removes_idle_sandboxes(pool: SandboxPool):
+    """Tests that closing the pool cleans up every idle sandbox."""
+    pool.refill()
+    await settle(pool)
+
+    await pool.close()
+
+    assert not pool._idle
+    assert all(sandbox.cleaned_up for sandbox in pool.created)
+    with pytest.raises(RuntimeError):
+        await pool.acquire()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,132 @@
+"""Tests for per-session state shared by concurrent agent runs."""
+
+import asyncio
+
+import pytest
+
+from app.agent.swe import SWEAgent
+from app.agent.toolcall import ToolCallAgent
+from app.exceptions import TokenLimitExceeded
+from app.llm import LLM
+from app.schema import Message
+from app.session import DEFAULT_SESSION, Session, current_session
+from app.tool import PlanningTool
+from app.tool.file_operators import SandboxFileOperator
+
+
+class RecordingSandboxClient:
+    """Sandbox client stand-in that records its cleanup."""
+
+    def __init__(self):
+        self.cleaned_up = False
+
+    async def cleanup(self) -> None:
+        self.cleaned_up = True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_count_their_own_tokens(llm: LLM):
+    """Tests that usage is tracked per session while the LLM is shared."""
+
+    async def run(prompts: int) -> Session:
+        async with Session() as session:
+            for _ in range(prompts):
+                await llm.ask([Message.user_message("hello there")], stream=False)
+                await asyncio.sleep(0)
+            return session
+
+    first, second = await asyncio.gather(run(1), run(3))
+
+    assert first.usage.requests == 1
+    assert second.usage.requests == 3
+    assert llm.total_input_tokens == first.usage.input_tokens * 4
+
+
+@pytest.mark.asyncio
+async def test_streamed_completion_tokens_count_toward_session(llm: LLM, chunks):
+    """Tests that completion tokens of streamed calls reach the session usage."""
+    llm.client.chat.completions.responses = [
+        chunks("one two three"),
+        chunks(
+            "four five",
+            [
+                {
+                    "id": "c1",
+                    "type": "function",
+                    "function": {"name": "terminate", "arguments": "{}"},
+                }
+            ],
+        ),
+    ]
+
+    async with Session() as session:
+        await llm.ask([Message.user_message("count")], stream=True)
+        await llm.ask_tool_stream([Message.user_message("count")])
+
+    assert session.usage.requests == 2
+    assert session.usage.completion_tokens == llm.total_completion_tokens > 3
+
+
+@pytest.mark.asyncio
+async def test_token_limit_applies_per_session(llm: LLM):
+    """Tests that one session using up its budget does not block another."""
+    messages = [Message.user_message("one two three")]
+    llm.max_input_tokens = llm.count_request_tokens(messages) + 1
+
+    async with Session():
+        await llm.ask(messages, stream=False)
+        with pytest.raises(TokenLimitExceeded):
+            await llm.ask(messages, stream=False)
+
+    async with Session():
+        assert await llm.ask(messages, stream=False) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_current_session_is_inherited_by_tasks():
+    """Tests that tasks started in a session see it and the default is restored."""
+    assert current_session() is DEFAULT_SESSION
+
+    async with Session("outer") as session:
+        seen = await asyncio.create_task(asyncio.sleep(0, current_session()))
+        assert seen is session
+
+    assert current_session() is DEFAULT_SESSION
+
+
+@pytest.mark.asyncio
+async def test_sandbox_client_belongs_to_session():
+    """Tests that file operators use the session's sandbox, released on exit."""
+    client = RecordingSandboxClient()
+    operator = SandboxFileOperator()
+
+    async with Session(sandbox_client=client):
+        assert operator.sandbox_client is client
+    assert client.cleaned_up
+
+    async with Session() as session:
+        assert operator.sandbox_client is session.sandbox_client
+        assert session.sandbox_client is not DEFAULT_SESSION.sandbox_client
+
+
+def test_agents_and_tools_do_not_share_state(llm: LLM):
+    """Tests that default tools and their state are created per instance."""
+    first, second = ToolCallAgent(llm=llm), ToolCallAgent(llm=llm)
+    assert first.available_tools is not second.available_tools
+
+    first, second = SWEAgent(llm=llm), SWEAgent(llm=llm)
+    editors = [
+        agent.available_tools.tool_map["str_replace_editor"]
+        for agent in (first, second)
+    ]
+    assert editors[0] is not editors[1]
+    editors[0]._file_history["/tmp/file.txt"].append("old")
+    assert "/tmp/file.txt" not in editors[1]._file_history
+
+    planning, other = PlanningTool(), PlanningTool()
+    planning.plans["plan"] = {"title": "mine"}
+    assert other.plans == {}
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,75 @@
+"""Tests for the Bash tool session."""
+
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.tool.bash import Bash
+
+
+@pytest_asyncio.fixture
+async def bash():
+    """Provides a Bash tool with a running session."""
+    tool = Bash()
+    await tool.execute(restart=True)
+    try:
+        yield tool
+    finally:
+        # Closing stdin ends the shell, which also ends the output readers
+        tool._session._process.stdin.close()
+        await tool._session._process.wait()
+        for reader in tool._session._readers:
+            await reader
+
+
+@pytest.mark.asyncio
+async def test_output_error_and_exit_code(bash: Bash):
+    """Tests that stdout, stderr and the exit code of a command are reported."""
+    result = await bash.execute(
+        "echo out; echo err >&2; exit_with() { return $1; }; exit_with 3"
+    )
+
+    assert result.output == "out"
+    assert result.error == "err"
+    assert result.exit_code == 3
+
+    result = await bash.execute("printf 'no newline'")
+    assert result.output == "no newline"
+    assert result.exit_code == 0
+
+
+@pytest.mark.asyncio
+async def test_exit_code_is_shown(bash: Bash):
+    """Tests that a failing command's exit code is part of the observation."""
+    result = await bash.execute("ls /nonexistent-dir")
+
+    assert result.exit_code != 0
+    assert f"[exit code: {result.exit_code}]" in str(result)
+
+
+@pytest.mark.asyncio
+async def test_short_commands_return_quickly(bash: Bash):
+    """Tests that commands do not wait for a polling interval."""
+    start = time.perf_counter()
+    for _ in range(10):
+        await bash.execute("true")
+    assert (time.perf_counter() - start) / 10 < 0.05
+
+
+@pytest.mark.asyncio
+async def test_runaway_output_is_capped(bash: Bash):
+    """Tests that huge output keeps only its beginning and end."""
+    result = await bash.execute("seq 1 1000000")
+
+    assert result.output.startswith("1\n2\n3\n")
+    assert result.output.endswith("999999\n1000000")
+    assert "bytes of output omitted" in result.output
+    assert len(result.output) < 2 * bash._session._max_output
+
+    # The session is still usable afterwards
+    assert (await bash.execute("echo next")).output == "next"
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
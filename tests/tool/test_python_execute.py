@@ -0,0 +1,109 @@
+"""Tests for PythonExecute and the warm interpreter pool."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.interpreter_pool import InterpreterPool
+from app.tool.python_execute import PythonExecute
+
+
+@pytest_asyncio.fixture
+async def pool(monkeypatch):
+    """Provides a small pool used by all PythonExecute tools of a test."""
+    pool = InterpreterPool(size=1, preload_modules=("json",))
+    monkeypatch.setattr("app.tool.python_execute.INTERPRETER_POOL", pool)
+    try:
+        yield pool
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_prints_are_returned(pool: InterpreterPool):
+    """Tests that printed output and errors are reported."""
+    tool = PythonExecute()
+
+    assert await tool.execute("print(6 * 7)") == {
+        "observation": "42\n",
+        "success": True,
+    }
+    result = await tool.execute("1 / 0")
+    assert result == {"observation": "division by zero", "success": False}
+
+
+@pytest.mark.asyncio
+async def test_snippets_are_isolated_by_default(pool: InterpreterPool):
+    """Tests that variables do not leak between calls without a session."""
+    tool = PythonExecute()
+
+    await tool.execute("x = 1")
+    await pool._refill_task  # The next call gets a warm worker
+    result = await tool.execute("print(x)")
+
+    assert not result["success"]
+    assert pool.warm_starts >= 1
+
+
+@pytest.mark.asyncio
+async def test_persistent_namespace(pool: InterpreterPool):
+    """Tests that a persistent tool keeps its variables, separate from others."""
+    tool = PythonExecute(persistent_namespace=True)
+    other = PythonExecute(persistent_namespace=True)
+
+    await tool.execute("import json\nx = json.dumps([1])")
+    assert (await tool.execute("print(x)"))["observation"] == "[1]\n"
+    assert not (await other.execute("print(x)"))["success"]
+
+    await tool.cleanup()
+    assert not (await tool.execute("print(x)"))["success"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_replaces_worker(pool: InterpreterPool):
+    """Tests that a timed out snippet is killed and the session starts over."""
+    tool = PythonExecute(persistent_namespace=True)
+    await tool.execute("x = 1")
+
+    result = await tool.execute("while True: pass", timeout=0.5)
+
+    assert not result["success"]
+    assert "timeout" in result["observation"]
+    assert pool.timeouts == 1
+    assert (await tool.execute("print('alive')"))["observation"] == "alive\n"
+    assert not (await tool.execute("print(x)"))["success"]
+
+
+@pytest.mark.asyncio
+async def test_output_is_capped(pool: InterpreterPool):
+    """Tests that printed output beyond the limit is truncated."""
+    tool = PythonExecute(max_output_chars=100)
+
+    result = await tool.execute("print('a' * 1000)")
+
+    assert result["observation"].startswith("a" * 100 + "\n...")
+    assert "901 characters of output truncated" in result["observation"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_snippet_restarts_session(pool: InterpreterPool):
+    """Tests that a cancelled snippet's result is not read by the next call."""
+    tool = PythonExecute(persistent_namespace=True)
+    await tool.execute("x = 1")
+
+    task = asyncio.create_task(
+        tool.execute("import time\ntime.sleep(0.5)\nprint('late')", timeout=5)
+    )
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.5)
+
+    assert (await tool.execute("print('next')"))["observation"] == "next\n"
+    assert not (await tool.execute("print(x)"))["success"]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
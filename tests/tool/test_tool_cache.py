@@ -0,0 +1,174 @@
+"""Tests for reusing results of identical tool calls within a session."""
+
+import pytest
+
+from app.session import Session
+from app.tool import Bash, BrowserUseTool, StrReplaceEditor, ToolCollection
+from app.tool.base import BaseTool, ToolConcurrency, ToolResult
+from app.tool_cache import ToolResultCache
+
+
+class LookupTool(BaseTool):
+    """Read-only tool that counts its executions."""
+
+    name: str = "lookup"
+    description: str = "Looks up a key."
+    parameters: dict = {"type": "object", "properties": {"key": {"type": "string"}}}
+    concurrency: ToolConcurrency = ToolConcurrency.READ_ONLY
+    cache_ttl: float | None = 60
+    calls: int = 0
+
+    async def execute(self, key: str) -> ToolResult:
+        self.calls += 1
+        if key == "missing":
+            return ToolResult(error="not found")
+        return ToolResult(output=f"value of {key}")
+
+
+class FakeBrowser(BrowserUseTool):
+    """Browser tool that records actions instead of driving a browser."""
+
+    actions: list = []
+
+    async def execute(self, action: str, **kwargs) -> ToolResult:
+        self.actions.append(action)
+        return ToolResult(output=f"{action} #{len(self.actions)}")
+
+
+@pytest.mark.asyncio
+async def test_repeated_call_is_cached():
+    """Tests that an identical call is answered from the cache and tagged."""
+    tool = LookupTool()
+    tools = ToolCollection(tool)
+
+    async with Session() as session:
+        first = await tools.execute(name="lookup", tool_input={"key": "a"})
+        second = await tools.execute(name="lookup", tool_input={"key": "a"})
+        await tools.execute(name="lookup", tool_input={"key": "b"})
+
+    assert tool.calls == 2
+    assert first.output == "value of a"
+    assert second.output.startswith("[Cached result")
+    assert second.output.endswith("value of a")
+    assert session.tool_cache.get_stats() == {"entries": 2, "hits": 1, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached():
+    """Tests that failed calls are executed again."""
+    tool = LookupTool()
+    tools = ToolCollection(tool)
+
+    async with Session():
+        for _ in range(2):
+            result = await tools.execute(name="lookup", tool_input={"key": "missing"})
+
+    assert tool.calls == 2
+    assert result.error == "not found"
+
+
+@pytest.mark.asyncio
+async def test_expired_results_are_executed_again(monkeypatch):
+    """Tests that a result is not reused after its TTL."""
+    now = [1000.0]
+    monkeypatch.setattr("app.tool_cache.time.monotonic", lambda: now[0])
+    tool = LookupTool()
+    cache = ToolResultCache()
+
+    async def run():
+        return await tool(key="a")
+
+    await cache.call(tool, {"key": "a"}, run)
+    now[0] += 61
+    await cache.call(tool, {"key": "a"}, run)
+
+    assert tool.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_sessions_do_not_share_results():
+    """Tests that each session has a cache of its own."""
+    tool = LookupTool()
+    tools = ToolCollection(tool)
+
+    for _ in range(2):
+        async with Session():
+            await tools.execute(name="lookup", tool_input={"key": "a"})
+
+    assert tool.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_edit_invalidates_views_of_path(tmp_path):
+    """Tests that editing a file drops its views and its directory's, not others."""
+    edited, other = tmp_path / "edited.txt", tmp_path / "other.txt"
+    edited.write_text("old\n")
+    other.write_text("other\n")
+    tools = ToolCollection(StrReplaceEditor())
+
+    async def view(path) -> str:
+        result = await tools.execute(
+            name="str_replace_editor",
+            tool_input={"command": "view", "path": str(path)},
+        )
+        return str(result)
+
+    async with Session():
+        await view(edited), await view(other), await view(tmp_path)
+        await tools.execute(
+            name="str_replace_editor",
+            tool_input={
+                "command": "str_replace",
+                "path": str(edited),
+                "old_str": "old",
+                "new_str": "new",
+            },
+        )
+
+        viewed = await view(edited)
+        assert "new" in viewed and not viewed.startswith("[Cached")
+        assert (await view(other)).startswith("[Cached")
+        assert not (await view(tmp_path)).startswith("[Cached")
+
+
+@pytest.mark.asyncio
+async def test_browser_extraction_cached_until_page_changes(llm):
+    """Tests that extracted content is reused until another browser action."""
+    browser = FakeBrowser(llm=llm, actions=[])
+    tools = ToolCollection(browser)
+    extract = {"action": "extract_content", "goal": "prices"}
+
+    async with Session():
+        first = await tools.execute(name="browser_use", tool_input=extract)
+        second = await tools.execute(name="browser_use", tool_input=extract)
+        await tools.execute(
+            name="browser_use", tool_input={"action": "click_element", "index": 1}
+        )
+        third = await tools.execute(name="browser_use", tool_input=extract)
+
+    assert browser.actions == ["extract_content", "click_element", "extract_content"]
+    assert second.output.startswith("[Cached result")
+    assert second.output.endswith(first.output)
+    assert third.output == "extract_content #3"
+
+
+@pytest.mark.asyncio
+async def test_exclusive_call_clears_cache():
+    """Tests that a call that may change anything drops all cached results."""
+    lookup = LookupTool()
+    cache = ToolResultCache()
+
+    async def run():
+        return await lookup(key="a")
+
+    async def noop():
+        return None
+
+    await cache.call(lookup, {"key": "a"}, run)
+    await cache.call(Bash(), {"command": "rm -rf build"}, noop)
+
+    assert cache.get_stats()["entries"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
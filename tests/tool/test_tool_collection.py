@@ -0,0 +1,61 @@
+"""Tests for ToolCollection."""
+
+import pytest
+
+from app.tool import Terminate, ToolCollection
+from app.tool.base import BaseTool
+
+
+class EchoTool(BaseTool):
+    """Tool that counts how often its schema is built."""
+
+    name: str = "echo"
+    description: str = "Returns its input."
+    parameters: dict = {"type": "object", "properties": {"text": {"type": "string"}}}
+    builds: int = 0
+
+    def to_param(self) -> dict:
+        self.builds += 1
+        return super().to_param()
+
+    async def execute(self, text: str) -> str:
+        return text
+
+
+def test_schemas_are_memoized():
+    """Tests that tool schemas are built once and reused."""
+    echo = EchoTool()
+    tools = ToolCollection(echo, Terminate())
+
+    first = tools.to_params()
+    second = tools.to_params()
+
+    assert first == second
+    assert all(a is b for a, b in zip(first, second))
+    assert echo.builds == 1
+
+
+def test_add_tool_invalidates_schemas():
+    """Tests that adding a tool rebuilds the schemas."""
+    echo = EchoTool()
+    tools = ToolCollection(echo)
+    tools.to_params()
+
+    tools.add_tool(Terminate())
+
+    assert [p["function"]["name"] for p in tools.to_params()] == ["echo", "terminate"]
+    assert echo.builds == 2
+
+
+def test_to_params_subset():
+    """Tests that a subset of schemas is returned in collection order."""
+    tools = ToolCollection(EchoTool(), Terminate())
+
+    params = tools.to_params({"terminate", "missing"})
+
+    assert [p["function"]["name"] for p in params] == ["terminate"]
+    assert params[0] is tools.to_params()[1]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
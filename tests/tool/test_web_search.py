@@ -0,0 +1,177 @@
+"""Tests for racing search engines and caching their results in WebSearch."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.config import SearchSettings, config
+from app.tool import web_search
+from app.tool.search import BingSearchEngine, WebSearchEngine
+from app.tool.web_search import WebSearch
+
+
+class FakeEngine(WebSearchEngine):
+    """Engine answering after a delay, counting its searches."""
+
+    def __init__(self, links: list[str], delay: float = 0):
+        self.links = links
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = False
+
+    async def perform_search_async(self, query, num_results=10):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.links[:num_results]
+
+
+class BlockingEngine(WebSearchEngine):
+    """Engine with a blocking client, run on its own thread pool."""
+
+    def perform_search(self, query, num_results=10, *args, **kwargs):
+        time.sleep(0.01)
+        return [f"https://blocking.example/{query}"]
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path: Path) -> SearchSettings:
+    """Configures search with a query cache in a temporary directory."""
+    settings = SearchSettings(
+        engine="fast",
+        parallel_engines=2,
+        timeout=0.2,
+        cache_path=str(tmp_path / "search.db"),
+    )
+    monkeypatch.setattr(type(config), "search_config", property(lambda _: settings))
+    monkeypatch.setattr(web_search, "_query_cache", None)
+    yield settings
+    if web_search._query_cache is not None:
+        web_search._query_cache.close()
+
+
+def search_tool(**engines: WebSearchEngine) -> WebSearch:
+    tool = WebSearch()
+    tool._search_engine = dict(engines)
+    return tool
+
+
+@pytest.mark.asyncio
+async def test_first_results_win(settings):
+    """Tests that engines race and the slower one is cancelled."""
+    fast, slow = FakeEngine(["https://fast"]), FakeEngine(["https://slow"], 5)
+    tool = search_tool(fast=fast, slow=slow)
+
+    start = time.perf_counter()
+    assert await tool.execute("query") == ["https://fast"]
+    await asyncio.sleep(0.01)
+
+    assert time.perf_counter() - start < 1
+    assert slow.calls == 1 and slow.cancelled
+
+
+@pytest.mark.asyncio
+async def test_empty_and_hanging_engines_fall_back(settings):
+    """Tests that the next engines are tried after empty results and timeouts."""
+    fallback = FakeEngine(["https://fallback"])
+    tool = search_tool(
+        fast=FakeEngine([]), hanging=FakeEngine(["late"], 5), fallback=fallback
+    )
+
+    assert await tool.execute("query") == ["https://fallback"]
+    assert fallback.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_on_disk(settings):
+    """Tests that repeated queries are answered from the shared disk cache."""
+    engine = FakeEngine(["https://fast"])
+
+    for _ in range(2):
+        assert await search_tool(fast=engine).execute("query") == ["https://fast"]
+    await search_tool(fast=engine).execute("other query")
+
+    assert engine.calls == 2
+    assert Path(settings.cache_path).exists()
+
+
+@pytest.mark.asyncio
+async def test_cache_can_be_disabled(settings):
+    """Tests that every query reaches the engines without the cache."""
+    settings.cache = False
+    engine = FakeEngine(["https://fast"])
+
+    for _ in range(2):
+        await search_tool(fast=engine).execute("query")
+
+    assert engine.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_blocking_engine_runs_on_own_threads(settings):
+    """Tests that engines with blocking clients run off the event loop."""
+    engine = BlockingEngine()
+    try:
+        links = await search_tool(fast=engine).execute("query")
+    finally:
+        await engine.close()
+
+    assert links == ["https://blocking.example/query"]
+
+
+@pytest.mark.asyncio
+async def test_bing_async_pagination():
+    """Tests that Bing pages are fetched through the pooled async client."""
+    pages = []
+
+    def page(request: httpx.Request) -> httpx.Response:
+        pages.append(request.url)
+        n = len(pages)
+        results = "".join(
+            f'<li class="b_algo"><h2><a href="https://r{n}-{i}">t</a></h2></li>'
+            for i in range(2)
+        )
+        html = f'<ol id="b_results">{results}</ol><a title="Next page" href="/search?p={n}">'
+        return httpx.Response(200, text=html)
+
+    engine = BingSearchEngine()
+    engine._clients[asyncio.get_running_loop()] = httpx.AsyncClient(
+        transport=httpx.MockTransport(page)
+    )
+    try:
+        links = await engine.perform_search_async("query", num_results=3)
+    finally:
+        await engine.close()
+
+    assert links == ["https://r1-0", "https://r1-1", "https://r2-0"]
+    assert len(pages) == 2
+
+
+async def get_client(engine: BingSearchEngine) -> httpx.AsyncClient:
+    client = engine._get_client()
+    await client.aclose()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_bing_client_per_event_loop():
+    """Tests that each event loop gets one pooled client, closed with the engine."""
+    engine = BingSearchEngine()
+    client = engine._get_client()
+    other = await asyncio.to_thread(asyncio.run, get_client(engine))
+
+    assert engine._get_client() is client
+    assert other is not client
+
+    await engine.close()
+    assert client.is_closed and not engine._clients
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
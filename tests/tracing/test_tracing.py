@@ -0,0 +1,137 @@
+"""Tests for tracing spans, exporters and the latency summary."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.llm import LLM
+from app.tool import Terminate, ToolCollection
+from app.tracing import TRACER, JsonlSpanExporter, RingBufferExporter, Tracer
+
+
+@pytest.fixture
+def ring() -> RingBufferExporter:
+    """Enables the global tracer with an in-memory exporter."""
+    exporter = RingBufferExporter()
+    enabled, exporters = TRACER.enabled, TRACER.exporters
+    TRACER.enabled, TRACER.exporters = True, [exporter]
+    TRACER.reset()
+    try:
+        yield exporter
+    finally:
+        TRACER.enabled, TRACER.exporters = enabled, exporters
+        TRACER.reset()
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_tasks():
+    """Tests that spans opened in started tasks are children of the current span."""
+    ring = RingBufferExporter()
+    tracer = Tracer(enabled=True, exporters=[ring])
+
+    async def child(n: int) -> None:
+        with tracer.span("child", n=n):
+            await asyncio.sleep(0)
+
+    with tracer.span("root") as root:
+        await asyncio.gather(child(1), child(2))
+
+    spans = {span.name: span for span in ring.spans}
+    assert [span.name for span in ring.spans] == ["child", "child", "root"]
+    assert root.parent_id is None
+    assert all(s.parent_id == root.span_id for s in ring.spans if s.name == "child")
+    assert {s.trace_id for s in ring.spans} == {root.trace_id}
+    assert spans["root"].duration >= spans["child"].duration
+
+
+def test_jsonl_exporter_records_errors(tmp_path: Path):
+    """Tests that spans are written as JSON lines, errors included."""
+    exporter = JsonlSpanExporter(tmp_path / "traces.jsonl")
+    tracer = Tracer(enabled=True, exporters=[exporter])
+
+    with pytest.raises(ValueError):
+        with tracer.span("failing", tool="bash"):
+            raise ValueError("boom")
+    exporter.close()
+
+    (record,) = [json.loads(line) for line in exporter.path.read_text().splitlines()]
+    assert record["name"] == "failing"
+    assert record["attributes"] == {"tool": "bash"}
+    assert record["error"] == "ValueError: boom"
+    assert record["duration"] >= 0
+
+
+def test_summary_percentiles():
+    """Tests p50/p95 per span name and the summary table."""
+    tracer = Tracer(enabled=True)
+    for duration in range(1, 101):
+        with tracer.span("op"):
+            pass
+        # Replace the measured duration with a known one
+        tracer._durations["op"][-1] = duration / 1000
+
+    stats = tracer.get_stats()["op"]
+    assert stats["count"] == 100
+    assert stats["p50"] == pytest.approx(0.050)
+    assert stats["p95"] == pytest.approx(0.095)
+
+    table = tracer.summary().splitlines()
+    assert table[0].split() == [
+        "Span",
+        "Count",
+        "p50",
+        "(ms)",
+        "p95",
+        "(ms)",
+        "Max",
+        "(ms)",
+    ]
+    assert table[1].split() == ["op", "100", "50.0", "95.0", "100.0"]
+
+
+def test_disabled_tracer_records_nothing():
+    """Tests that a disabled tracer hands out no spans."""
+    ring = RingBufferExporter()
+    tracer = Tracer(exporters=[ring])
+
+    with tracer.span("op") as span:
+        assert span is None
+    assert not ring.spans
+    assert tracer.get_stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_agent_run_is_traced(llm: LLM, completion, ring: RingBufferExporter):
+    """Tests the span tree of an agent step: think, LLM request and tool call."""
+    terminate = {
+        "id": "c1",
+        "type": "function",
+        "function": {"name": "terminate", "arguments": '{"status": "success"}'},
+    }
+    llm.client.chat.completions.responses = [
+        completion(content="", tool_calls=[terminate])
+    ]
+    agent = ToolCallAgent(llm=llm, available_tools=ToolCollection(Terminate()))
+
+    await agent.run("finish")
+
+    by_id = {span.span_id: span for span in ring.spans}
+
+    def parent(name: str) -> str:
+        (span,) = [s for s in ring.spans if s.name == name]
+        return by_id[span.parent_id].name
+
+    assert parent("agent.step") == "agent.run"
+    assert parent("agent.think") == "agent.step"
+    assert parent("llm.ask_tool") == "agent.think"
+    assert parent("llm.request") == "llm.ask_tool"
+    assert parent("agent.act") == "agent.step"
+    assert parent("tool.execute") == "agent.act"
+    assert TRACER.get_stats()["tool.execute"]["count"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])